@@ -3,21 +3,28 @@ Retriever Agent
 Performs semantic search across dual vector databases (RFPs and Proposals).
 """
 
+import asyncio
 import json
 import time
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Literal, Union
 from datetime import datetime
-from dataclasses import asdict
+from dataclasses import asdict, dataclass
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
 from core.extract_text import TextExtractor, TextChunk
+from core.encoders import get_encoder
+from core.lexical_index import BM25Index
+from core.log_sink import get_log_sink
+from core.micro_batcher import MicroBatcher
+from core.output_sink import OutputRecord, get_output_sink
+from core.metrics import StageTimer, registry as metrics_registry
+from core import serialization
 
 
 class QueryInput(BaseModel):
@@ -26,6 +33,17 @@ class QueryInput(BaseModel):
     document_path: Optional[str] = None
     top_k: int = 10
     similarity_threshold: float = 0.1
+    search_mode: Literal["dense", "lexical", "hybrid"] = "dense"
+    hybrid_alpha: float = 0.5
+    # Dense search only: "top_k" takes the k nearest and drops those under the
+    # threshold, "range" returns every chunk above the threshold and
+    # "range_top_k" returns at most k chunks above the threshold
+    threshold_mode: Literal["top_k", "range", "range_top_k"] = "top_k"
+    # "mmr" reranks mmr_fetch_k candidates (default 4 * top_k) by maximal
+    # marginal relevance; mmr_lambda 1.0 is pure relevance, 0.0 pure diversity
+    rerank: Literal["none", "mmr"] = "none"
+    mmr_lambda: float = 0.7
+    mmr_fetch_k: Optional[int] = None
 
 
 class RetrievalMatch(BaseModel):
@@ -46,9 +64,77 @@ class RetrievalResult(BaseModel):
     metadata: Dict[str, Any]
 
 
+@dataclass
+class MatchRecords:
+    """
+    Column-oriented search hits.
+    
+    Holds chunk positions and scores as arrays and only materializes match
+    dictionaries (or pydantic models) when the result is serialized.
+    """
+    chunks: List[Dict[str, Any]]
+    indices: np.ndarray
+    scores: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.indices)
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Matches as plain dictionaries with the RetrievalMatch fields."""
+        chunks = self.chunks
+        return [
+            {
+                "id": chunks[idx]["id"],
+                "content": chunks[idx]["content"],
+                "source_file": chunks[idx]["source_file"],
+                "similarity_score": score,
+                "chunk_metadata": dict(chunks[idx]["metadata"])
+            }
+            for idx, score in zip(self.indices.tolist(), self.scores.tolist())
+        ]
+    
+    def to_matches(self) -> List[RetrievalMatch]:
+        """Matches as RetrievalMatch models (built without re-validation)."""
+        return [RetrievalMatch.model_construct(**record) for record in self.to_dicts()]
+
+
+# Search results in either representation
+Matches = Union[List[RetrievalMatch], MatchRecords]
+
+
+RETRIEVAL_STAGE_SECONDS = metrics_registry.histogram(
+    "propulse_retrieval_stage_seconds",
+    "Retrieval latency by stage in seconds",
+    label_names=("stage",)
+)
+RETRIEVAL_SECONDS = metrics_registry.histogram(
+    "propulse_retrieval_seconds",
+    "End-to-end retrieval latency in seconds"
+)
+
+
+@dataclass
+class _PendingQuery:
+    """Query waiting in the async retrieval micro-batcher."""
+    retrieval_id: str
+    timer: StageTimer
+    query: QueryInput
+    query_text: str
+    submitted_at: float
+
+
 class VectorDatabase:
     """Vector database wrapper for FAISS index and chunks."""
     
+    # Candidates taken from each ranker per requested result in hybrid mode
+    HYBRID_CANDIDATE_FACTOR = 4
+    
+    # Safety cap on the number of hits returned by a range search
+    RANGE_SEARCH_MAX_RESULTS = 10000
+    
+    # Candidates fetched per requested result before MMR reranking
+    MMR_CANDIDATE_FACTOR = 4
+    
     def __init__(self, db_path: Path):
         """
         Initialize vector database.
@@ -60,6 +146,7 @@ class VectorDatabase:
         self.index = None
         self.chunks = []
         self.metadata = {}
+        self.lexical_index = None
         
         if self.db_path.exists():
             self.load()
@@ -86,6 +173,19 @@ class VectorDatabase:
                 with open(metadata_path, 'r', encoding='utf-8') as f:
                     self.metadata = json.load(f)
                 logger.info(f"Loaded database metadata: {self.metadata.get('document_type', 'unknown')}")
+            
+            # Load lexical index (optional, built alongside the FAISS index)
+            lexical_path = self.db_path / "lexical"
+            if lexical_path.exists() and self.metadata.get("lexical_index") is False:
+                logger.warning(f"Ignoring lexical index left over from an earlier build: {lexical_path}")
+            elif lexical_path.exists():
+                self.lexical_index = BM25Index.load(lexical_path)
+                if self.lexical_index.num_docs != len(self.chunks):
+                    logger.warning(
+                        f"Lexical index covers {self.lexical_index.num_docs} chunks, "
+                        f"expected {len(self.chunks)}; ignoring it"
+                    )
+                    self.lexical_index = None
         
         except Exception as e:
             logger.error(f"Error loading vector database from {self.db_path}: {e}")
@@ -95,6 +195,71 @@ class VectorDatabase:
         """Check if database is properly loaded."""
         return self.index is not None and len(self.chunks) > 0
     
+    def has_lexical_index(self) -> bool:
+        """Check if a lexical index is available for this database."""
+        return self.lexical_index is not None
+    
+    def _records(self, indices: np.ndarray, scores: np.ndarray) -> MatchRecords:
+        """Wrap chunk positions and scores as column-oriented matches."""
+        return MatchRecords(
+            self.chunks,
+            np.asarray(indices, dtype=np.int64),
+            np.asarray(scores, dtype=np.float32)
+        )
+    
+    def _select_hits(
+        self,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        similarity_threshold: float
+    ) -> MatchRecords:
+        """Keep the first top_k valid hits of one index row that pass the threshold."""
+        scores, indices = scores[:top_k], indices[:top_k]
+        keep = (indices != -1) & (scores >= similarity_threshold)
+        return self._records(indices[keep], scores[keep])
+    
+    def _empty_records(self) -> MatchRecords:
+        """Column-oriented result with no matches."""
+        return self._records(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+    
+    def search_records(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 10,
+        similarity_threshold: float = 0.1
+    ) -> MatchRecords:
+        """
+        Search for similar chunks, returning column-oriented matches.
+        
+        Args:
+            query_embedding: Query embedding vector
+            top_k: Number of top results to return
+            similarity_threshold: Minimum similarity score
+            
+        Returns:
+            Matches above the threshold, best first
+        """
+        if not self.is_loaded():
+            logger.warning("Vector database not loaded")
+            return self._empty_records()
+        
+        try:
+            # Perform search
+            scores, indices = self.index.search(
+                query_embedding.astype(np.float32).reshape(1, -1),
+                min(top_k, self.index.ntotal)
+            )
+            
+            records = self._select_hits(scores[0], indices[0], top_k, similarity_threshold)
+            
+            logger.info(f"Found {len(records)} matches above threshold {similarity_threshold}")
+            return records
+        
+        except Exception as e:
+            logger.error(f"Error during vector search: {e}")
+            return self._empty_records()
+    
     def search(
         self,
         query_embedding: np.ndarray,
@@ -112,41 +277,358 @@ class VectorDatabase:
         Returns:
             List of retrieval matches
         """
+        return self.search_records(query_embedding, top_k, similarity_threshold).to_matches()
+    
+    def search_batch_records(
+        self,
+        query_embeddings: np.ndarray,
+        top_ks: List[int],
+        similarity_thresholds: List[float]
+    ) -> List[MatchRecords]:
+        """
+        Search for several queries with a single index call, returning column-oriented matches.
+        
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            top_ks: Number of top results to return for each query
+            similarity_thresholds: Minimum similarity score for each query
+            
+        Returns:
+            Matches for each query
+        """
         if not self.is_loaded():
             logger.warning("Vector database not loaded")
-            return []
+            return [self._empty_records() for _ in top_ks]
         
         try:
-            # Perform search
             scores, indices = self.index.search(
+                query_embeddings.astype(np.float32).reshape(len(top_ks), -1),
+                min(max(top_ks), self.index.ntotal)
+            )
+            
+            results = [
+                self._select_hits(row_scores, row_indices, top_k, threshold)
+                for row_scores, row_indices, top_k, threshold in zip(scores, indices, top_ks, similarity_thresholds)
+            ]
+            
+            logger.info(f"Batched search of {len(top_ks)} queries found {sum(map(len, results))} matches")
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error during batched vector search: {e}")
+            return [self._empty_records() for _ in top_ks]
+    
+    def range_search_records(
+        self,
+        query_embedding: np.ndarray,
+        similarity_threshold: float,
+        top_k: Optional[int] = None
+    ) -> MatchRecords:
+        """
+        Find every chunk scoring at or above a threshold, returning column-oriented matches.
+        
+        Uses FAISS range search so the index does the threshold filtering and
+        the result size follows the data rather than a fixed k. Results are
+        capped at ``top_k`` (if given) and at ``RANGE_SEARCH_MAX_RESULTS``.
+        Index types without range search support fall back to a k-nearest
+        search of the cap size.
+        
+        Args:
+            query_embedding: Query embedding vector
+            similarity_threshold: Minimum similarity score
+            top_k: Maximum number of results to return
+            
+        Returns:
+            Matches above the threshold, best first
+        """
+        if not self.is_loaded():
+            logger.warning("Vector database not loaded")
+            return self._empty_records()
+        
+        limit = min(top_k or self.RANGE_SEARCH_MAX_RESULTS, self.RANGE_SEARCH_MAX_RESULTS)
+        query = query_embedding.astype(np.float32).reshape(1, -1)
+        
+        try:
+            try:
+                # FAISS keeps scores strictly above the radius for inner-product indexes
+                radius = float(np.nextafter(np.float32(similarity_threshold), np.float32(-np.inf)))
+                lims, scores, indices = self.index.range_search(query, radius)
+                scores, indices = scores[lims[0]:lims[1]], indices[lims[0]:lims[1]]
+            except RuntimeError:
+                logger.warning("Index does not support range search, falling back to k-nearest search")
+                scores, indices = self.index.search(query, min(limit, self.index.ntotal))
+                scores, indices = scores[0], indices[0]
+            
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                scores, indices = scores[top], indices[top]
+            order = np.argsort(-scores, kind="stable")
+            
+            records = self._select_hits(scores[order], indices[order], limit, similarity_threshold)
+            
+            logger.info(f"Range search found {len(records)} matches above threshold {similarity_threshold}")
+            return records
+        
+        except Exception as e:
+            logger.error(f"Error during range search: {e}")
+            return self._empty_records()
+    
+    def range_search(
+        self,
+        query_embedding: np.ndarray,
+        similarity_threshold: float,
+        top_k: Optional[int] = None
+    ) -> List[RetrievalMatch]:
+        """
+        Find every chunk scoring at or above a threshold.
+        
+        Args:
+            query_embedding: Query embedding vector
+            similarity_threshold: Minimum similarity score
+            top_k: Maximum number of results to return
+            
+        Returns:
+            List of retrieval matches
+        """
+        return self.range_search_records(query_embedding, similarity_threshold, top_k).to_matches()
+    
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_ks: List[int],
+        similarity_thresholds: List[float]
+    ) -> List[List[RetrievalMatch]]:
+        """
+        Search for several queries with a single index call.
+        
+        Args:
+            query_embeddings: Query embedding matrix, one row per query
+            top_ks: Number of top results to return for each query
+            similarity_thresholds: Minimum similarity score for each query
+            
+        Returns:
+            List of retrieval matches for each query
+        """
+        return [
+            records.to_matches()
+            for records in self.search_batch_records(query_embeddings, top_ks, similarity_thresholds)
+        ]
+    
+    def lexical_search_records(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        similarity_threshold: float = 0.1
+    ) -> MatchRecords:
+        """
+        Search for chunks sharing terms with the query using BM25.
+        
+        Scores are divided by the query's BM25 upper bound (see
+        ``BM25Index.max_score``), so they fall in [0, 1] and a weak match
+        stays weak however good the other results are.
+        
+        Args:
+            query_text: Query text
+            top_k: Number of top results to return
+            similarity_threshold: Minimum normalized score
+            
+        Returns:
+            Matches above the threshold, best first
+        """
+        if not self.is_loaded() or not self.has_lexical_index():
+            logger.warning("Lexical index not loaded")
+            return self._empty_records()
+        
+        try:
+            scores, indices = self.lexical_index.search(query_text, top_k)
+            if len(scores) == 0:
+                return self._empty_records()
+            
+            records = self._select_hits(
+                scores / self.lexical_index.max_score(query_text), indices, top_k, similarity_threshold
+            )
+            
+            logger.info(f"Found {len(records)} lexical matches above threshold {similarity_threshold}")
+            return records
+        
+        except Exception as e:
+            logger.error(f"Error during lexical search: {e}")
+            return self._empty_records()
+    
+    def lexical_search(
+        self,
+        query_text: str,
+        top_k: int = 10,
+        similarity_threshold: float = 0.1
+    ) -> List[RetrievalMatch]:
+        """
+        Search for chunks sharing terms with the query using BM25.
+        
+        Args:
+            query_text: Query text
+            top_k: Number of top results to return
+            similarity_threshold: Minimum normalized score
+            
+        Returns:
+            List of retrieval matches
+        """
+        return self.lexical_search_records(query_text, top_k, similarity_threshold).to_matches()
+    
+    def _dense_scores(self, query_embedding: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """Compute inner-product scores for specific chunks from stored vectors."""
+        try:
+            vectors = self.index.reconstruct_batch(indices.astype(np.int64))
+            return vectors @ query_embedding.astype(np.float32)
+        except RuntimeError:
+            # Index type without direct reconstruction support
+            return np.zeros(len(indices), dtype=np.float32)
+    
+    def mmr_rerank_records(
+        self,
+        query_embedding: np.ndarray,
+        candidates: MatchRecords,
+        top_k: int,
+        mmr_lambda: float = 0.7
+    ) -> MatchRecords:
+        """
+        Rerank candidates by maximal marginal relevance.
+        
+        Candidate vectors are reconstructed from the index. Relevance and
+        pairwise similarities come from two matrix products, and each greedy
+        step updates every candidate's redundancy with one vectorized
+        maximum, so selection costs O(top_k * candidates).
+        
+        Args:
+            query_embedding: Query embedding vector
+            candidates: Candidate matches, e.g. from a wider search
+            top_k: Number of matches to select
+            mmr_lambda: Trade-off between relevance (1.0) and diversity (0.0)
+            
+        Returns:
+            Selected matches in selection order, keeping their original scores
+        """
+        count = min(top_k, len(candidates))
+        if count == 0:
+            return self._empty_records()
+        
+        try:
+            vectors = self.index.reconstruct_batch(candidates.indices)
+        except RuntimeError:
+            # Index type without direct reconstruction support
+            logger.warning("Index cannot reconstruct vectors; skipping MMR reranking")
+            return self._records(candidates.indices[:count], candidates.scores[:count])
+        
+        relevance = vectors @ query_embedding.astype(np.float32).reshape(-1)
+        similarity = vectors @ vectors.T
+        
+        redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+        available = np.ones(len(candidates), dtype=bool)
+        selected = np.empty(count, dtype=np.int64)
+        for step in range(count):
+            # Before anything is selected redundancy is -inf, so start with the most relevant
+            penalty = np.where(np.isneginf(redundancy), 0.0, redundancy)
+            mmr = mmr_lambda * relevance - (1.0 - mmr_lambda) * penalty
+            mmr[~available] = -np.inf
+            pick = int(np.argmax(mmr))
+            selected[step] = pick
+            available[pick] = False
+            redundancy = np.maximum(redundancy, similarity[pick])
+        
+        return self._records(candidates.indices[selected], candidates.scores[selected])
+    
+    def hybrid_search_records(
+        self,
+        query_embedding: np.ndarray,
+        query_text: str,
+        top_k: int = 10,
+        similarity_threshold: float = 0.1,
+        alpha: float = 0.5
+    ) -> MatchRecords:
+        """
+        Search with both dense and BM25 scoring and fuse the results.
+        
+        Candidates from both rankers are scored by both, then combined as
+        ``alpha * cosine + (1 - alpha) * normalized_bm25``, with BM25 scores
+        divided by the query's upper bound.
+        
+        Args:
+            query_embedding: Query embedding vector
+            query_text: Query text
+            top_k: Number of top results to return
+            similarity_threshold: Minimum fused score
+            alpha: Weight of the dense score (1.0 is dense only)
+            
+        Returns:
+            Matches above the threshold, best first
+        """
+        if not self.has_lexical_index():
+            logger.warning("Lexical index not loaded, falling back to dense search")
+            return self.search_records(query_embedding, top_k, similarity_threshold)
+        
+        if not self.is_loaded():
+            logger.warning("Vector database not loaded")
+            return self._empty_records()
+        
+        try:
+            candidate_k = min(top_k * self.HYBRID_CANDIDATE_FACTOR, self.index.ntotal)
+            
+            dense_scores, dense_indices = self.index.search(
                 query_embedding.astype(np.float32).reshape(1, -1),
-                min(top_k, self.index.ntotal)
+                candidate_k
             )
+            dense_valid = dense_indices[0] != -1
+            dense_lookup = dict(zip(dense_indices[0][dense_valid], dense_scores[0][dense_valid]))
             
-            matches = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1:  # No more results
-                    break
-                
-                if score < similarity_threshold:
-                    continue
-                
-                chunk_data = self.chunks[idx]
-                match = RetrievalMatch(
-                    id=chunk_data["id"],
-                    content=chunk_data["content"],
-                    source_file=chunk_data["source_file"],
-                    similarity_score=float(score),
-                    chunk_metadata=chunk_data["metadata"]
-                )
-                matches.append(match)
-            
-            logger.info(f"Found {len(matches)} matches above threshold {similarity_threshold}")
-            return matches
+            lexical_scores, lexical_indices = self.lexical_index.search(query_text, candidate_k)
+            lexical_bound = self.lexical_index.max_score(query_text) if len(lexical_scores) else 1.0
+            lexical_lookup = dict(zip(lexical_indices, lexical_scores / lexical_bound))
+            
+            candidates = np.array(sorted(set(dense_lookup) | set(lexical_lookup)), dtype=np.int64)
+            if len(candidates) == 0:
+                return self._empty_records()
+            
+            dense = np.array([dense_lookup.get(idx, np.nan) for idx in candidates], dtype=np.float32)
+            missing = np.isnan(dense)
+            if missing.any():
+                dense[missing] = self._dense_scores(query_embedding, candidates[missing])
+            lexical = np.array([lexical_lookup.get(idx, 0.0) for idx in candidates], dtype=np.float32)
+            
+            fused = alpha * np.clip(dense, 0.0, 1.0) + (1 - alpha) * lexical
+            order = np.argsort(-fused, kind="stable")
+            
+            records = self._select_hits(fused[order], candidates[order], top_k, similarity_threshold)
+            
+            logger.info(f"Found {len(records)} hybrid matches above threshold {similarity_threshold}")
+            return records
         
         except Exception as e:
-            logger.error(f"Error during vector search: {e}")
-            return []
+            logger.error(f"Error during hybrid search: {e}")
+            return self._empty_records()
+    
+    def hybrid_search(
+        self,
+        query_embedding: np.ndarray,
+        query_text: str,
+        top_k: int = 10,
+        similarity_threshold: float = 0.1,
+        alpha: float = 0.5
+    ) -> List[RetrievalMatch]:
+        """
+        Search with both dense and BM25 scoring and fuse the results.
+        
+        Args:
+            query_embedding: Query embedding vector
+            query_text: Query text
+            top_k: Number of top results to return
+            similarity_threshold: Minimum fused score
+            alpha: Weight of the dense score (1.0 is dense only)
+            
+        Returns:
+            List of retrieval matches
+        """
+        return self.hybrid_search_records(
+            query_embedding, query_text, top_k, similarity_threshold, alpha
+        ).to_matches()
 
 
 class RetrieverAgent:
@@ -159,7 +641,15 @@ class RetrieverAgent:
         rfp_db_path: str,
         proposal_db_path: str,
         model_name: str = "all-MiniLM-L6-v2",
-        log_file: str = "logs/retriever_log.jsonl"
+        log_file: str = "logs/retriever_log.jsonl",
+        batch_max_size: int = 32,
+        batch_max_wait_ms: float = 5.0,
+        encoder_backend: str = "torch",
+        onnx_dir: Optional[str] = None,
+        enable_tracing: bool = False,
+        fast_path: bool = False,
+        output_sink: str = "jsonl",
+        output_dir: str = "shared/mcp_schemas"
     ):
         """
         Initialize the Retriever Agent.
@@ -169,23 +659,68 @@ class RetrieverAgent:
             proposal_db_path: Path to proposal vector database
             model_name: Sentence transformer model name
             log_file: Path to log file
+            batch_max_size: Maximum queries coalesced per batch in aretrieve
+            batch_max_wait_ms: Maximum time aretrieve waits for a batch to fill
+            encoder_backend: Query encoder backend ("torch" or "onnx")
+            onnx_dir: ONNX export directory for the onnx backend
+            enable_tracing: Emit an OpenTelemetry span per retrieval stage
+            fast_path: Keep matches column-oriented and build results without
+                pydantic validation (same output shape)
+            output_sink: How saved results are stored: "jsonl" (rolling
+                gzipped segments), "sqlite" or "files" (one JSON file per
+                result); written in the background
+            output_dir: Directory saved results are written to
         """
         self.model_name = model_name
-        self.encoder = SentenceTransformer(model_name)
+        self.encoder_backend = encoder_backend
+        self.onnx_dir = onnx_dir
+        self._encoder = None
         self.text_extractor = TextExtractor()
+        self.enable_tracing = enable_tracing
+        self.fast_path = fast_path
+        self.output_sink_backend = output_sink
+        self.output_dir = output_dir
+        self._output_sink = None
         
         # Load vector databases
         self.rfp_db = VectorDatabase(Path(rfp_db_path))
         self.proposal_db = VectorDatabase(Path(proposal_db_path))
         
+        # Micro-batching for async retrieval
+        self.query_batcher = MicroBatcher(
+            self._retrieve_batch,
+            max_batch_size=batch_max_size,
+            max_wait_ms=batch_max_wait_ms,
+            name="retrieval"
+        )
+        
         # Setup logging
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.log_sink = get_log_sink(self.log_file)
         
-        logger.info(f"Initialized RetrieverAgent with model: {model_name}")
+        logger.info(f"Initialized RetrieverAgent with model: {model_name} ({encoder_backend} backend)")
         logger.info(f"RFP DB loaded: {self.rfp_db.is_loaded()}")
         logger.info(f"Proposal DB loaded: {self.proposal_db.is_loaded()}")
     
+    @property
+    def encoder(self):
+        """Query encoder, taken from the shared encoder registry on first use."""
+        if self._encoder is None:
+            self._encoder = get_encoder(self.model_name, backend=self.encoder_backend, onnx_dir=self.onnx_dir)
+        return self._encoder
+    
+    @property
+    def output_sink(self):
+        """Sink for saved results, taken from the shared sink registry on first use."""
+        if self._output_sink is None:
+            self._output_sink = get_output_sink(self.output_sink_backend, self.output_dir, "retriever_output")
+        return self._output_sink
+    
+    def warmup(self):
+        """Load the encoder and run one encode so the first query is not slowed down."""
+        self._embed_query("warmup")
+    
     def _extract_query_text(self, query: QueryInput) -> str:
         """
         Extract and combine text from query input.
@@ -242,6 +777,166 @@ class RetrieverAgent:
         else:
             return "text_only"
     
+    def _search_database(
+        self,
+        db: VectorDatabase,
+        query: QueryInput,
+        query_text: str,
+        query_embedding: Optional[np.ndarray],
+        records: bool = False
+    ) -> Matches:
+        """Search a single database using the query's search mode."""
+        use_records = self.fast_path or records
+        
+        if query.rerank == "mmr":
+            fetch_k = query.mmr_fetch_k or query.top_k * db.MMR_CANDIDATE_FACTOR
+            candidates = self._search_database(
+                db, query.model_copy(update={"top_k": fetch_k, "rerank": "none"}),
+                query_text, query_embedding, records=True
+            )
+            top_k = len(candidates) if query.threshold_mode == "range" else query.top_k
+            reranked = db.mmr_rerank_records(query_embedding, candidates, top_k, query.mmr_lambda)
+            return reranked if use_records else reranked.to_matches()
+        
+        if query.search_mode == "lexical":
+            search = db.lexical_search_records if use_records else db.lexical_search
+            return search(
+                query_text,
+                top_k=query.top_k,
+                similarity_threshold=query.similarity_threshold
+            )
+        
+        if query.search_mode == "hybrid":
+            search = db.hybrid_search_records if use_records else db.hybrid_search
+            return search(
+                query_embedding,
+                query_text,
+                top_k=query.top_k,
+                similarity_threshold=query.similarity_threshold,
+                alpha=query.hybrid_alpha
+            )
+        
+        if query.threshold_mode != "top_k":
+            search = db.range_search_records if use_records else db.range_search
+            return search(
+                query_embedding,
+                similarity_threshold=query.similarity_threshold,
+                top_k=query.top_k if query.threshold_mode == "range_top_k" else None
+            )
+        
+        search = db.search_records if use_records else db.search
+        return search(
+            query_embedding,
+            top_k=query.top_k,
+            similarity_threshold=query.similarity_threshold
+        )
+    
+    @staticmethod
+    def _match_dicts(matches: Matches) -> List[Dict[str, Any]]:
+        """Serialize matches to dictionaries for the result document."""
+        if isinstance(matches, MatchRecords):
+            return matches.to_dicts()
+        return [match.dict() for match in matches]
+    
+    def _search_parameters(self, query: QueryInput) -> Dict[str, Any]:
+        """Build the search parameters recorded in result metadata."""
+        parameters = {
+            "top_k": query.top_k,
+            "similarity_threshold": query.similarity_threshold,
+            "search_mode": query.search_mode
+        }
+        if query.search_mode == "hybrid":
+            parameters["hybrid_alpha"] = query.hybrid_alpha
+        if query.search_mode == "dense" and query.threshold_mode != "top_k":
+            parameters["threshold_mode"] = query.threshold_mode
+        if query.rerank == "mmr":
+            parameters["rerank"] = query.rerank
+            parameters["mmr_lambda"] = query.mmr_lambda
+            parameters["mmr_fetch_k"] = query.mmr_fetch_k
+        return parameters
+    
+    def _build_result(
+        self,
+        retrieval_id: str,
+        timer: StageTimer,
+        query: QueryInput,
+        rfp_matches: Matches,
+        proposal_matches: Matches,
+        extra_metadata: Optional[Dict[str, Any]] = None
+    ) -> RetrievalResult:
+        """Create, log and record metrics for the result of a successful retrieval."""
+        with timer.stage("serialize"):
+            rfp_dicts = self._match_dicts(rfp_matches)
+            proposal_dicts = self._match_dicts(proposal_matches)
+            
+            # The fast path skips re-validating a document built from trusted values
+            build = RetrievalResult.model_construct if self.fast_path else RetrievalResult
+            result = build(
+                retrieval_id=retrieval_id,
+                timestamp=datetime.now().isoformat(),
+                query={
+                    "text": query.text or "",
+                    "document_path": query.document_path,
+                    "query_type": self._determine_query_type(query)
+                },
+                results={
+                    "rfp_matches": rfp_dicts,
+                    "proposal_matches": proposal_dicts,
+                    "total_matches": len(rfp_dicts) + len(proposal_dicts)
+                },
+                metadata={
+                    "retrieval_time_ms": 0.0,
+                    "model_used": self.model_name,
+                    "search_parameters": self._search_parameters(query),
+                    **(extra_metadata or {})
+                }
+            )
+        
+        # Calculate retrieval time
+        retrieval_time = timer.elapsed() * 1000
+        result.metadata["retrieval_time_ms"] = retrieval_time
+        result.metadata["stage_timings_ms"] = timer.as_dict()
+        timer.observe(RETRIEVAL_STAGE_SECONDS, RETRIEVAL_SECONDS)
+        
+        # Log the retrieval
+        self._log_retrieval(result, rfp_dicts, proposal_dicts)
+        
+        logger.info(f"Retrieval {retrieval_id} completed in {retrieval_time:.2f}ms")
+        logger.info(f"Found {len(rfp_dicts)} RFP matches, {len(proposal_dicts)} proposal matches")
+        
+        return result
+    
+    def _build_error_result(
+        self,
+        retrieval_id: str,
+        timer: StageTimer,
+        query: QueryInput,
+        error: Exception
+    ) -> RetrievalResult:
+        """Create an empty result recording a retrieval error."""
+        logger.error(f"Error during retrieval {retrieval_id}: {error}")
+        return RetrievalResult(
+            retrieval_id=retrieval_id,
+            timestamp=datetime.now().isoformat(),
+            query={
+                "text": query.text or "",
+                "document_path": query.document_path,
+                "query_type": self._determine_query_type(query)
+            },
+            results={
+                "rfp_matches": [],
+                "proposal_matches": [],
+                "total_matches": 0
+            },
+            metadata={
+                "retrieval_time_ms": timer.elapsed() * 1000,
+                "model_used": self.model_name,
+                "search_parameters": self._search_parameters(query),
+                "stage_timings_ms": timer.as_dict(),
+                "error": str(error)
+            }
+        )
+    
     def retrieve(self, query: QueryInput) -> RetrievalResult:
         """
         Perform retrieval across both vector databases.
@@ -252,104 +947,170 @@ class RetrieverAgent:
         Returns:
             Retrieval result following MCP schema
         """
-        start_time = time.time()
+        timer = StageTimer("retrieval", tracing=self.enable_tracing)
         retrieval_id = str(uuid.uuid4())
         
         logger.info(f"Starting retrieval {retrieval_id}")
         
         try:
             # Extract and embed query
-            query_text = self._extract_query_text(query)
+            with timer.stage("extract"):
+                query_text = self._extract_query_text(query)
             if not query_text.strip():
                 raise ValueError("No query text provided")
             
-            query_embedding = self._embed_query(query_text)
+            # Lexical-only queries never touch the encoder unless MMR needs the embedding
+            query_embedding = None
+            if query.search_mode != "lexical" or query.rerank == "mmr":
+                with timer.stage("encode"):
+                    query_embedding = self._embed_query(query_text)
             
             # Search both databases
             rfp_matches = []
             proposal_matches = []
             
             if self.rfp_db.is_loaded():
-                rfp_matches = self.rfp_db.search(
-                    query_embedding,
-                    top_k=query.top_k,
-                    similarity_threshold=query.similarity_threshold
-                )
+                with timer.stage("rfp_search"):
+                    rfp_matches = self._search_database(self.rfp_db, query, query_text, query_embedding)
             
             if self.proposal_db.is_loaded():
-                proposal_matches = self.proposal_db.search(
-                    query_embedding,
-                    top_k=query.top_k,
-                    similarity_threshold=query.similarity_threshold
-                )
+                with timer.stage("proposal_search"):
+                    proposal_matches = self._search_database(self.proposal_db, query, query_text, query_embedding)
             
-            # Calculate retrieval time
-            retrieval_time = (time.time() - start_time) * 1000
+            return self._build_result(retrieval_id, timer, query, rfp_matches, proposal_matches)
+        
+        except Exception as e:
+            # Return empty result with error
+            return self._build_error_result(retrieval_id, timer, query, e)
+    
+    def _retrieve_batch(self, requests: List[_PendingQuery]) -> List[RetrievalResult]:
+        """
+        Retrieve a batch of queries with one encode call and one search per database.
+        
+        Dense top-k queries share a single batched FAISS search per database;
+        lexical, hybrid, range and MMR queries reuse the batched embeddings
+        but are searched individually. Batch stage durations are attributed to
+        every query in the batch.
+        
+        Args:
+            requests: Queries waiting in the micro-batcher
             
-            # Create result
-            result = RetrievalResult(
-                retrieval_id=retrieval_id,
-                timestamp=datetime.now().isoformat(),
-                query={
-                    "text": query.text or "",
-                    "document_path": query.document_path,
-                    "query_type": self._determine_query_type(query)
-                },
-                results={
-                    "rfp_matches": [match.dict() for match in rfp_matches],
-                    "proposal_matches": [match.dict() for match in proposal_matches],
-                    "total_matches": len(rfp_matches) + len(proposal_matches)
-                },
-                metadata={
-                    "retrieval_time_ms": retrieval_time,
-                    "model_used": self.model_name,
-                    "search_parameters": {
-                        "top_k": query.top_k,
-                        "similarity_threshold": query.similarity_threshold
-                    }
-                }
-            )
+        Returns:
+            One retrieval result per request, in order
+        """
+        batch_timer = StageTimer("retrieval_batch", tracing=self.enable_tracing)
+        for request in requests:
+            request.timer.add("queue_wait", batch_timer.start_time - request.submitted_at)
+        
+        batch_size = len(requests)
+        extra_metadata = {"batch_size": batch_size}
+        
+        try:
+            embedded = [
+                i for i, request in enumerate(requests)
+                if request.query.search_mode != "lexical" or request.query.rerank == "mmr"
+            ]
+            embeddings = {}
+            if embedded:
+                with batch_timer.stage("encode"):
+                    vectors = self.encoder.encode(
+                        [requests[i].query_text for i in embedded],
+                        convert_to_numpy=True,
+                        normalize_embeddings=True
+                    )
+                embeddings = dict(zip(embedded, vectors))
+        except Exception as e:
+            return [
+                self._build_error_result(request.retrieval_id, request.timer, request.query, e)
+                for request in requests
+            ]
+        
+        dense = [
+            i for i in embedded
+            if requests[i].query.search_mode == "dense" and requests[i].query.threshold_mode == "top_k"
+            and requests[i].query.rerank == "none"
+        ]
+        batched_searches = set(dense)
+        matches = {"rfp": [[] for _ in requests], "proposal": [[] for _ in requests]}
+        
+        for db_name, db in (("rfp", self.rfp_db), ("proposal", self.proposal_db)):
+            if not db.is_loaded():
+                continue
             
-            # Log the retrieval
-            self._log_retrieval(result, rfp_matches, proposal_matches)
+            with batch_timer.stage(f"{db_name}_search"):
+                if dense:
+                    search_batch = db.search_batch_records if self.fast_path else db.search_batch
+                    batched = search_batch(
+                        np.stack([embeddings[i] for i in dense]),
+                        top_ks=[requests[i].query.top_k for i in dense],
+                        similarity_thresholds=[requests[i].query.similarity_threshold for i in dense]
+                    )
+                    for i, db_matches in zip(dense, batched):
+                        matches[db_name][i] = db_matches
+                
+                for i, request in enumerate(requests):
+                    if i not in batched_searches:
+                        matches[db_name][i] = self._search_database(
+                            db, request.query, request.query_text, embeddings.get(i)
+                        )
+        
+        results = []
+        for i, request in enumerate(requests):
+            for stage, seconds in batch_timer.durations.items():
+                request.timer.add(stage, seconds)
+            try:
+                results.append(self._build_result(
+                    request.retrieval_id, request.timer, request.query,
+                    matches["rfp"][i], matches["proposal"][i],
+                    extra_metadata
+                ))
+            except Exception as e:
+                results.append(self._build_error_result(request.retrieval_id, request.timer, request.query, e))
+        
+        return results
+    
+    async def aretrieve(self, query: QueryInput) -> RetrievalResult:
+        """
+        Perform retrieval without blocking the event loop.
+        
+        Document extraction runs in an executor thread. Queries arriving
+        within ``batch_max_wait_ms`` of each other are coalesced into a single
+        encode call and a single batched index search.
+        
+        Args:
+            query: Input query
             
-            logger.info(f"Retrieval {retrieval_id} completed in {retrieval_time:.2f}ms")
-            logger.info(f"Found {len(rfp_matches)} RFP matches, {len(proposal_matches)} proposal matches")
+        Returns:
+            Retrieval result following MCP schema
+        """
+        timer = StageTimer("retrieval", tracing=self.enable_tracing)
+        retrieval_id = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+        
+        logger.info(f"Starting async retrieval {retrieval_id}")
+        
+        try:
+            with timer.stage("extract"):
+                query_text = await loop.run_in_executor(None, self._extract_query_text, query)
+            if not query_text.strip():
+                raise ValueError("No query text provided")
             
-            return result
+            return await self.query_batcher.submit(
+                _PendingQuery(retrieval_id, timer, query, query_text, time.perf_counter())
+            )
         
         except Exception as e:
-            logger.error(f"Error during retrieval {retrieval_id}: {e}")
-            # Return empty result with error
-            return RetrievalResult(
-                retrieval_id=retrieval_id,
-                timestamp=datetime.now().isoformat(),
-                query={
-                    "text": query.text or "",
-                    "document_path": query.document_path,
-                    "query_type": self._determine_query_type(query)
-                },
-                results={
-                    "rfp_matches": [],
-                    "proposal_matches": [],
-                    "total_matches": 0
-                },
-                metadata={
-                    "retrieval_time_ms": (time.time() - start_time) * 1000,
-                    "model_used": self.model_name,
-                    "search_parameters": {
-                        "top_k": query.top_k,
-                        "similarity_threshold": query.similarity_threshold
-                    },
-                    "error": str(e)
-                }
-            )
+            return self._build_error_result(retrieval_id, timer, query, e)
+    
+    def batching_stats(self) -> Dict[str, Any]:
+        """Get achieved batch size statistics for async retrieval."""
+        return self.query_batcher.stats()
     
     def _log_retrieval(
         self,
         result: RetrievalResult,
-        rfp_matches: List[RetrievalMatch],
-        proposal_matches: List[RetrievalMatch]
+        rfp_matches: List[Dict[str, Any]],
+        proposal_matches: List[Dict[str, Any]]
     ):
         """Log retrieval metadata to JSONL file."""
         try:
@@ -360,37 +1121,88 @@ class RetrieverAgent:
                 "retrieval_time_ms": result.metadata["retrieval_time_ms"],
                 "rfp_matches_count": len(rfp_matches),
                 "proposal_matches_count": len(proposal_matches),
-                "top_rfp_score": max([m.similarity_score for m in rfp_matches], default=0.0),
-                "top_proposal_score": max([m.similarity_score for m in proposal_matches], default=0.0),
-                "rfp_source_files": list(set([m.source_file for m in rfp_matches])),
-                "proposal_source_files": list(set([m.source_file for m in proposal_matches])),
+                "top_rfp_score": max([m["similarity_score"] for m in rfp_matches], default=0.0),
+                "top_proposal_score": max([m["similarity_score"] for m in proposal_matches], default=0.0),
+                "rfp_source_files": list(set([m["source_file"] for m in rfp_matches])),
+                "proposal_source_files": list(set([m["source_file"] for m in proposal_matches])),
                 "model_used": result.metadata["model_used"]
             }
             
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + '\n')
+            # Written by the background sink, off the request thread
+            self.log_sink.write(json.dumps(log_entry))
         
         except Exception as e:
             logger.error(f"Error logging retrieval: {e}")
     
-    def save_result(self, result: RetrievalResult, output_path: Optional[str] = None):
+    def flush_logs(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for queued retrieval log entries to reach disk.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            True if all entries were written within the timeout
+        """
+        return self.log_sink.flush(timeout)
+    
+    def flush_outputs(self, timeout: float = 5.0) -> bool:
         """
-        Save retrieval result to file.
+        Wait for saved results queued so far to reach disk.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            True if all results were written within the timeout
+        """
+        if self._output_sink is None:
+            return True
+        return self._output_sink.flush(timeout)
+    
+    @staticmethod
+    def result_document(result: RetrievalResult) -> Dict[str, Any]:
+        """
+        Get the MCP output document for a result without copying its contents.
+        
+        Equivalent to ``result.dict()`` since every field already holds
+        plain JSON values.
         
         Args:
             result: Retrieval result
-            output_path: Output file path (optional)
+            
+        Returns:
+            Result document
+        """
+        return {name: getattr(result, name) for name in RetrievalResult.model_fields}
+    
+    def save_result(self, result: RetrievalResult, output_path: Optional[str] = None, indent: bool = True) -> str:
+        """
+        Save retrieval result.
+        
+        Results are queued to the agent's output sink and written in the
+        background, unless an output file is given.
+        
+        Args:
+            result: Retrieval result
+            output_path: Write the result to this file right away instead
+            indent: Pretty-print the JSON document (output file only)
+            
+        Returns:
+            Where the result is stored
         """
         if not output_path:
-            output_path = f"shared/mcp_schemas/retriever_output_{result.retrieval_id}.json"
+            location = self.output_sink.write(OutputRecord(result.retrieval_id, self.result_document(result)))
+            logger.debug(f"Queued retrieval result for {location}")
+            return location
         
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result.dict(), f, indent=2, ensure_ascii=False)
+        serialization.dump(self.result_document(result), output_file, indent=indent)
         
         logger.info(f"Saved retrieval result to {output_file}")
+        return str(output_file)
 
 
 def main():
@@ -403,7 +1215,8 @@ def main():
     # Initialize agent
     agent = RetrieverAgent(
         rfp_db_path=os.getenv("VECTOR_DB_RFP_PATH", "data/vector_dbs/rfp_db"),
-        proposal_db_path=os.getenv("VECTOR_DB_PROPOSAL_PATH", "data/vector_dbs/proposal_db")
+        proposal_db_path=os.getenv("VECTOR_DB_PROPOSAL_PATH", "data/vector_dbs/proposal_db"),
+        encoder_backend=os.getenv("ENCODER_BACKEND", "torch")
     )
     
     # Example query
@@ -417,8 +1230,10 @@ def main():
     result = agent.retrieve(query)
     
     # Save result
-    agent.save_result(result)
+    location = agent.save_result(result)
+    agent.flush_outputs()
     
+    print(f"Result saved to: {location}")
     print(f"Retrieval completed: {result.results['total_matches']} total matches found")
 
 
@@ -12,14 +12,26 @@ import uuid
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 from pathlib import Path
-from dataclasses import dataclass
-import csv
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor
 
-import markdown
 from pydantic import BaseModel, Field
 
+from core.context_cache import CONTEXT_CACHE_BACKENDS, CachedPrefix
+from core.context_compression import ContextCompressor
+from core.llm_resilience import CallStats, ResilientCaller, iter_with_deadline
+from core.markdown_render import markdown_renderer, stitch_sections
+from core.model_pool import freeze, model_pool
+from core.output_sink import OutputRecord, get_output_sink, write_record_files
+from core.prompt_templates import get_template_store
+from core.rate_limiter import PermitGroup, get_rate_limiter
+from core.response_cache import ResponseCache
+from core.semantic_cache import SemanticCache
+from core.token_budget import TokenBudgeter, TokenEstimator
+from core.usage_store import UsageRecord, get_usage_store
+
 # Import Google ADK components
 try:
     import google.generativeai as genai
@@ -59,6 +71,7 @@ class Section(BaseModel):
     word_count: int
     sources_referenced: List[str] = []
     confidence_score: Optional[float] = None
+    generation_metadata: Dict[str, Any] = {}
 
 
 class WriterOutput(BaseModel):
@@ -76,18 +89,60 @@ class WriterAgent:
     
     Features:
     - Persona-based content generation
-    - Section-specific prompting
-    - Markdown to HTML conversion
+    - Section-specific prompting with compiled, hot-reloaded templates
+    - Markdown to HTML conversion (pooled converters, stitched document with merged TOC)
+    - Concurrent section generation
+    - Streaming generation
+    - Optional on-disk response cache and semantic near-duplicate cache
+    - Shared prompt prefix caching across the sections of a proposal
+    - Prompt token budgeting of retrieved context
+    - Query-focused extractive compression of retrieved context
+    - Model call deadlines, retries, hedged requests and partial results
+    - Client-side requests/tokens per minute limiting with a fair queue
     - Token usage tracking
     - Comprehensive logging
     """
     
+    MAX_CONTEXT_MATCHES = 5
+    CONTEXT_SEPARATOR = "\n\n---\n\n"
+    
+    DEFAULT_GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "top_k": 40,
+        "max_output_tokens": 4000,
+    }
+    
     def __init__(
         self,
         personas_path: str = "shared/personas.json",
         section_prompts_dir: str = "shared/templates/section_prompts",
         model_name: str = "gemini-2.5-flash",
-        logs_dir: str = "logs"
+        logs_dir: str = "logs",
+        max_concurrent_sections: int = 1,
+        response_cache_path: Optional[str] = None,
+        response_cache_max_bytes: int = 256 * 1024 * 1024,
+        semantic_cache_threshold: Optional[float] = None,
+        semantic_cache_model: str = "all-MiniLM-L6-v2",
+        context_cache: Optional[str] = None,
+        prompt_token_budget: Optional[int] = None,
+        exact_token_counting: bool = False,
+        context_compression: bool = False,
+        compression_sentences_per_match: int = 3,
+        compression_model: str = "all-MiniLM-L6-v2",
+        template_reload_interval_s: float = 1.0,
+        max_attempts: int = 3,
+        call_timeout_s: Optional[float] = None,
+        section_deadline_s: Optional[float] = None,
+        hedge_requests: bool = False,
+        allow_partial_results: bool = False,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        rate_limit_path: Optional[str] = None,
+        rate_limit_timeout_s: Optional[float] = None,
+        usage_store_path: Optional[str] = None,
+        output_sink: str = "jsonl",
+        output_dir: str = "data/generated"
     ):
         """
         Initialize the Writer Agent.
@@ -97,11 +152,105 @@ class WriterAgent:
             section_prompts_dir: Directory containing section prompt templates
             model_name: Gemini model to use
             logs_dir: Directory for log files
+            max_concurrent_sections: Maximum section requests in flight at once
+                (1 generates sections one after another)
+            response_cache_path: SQLite file for caching section responses
+                (disabled when None). Only deterministic requests
+                (temperature 0) are cached unless ``generation_params``
+                sets ``"cache": True``.
+            response_cache_max_bytes: Size bound of the response cache
+            semantic_cache_threshold: Minimum cosine similarity between user
+                prompts for reusing a cached section (disabled when None).
+                Persona, section, retrieved context, model and generation
+                config must match exactly.
+            semantic_cache_model: Sentence transformer used to embed prompts
+                for the semantic cache
+            context_cache: Context caching backend for the prompt prefix
+                shared by a proposal's sections ("gemini" or "local";
+                disabled when None)
+            prompt_token_budget: Maximum prompt tokens per section; retrieved
+                context is ranked and trimmed to fit (unbounded when None)
+            exact_token_counting: Check budgeted prompts with the model's
+                count_tokens call instead of relying on the local estimate
+            context_compression: Reduce each retrieved match to the sentences
+                most similar to the section's query before prompting
+            compression_sentences_per_match: Sentences kept per match
+            compression_model: Sentence transformer used to score sentences
+                (shared with the retriever through the encoder registry)
+            template_reload_interval_s: Minimum time between checks for
+                changed template files (applies when this agent is the first
+                to use them in the process)
+            max_attempts: Attempts per model call; rate limits, server errors
+                and timeouts are retried with jittered exponential backoff
+            call_timeout_s: Deadline for each model call attempt
+            section_deadline_s: Deadline for a section across all attempts
+            hedge_requests: Send a duplicate request when a call runs past the
+                recent p95 latency and use whichever answers first
+            allow_partial_results: Return the sections that succeeded when
+                others fail, instead of failing the whole generation
+            requests_per_minute: Provider request quota; calls queue for
+                capacity instead of failing (unlimited when None)
+            tokens_per_minute: Provider token quota, charged with estimated
+                prompt and completion tokens and settled with the real usage
+            rate_limit_path: SQLite file sharing the quota with other
+                processes (in-process only when None)
+            rate_limit_timeout_s: Longest wait for quota before a call fails
+                (the call's deadline also applies)
+            usage_store_path: SQLite file recording token usage and latency
+                per section (``usage_metrics.sqlite`` in ``logs_dir`` when
+                None); token usage CSV files from earlier versions found in
+                ``logs_dir`` are imported into it
+            output_sink: How saved results are stored: "jsonl" (rolling
+                gzipped segments), "sqlite" or "files" (JSON, Markdown and
+                HTML files per proposal); written in the background
+            output_dir: Directory saved results are written to
         """
+        if max_concurrent_sections < 1:
+            raise ValueError("max_concurrent_sections must be at least 1")
+        if context_cache is not None and context_cache not in CONTEXT_CACHE_BACKENDS:
+            raise ValueError(f"Unknown context cache backend: {context_cache}")
+        
         self.personas_path = Path(personas_path)
         self.section_prompts_dir = Path(section_prompts_dir)
         self.model_name = model_name
         self.logs_dir = Path(logs_dir)
+        self.max_concurrent_sections = max_concurrent_sections
+        self._safety_settings_list = None
+        self._safety_key = None
+        self.response_cache = (
+            ResponseCache(response_cache_path, max_bytes=response_cache_max_bytes)
+            if response_cache_path else None
+        )
+        self.semantic_cache = (
+            SemanticCache(threshold=semantic_cache_threshold, model_name=semantic_cache_model)
+            if semantic_cache_threshold is not None else None
+        )
+        self.context_cache = CONTEXT_CACHE_BACKENDS[context_cache]() if context_cache else None
+        self.prompt_token_budget = prompt_token_budget
+        self.exact_token_counting = exact_token_counting
+        self.token_estimator = TokenEstimator()
+        self.token_budgeter = TokenBudgeter(self.token_estimator)
+        self.context_compressor = (
+            ContextCompressor(sentences_per_match=compression_sentences_per_match, model_name=compression_model)
+            if context_compression else None
+        )
+        self.llm_caller = ResilientCaller(
+            max_attempts=max_attempts,
+            call_timeout_s=call_timeout_s,
+            deadline_s=section_deadline_s,
+            hedge=hedge_requests,
+            max_workers=max(16, 2 * max_concurrent_sections)
+        )
+        self.allow_partial_results = allow_partial_results
+        self.rate_limiter = (
+            get_rate_limiter(model_name, requests_per_minute, tokens_per_minute, path=rate_limit_path)
+            if requests_per_minute or tokens_per_minute else None
+        )
+        self.rate_limit_timeout_s = rate_limit_timeout_s
+        self._completion_tokens_ema: Optional[float] = None
+        self.output_sink_backend = output_sink
+        self.output_dir = output_dir
+        self._output_sink = None
         
         # Ensure logs directory exists
         self.logs_dir.mkdir(exist_ok=True)
@@ -109,16 +258,19 @@ class WriterAgent:
         # Initialize logging
         self.logger = self._setup_logging()
         
-        # Load personas and section prompts
-        self.personas = self._load_personas()
-        self.section_prompts = self._load_section_prompts()
+        # Compiled personas and section prompts, shared by agents using the same files
+        self.templates = get_template_store(
+            self.personas_path, self.section_prompts_dir, check_interval_s=template_reload_interval_s
+        )
         
         # Initialize Gemini
         self.model = self._initialize_gemini()
+        if exact_token_counting and self.model is not None:
+            self.token_estimator.count_fn = lambda text: self.model.count_tokens(text).total_tokens
         
-        # Token usage CSV file
-        self.token_csv_path = self.logs_dir / "token_usage.csv"
-        self._initialize_token_csv()
+        # Token usage and latency metrics
+        self.usage_store_path = Path(usage_store_path) if usage_store_path else self.logs_dir / "usage_metrics.sqlite"
+        self._initialize_usage_store()
         
         self.logger.info(f"Writer Agent initialized with model: {self.model_name}")
     
@@ -147,42 +299,53 @@ class WriterAgent:
         
         return logger
     
-    def _load_personas(self) -> Dict[str, Any]:
-        """Load personas configuration."""
-        try:
-            with open(self.personas_path, 'r', encoding='utf-8') as f:
-                personas_data = json.load(f)
-            
-            self.logger.info(f"Loaded {len(personas_data.get('personas', {}))} personas")
-            return personas_data
-        
-        except FileNotFoundError:
-            self.logger.warning(f"Personas file not found: {self.personas_path}")
-            return {"personas": {}, "default_persona": "consultant"}
-        
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Invalid JSON in personas file: {e}")
-            return {"personas": {}, "default_persona": "consultant"}
+    @property
+    def output_sink(self):
+        """Sink for saved results, taken from the shared sink registry on first use."""
+        if self._output_sink is None:
+            self._output_sink = get_output_sink(self.output_sink_backend, self.output_dir, "writer_output")
+        return self._output_sink
     
-    def _load_section_prompts(self) -> Dict[str, str]:
-        """Load section prompt templates."""
-        section_prompts = {}
-        
-        if not self.section_prompts_dir.exists():
-            self.logger.warning(f"Section prompts directory not found: {self.section_prompts_dir}")
-            return section_prompts
-        
-        for prompt_file in self.section_prompts_dir.glob("*.txt"):
-            section_name = prompt_file.stem
-            try:
-                with open(prompt_file, 'r', encoding='utf-8') as f:
-                    section_prompts[section_name] = f.read()
-                self.logger.debug(f"Loaded section prompt: {section_name}")
-            except Exception as e:
-                self.logger.error(f"Error loading section prompt {section_name}: {e}")
+    @property
+    def personas(self) -> Dict[str, Any]:
+        """Current personas configuration."""
+        return self.templates.current().personas_data
+    
+    @property
+    def section_prompts(self) -> Dict[str, str]:
+        """Current section prompt templates by section type."""
+        return self.templates.current().section_prompts
+    
+    @staticmethod
+    def _safety_settings() -> List[Dict[str, Any]]:
+        """Safety settings applied to every model client."""
+        return [
+            {"category": HarmCategory.HARM_CATEGORY_HARASSMENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
+            {"category": HarmCategory.HARM_CATEGORY_HATE_SPEECH, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
+            {"category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
+            {"category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
+        ]
+    
+    def _model_safety_settings(self) -> List[Dict[str, Any]]:
+        """Safety settings for this agent's clients, built and frozen once."""
+        if self._safety_key is None:
+            self._safety_settings_list = self._safety_settings()
+            self._safety_key = freeze(self._safety_settings_list)
+        return self._safety_settings_list
+    
+    def _get_model(self, generation_config: Dict[str, Any]):
+        """Get a pooled model client for a generation config, with the standard safety settings."""
+        self._model_safety_settings()
         
-        self.logger.info(f"Loaded {len(section_prompts)} section prompts")
-        return section_prompts
+        # Same as ModelPool.key, reusing the safety settings frozen once per agent
+        return model_pool.get(
+            (self.model_name, freeze(generation_config), self._safety_key),
+            lambda: genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config=generation_config,
+                safety_settings=self._safety_settings_list
+            )
+        )
     
     def _initialize_gemini(self):
         """Initialize Gemini model."""
@@ -199,26 +362,8 @@ class WriterAgent:
         genai.configure(api_key=api_key)
         
         # Initialize model with safety settings
-        generation_config = {
-            "temperature": 0.7,
-            "top_p": 0.9,
-            "top_k": 40,
-            "max_output_tokens": 4000,
-        }
-        
-        safety_settings = [
-            {"category": HarmCategory.HARM_CATEGORY_HARASSMENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-            {"category": HarmCategory.HARM_CATEGORY_HATE_SPEECH, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-            {"category": HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-            {"category": HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, "threshold": HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE},
-        ]
-        
         try:
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
+            model = self._get_model(self.DEFAULT_GENERATION_CONFIG)
             self.logger.info(f"Initialized Gemini model: {self.model_name}")
             return model
         
@@ -226,86 +371,588 @@ class WriterAgent:
             self.logger.error(f"Error initializing Gemini model: {e}")
             return None
     
-    def _initialize_token_csv(self):
-        """Initialize token usage CSV file."""
-        if not self.token_csv_path.exists():
-            with open(self.token_csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'generation_id', 'timestamp', 'model', 'persona', 
-                    'prompt_tokens', 'completion_tokens', 'total_tokens',
-                    'section_type', 'generation_time_ms'
-                ])
+    def _initialize_usage_store(self):
+        """Open the usage metrics store and import token usage CSV files left by earlier versions."""
+        self.usage_store = get_usage_store(self.usage_store_path)
+        imported = self.usage_store.import_legacy_logs(self.logs_dir)
+        if imported:
+            self.logger.info(f"Imported {imported} token usage rows into {self.usage_store_path}")
     
     def _log_token_usage(self, generation_id: str, model: str, persona: str, 
                         prompt_tokens: int, completion_tokens: int, 
-                        section_type: str, generation_time_ms: float):
-        """Log token usage to CSV file."""
+                        section_type: str, generation_time_ms: float,
+                        time_to_first_token_ms: Optional[float] = None,
+                        cache_hit: bool = False,
+                        call_stats: Optional[CallStats] = None,
+                        rate_limit_wait_ms: float = 0.0):
+        """Queue a token usage record for the usage metrics store."""
         try:
-            with open(self.token_csv_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    generation_id,
-                    datetime.now().isoformat(),
-                    model,
-                    persona,
-                    prompt_tokens,
-                    completion_tokens,
-                    prompt_tokens + completion_tokens,
-                    section_type,
-                    generation_time_ms
-                ])
+            call_stats = call_stats or CallStats()
+            self.usage_store.record(UsageRecord(
+                generation_id=generation_id,
+                timestamp=time.time(),
+                model=model,
+                persona=persona,
+                section_type=section_type,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                generation_time_ms=generation_time_ms,
+                time_to_first_token_ms=time_to_first_token_ms,
+                cache_hit=cache_hit,
+                retries=call_stats.retries,
+                hedges=call_stats.hedges,
+                rate_limit_wait_ms=rate_limit_wait_ms
+            ))
         except Exception as e:
             self.logger.error(f"Error logging token usage: {e}")
     
+    def flush_logs(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for queued token usage records to reach the usage metrics store.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            True if all records were written within the timeout
+        """
+        return self.usage_store.flush(timeout)
+    
+    def flush_outputs(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for saved results queued so far to reach disk.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            True if all results were written within the timeout
+        """
+        if self._output_sink is None:
+            return True
+        return self._output_sink.flush(timeout)
+    
+    def _suffix_token_reserve(self) -> int:
+        """Estimated tokens of the longest section suffix, kept free in budgeted prefixes."""
+        suffixes = list(self.templates.current().section_suffixes.values()) or [self._construct_section_suffix("section")]
+        return max(self.token_estimator.estimate(suffix) for suffix in suffixes)
+    
+    def _construct_prompt_prefix(self, user_prompt: str, persona: str,
+                                 retrieval_context: Optional[Dict] = None,
+                                 included: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Construct the part of a section prompt shared by every section of a proposal.
+        
+        With a prompt token budget, retrieved matches are taken by score and
+        trimmed so that the prefix plus the longest section suffix fits the
+        budget; an oversized user prompt is truncated as a last resort.
+        
+        Args:
+            user_prompt: User's project description
+            persona: Persona to write as
+            retrieval_context: Retrieved context to ground the prompt
+            included: Collects the retrieved matches the prefix includes
+            
+        Returns:
+            Prompt prefix
+        """
+        if included is None:
+            included = []
+        compiled = self.templates.current().persona(persona)
+        
+        # Build context from retrieval
+        matches = retrieval_context.get("matches", []) if retrieval_context else []
+        if self.prompt_token_budget is None:
+            matches = matches[:self.MAX_CONTEXT_MATCHES]  # Top 5 matches
+        context_chunks = [
+            f"Source: {match.get('metadata', {}).get('source', 'Unknown')}\n{match.get('text', '')}"
+            for match in matches
+        ]
+        
+        if self.prompt_token_budget is None:
+            included.extend(matches)
+            return compiled.render_prefix(user_prompt, self.CONTEXT_SEPARATOR.join(context_chunks))
+        
+        budget = self.prompt_token_budget - self._suffix_token_reserve()
+        fixed_tokens = self.token_estimator.estimate(compiled.render_prefix(user_prompt, ""))
+        if fixed_tokens > budget:
+            self.logger.warning("User prompt exceeds the prompt token budget; truncating it")
+            user_tokens = self.token_estimator.estimate(user_prompt)
+            user_prompt = self.token_estimator.truncate(user_prompt, budget - (fixed_tokens - user_tokens))
+            fixed_tokens = self.token_estimator.estimate(compiled.render_prefix(user_prompt, ""))
+        
+        selected = self.token_budgeter.fit(
+            context_chunks,
+            budget - fixed_tokens,
+            scores=[match.get("score", 0.0) for match in matches],
+            separator=self.CONTEXT_SEPARATOR,
+            max_items=self.MAX_CONTEXT_MATCHES
+        )
+        prefix = compiled.render_prefix(user_prompt, self.CONTEXT_SEPARATOR.join(selected))
+        
+        # The estimate may be off; drop the lowest ranked matches until an exact count fits
+        if self.exact_token_counting and self.token_estimator.count_fn is not None:
+            while selected and self.token_estimator.count(prefix) > budget:
+                selected.pop()
+                prefix = compiled.render_prefix(user_prompt, self.CONTEXT_SEPARATOR.join(selected))
+        
+        # The budgeter keeps a prefix of the matches ranked by score (stable, as in fit)
+        ranked = sorted(range(len(matches)), key=lambda i: matches[i].get("score", 0.0), reverse=True)
+        included.extend(matches[i] for i in ranked[:len(selected)])
+        
+        if len(selected) < min(len(context_chunks), self.MAX_CONTEXT_MATCHES):
+            self.logger.info(f"Prompt token budget kept {len(selected)} of {len(context_chunks)} context matches")
+        return prefix
+    
+    def _construct_section_suffix(self, section_type: str) -> str:
+        """Construct the section-specific end of a section prompt."""
+        return self.templates.current().section_suffix(section_type)
+    
     def _construct_section_prompt(self, section_type: str, user_prompt: str, 
-                                 persona: str, retrieval_context: Optional[Dict] = None) -> str:
-        """Construct a section-specific prompt with persona and context."""
-        # Get persona information
-        persona_info = self.personas.get("personas", {}).get(
-            persona, 
-            self.personas.get("personas", {}).get(self.personas.get("default_persona", "consultant"), {})
+                                 persona: str, retrieval_context: Optional[Dict] = None,
+                                 included: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Construct a section-specific prompt with persona and context.
+        
+        The prompt is the proposal-wide prefix (persona, requirements,
+        retrieved context and instructions) followed by the section
+        template, so every section of a proposal shares the same prefix.
+        ``included`` collects the retrieved matches the prompt includes.
+        """
+        return (
+            self._construct_prompt_prefix(user_prompt, persona, retrieval_context, included)
+            + self._construct_section_suffix(section_type)
         )
+    
+    def _generation_config(self, generation_params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Get the model generation config for a request's generation parameters."""
+        if not generation_params:
+            return self.DEFAULT_GENERATION_CONFIG
         
-        # Get section prompt template
-        section_prompt = self.section_prompts.get(section_type, "")
+        return {
+            "temperature": generation_params.get("temperature", 0.7),
+            "top_p": generation_params.get("top_p", 0.9),
+            "max_output_tokens": generation_params.get("max_tokens", 4000),
+        }
+    
+    def _section_model(self, generation_params: Optional[Dict] = None):
+        """Get the model to use for a request's generation parameters."""
+        if not generation_params:
+            return self.model
         
-        # Build context from retrieval
-        context_text = ""
-        if retrieval_context and retrieval_context.get("matches"):
-            context_chunks = []
-            for match in retrieval_context["matches"][:5]:  # Top 5 matches
-                chunk_text = match.get("text", "")
-                source = match.get("metadata", {}).get("source", "Unknown")
-                context_chunks.append(f"Source: {source}\n{chunk_text}")
-            
-            context_text = "\n\n---\n\n".join(context_chunks)
-        
-        # Construct full prompt
-        full_prompt = f"""You are an expert proposal writer. {persona_info.get('prompt_additions', '')}
-
-{section_prompt}
-
-## User Requirements:
-{user_prompt}
-
-## Retrieved Context:
-{context_text if context_text else "No specific context provided."}
-
-## Instructions:
-- Write in {persona_info.get('writing_style', {}).get('tone', 'professional')} tone
-- Focus on {', '.join(persona_info.get('writing_style', {}).get('focus_areas', ['solutions']))}
-- Ensure content is relevant to the user requirements
-- Use the retrieved context to inform your response
-- Generate high-quality, structured content suitable for a professional proposal
-
-Please generate the {section_type.replace('_', ' ').title()} section now:"""
-
-        return full_prompt
+        # Reuse the client for this configuration rather than building one per section
+        return self._get_model(self._generation_config(generation_params))
+    
+    def _uses_shared_prefix(self, writer_input: WriterInput) -> bool:
+        """Whether a proposal's sections are meant to share a cached prompt prefix."""
+        return self.context_cache is not None and len(writer_input.sections_to_generate) >= 2
+    
+    def _prompt_matches(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get the retrieved matches a section prompt can include.
+        
+        These are the first MAX_CONTEXT_MATCHES matches, or with a prompt
+        token budget the best scored ones (kept in their original order),
+        since the budget picks matches by score.
+        """
+        if self.prompt_token_budget is None or len(matches) <= self.MAX_CONTEXT_MATCHES:
+            return list(matches[:self.MAX_CONTEXT_MATCHES])
+        
+        ranked = sorted(range(len(matches)), key=lambda i: matches[i].get("score", 0.0), reverse=True)
+        return [matches[i] for i in sorted(ranked[:self.MAX_CONTEXT_MATCHES])]
+    
+    def _section_contexts(self, writer_input: WriterInput) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get the retrieval context each section is prompted with.
+        
+        With context compression, only the matches a prompt can include are
+        kept, and each is cut down to its sentences
+        most similar to the section's query (section title plus user prompt).
+        When sections share a cached prompt prefix, one compression against
+        the user prompt alone serves all of them so the prefix stays shared.
+        The compression stats are attached to each context under
+        ``"compression"``.
+        
+        Args:
+            writer_input: Input containing prompt, persona, and context
+            
+        Returns:
+            Retrieval context per section type
+        """
+        section_types = writer_input.sections_to_generate
+        retrieval_context = writer_input.retrieval_context
+        if self.context_compressor is None or not retrieval_context or not retrieval_context.get("matches"):
+            return {section_type: retrieval_context for section_type in section_types}
+        
+        if self._uses_shared_prefix(writer_input):
+            queries = [writer_input.user_prompt]
+        else:
+            queries = [
+                f"{section_type.replace('_', ' ').title()}: {writer_input.user_prompt}"
+                for section_type in section_types
+            ]
+        
+        compressed = [
+            {**retrieval_context, "matches": matches, "compression": stats}
+            for matches, stats in self.context_compressor.compress(
+                self._prompt_matches(retrieval_context["matches"]), queries
+            )
+        ]
+        for context in compressed:
+            self.logger.info(
+                f"Compressed retrieved context to {context['compression']['ratio']:.0%} "
+                f"({context['compression']['compressed_chars']} of {context['compression']['original_chars']} chars)"
+            )
+        
+        if len(compressed) == 1:
+            return {section_type: compressed[0] for section_type in section_types}
+        return dict(zip(section_types, compressed))
+    
+    def _open_shared_prefix(self, writer_input: WriterInput,
+                            contexts: Optional[Dict[str, Optional[Dict]]] = None) -> Optional[CachedPrefix]:
+        """
+        Register the prompt prefix shared by a proposal's sections with the context cache.
+        
+        Args:
+            writer_input: Input containing prompt, persona, and context
+            contexts: Retrieval context per section (defaults to the input's)
+            
+        Returns:
+            Cached prefix, or None when context caching is disabled, would not
+            pay off, or fails (sections then send their full prompts)
+        """
+        if not self._uses_shared_prefix(writer_input):
+            return None
+        
+        retrieval_context = contexts[writer_input.sections_to_generate[0]] if contexts else writer_input.retrieval_context
+        prefix = self._construct_prompt_prefix(writer_input.user_prompt, writer_input.persona, retrieval_context)
+        prefix_tokens = self.token_estimator.estimate(prefix)
+        if prefix_tokens < self.context_cache.min_prefix_tokens:
+            self.logger.info("Prompt prefix too short for context caching")
+            return None
+        
+        try:
+            shared_prefix = self.context_cache.create(self.model_name, prefix, prefix_tokens)
+        except Exception as e:
+            self.logger.warning(f"Context caching unavailable, sending full prompts: {e}")
+            return None
+        
+        self.logger.info(f"Cached shared prompt prefix {shared_prefix.name} ({shared_prefix.token_count} tokens)")
+        return shared_prefix
+    
+    def _release_shared_prefix(self, shared_prefix: Optional[CachedPrefix]):
+        """Release a cached prefix once every section has been generated."""
+        if shared_prefix is None:
+            return
+        try:
+            self.context_cache.release(shared_prefix)
+        except Exception as e:
+            self.logger.warning(f"Error releasing cached prefix {shared_prefix.name}: {e}")
+    
+    def _section_request(self, section_type: str, prompt: str,
+                         generation_params: Optional[Dict] = None,
+                         shared_prefix: Optional[CachedPrefix] = None) -> Tuple[Any, str]:
+        """Get the model and request text for a section, continuing a cached prefix if given."""
+        if shared_prefix is None:
+            return self._section_model(generation_params), prompt
+        
+        model = self.context_cache.bind(
+            shared_prefix,
+            self._generation_config(generation_params),
+            self._model_safety_settings(),
+            self._get_model
+        )
+        return model, self._construct_section_suffix(section_type)
+    
+    @staticmethod
+    def _request_options(timeout: Optional[float]) -> Dict[str, Any]:
+        """Keyword arguments passing an attempt's deadline on to the client."""
+        return {"request_options": {"timeout": timeout}} if timeout is not None else {}
+    
+    def _estimated_request_tokens(self, prompt: str, generation_params: Optional[Dict] = None) -> int:
+        """Estimated prompt plus completion tokens of a request, for the rate limiter."""
+        max_output_tokens = self._generation_config(generation_params)["max_output_tokens"]
+        completion_tokens = max_output_tokens
+        if self._completion_tokens_ema is not None:
+            completion_tokens = min(max_output_tokens, int(self._completion_tokens_ema))
+        return self.token_estimator.estimate(prompt) + completion_tokens
+    
+    def _send(self, model, request: str, prompt: str, generation_params: Optional[Dict],
+              timeout: Optional[float], permits: PermitGroup, stream: bool = False):
+        """
+        Send one model request, first waiting for quota if rate limited.
+        
+        Args:
+            model: Model client
+            request: Request text sent to the model
+            prompt: Full section prompt, for estimating the tokens charged
+            generation_params: Generation parameter overrides
+            timeout: Remaining deadline of the attempt
+            permits: Collects the rate limiter permit of each attempt and the
+                response it produced
+            stream: Stream the response
+            
+        Returns:
+            Model response
+            
+        Raises:
+            RuntimeError: If the request was settled while this attempt
+                waited for quota (a hedge that lost), so it is not sent
+        """
+        permit = None
+        if self.rate_limiter is not None:
+            wait_limit = self.rate_limit_timeout_s
+            if timeout is not None:
+                wait_limit = timeout if wait_limit is None else min(wait_limit, timeout)
+            started = time.monotonic()
+            permit = self.rate_limiter.acquire(
+                self._estimated_request_tokens(prompt, generation_params), timeout=wait_limit
+            )
+            if not permits.send(permit):
+                raise RuntimeError("Request already settled; attempt not sent")
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.monotonic() - started))
+        
+        if stream:
+            response = model.generate_content(request, stream=True, **self._request_options(timeout))
+        else:
+            response = model.generate_content(request, **self._request_options(timeout))
+        if permit is not None:
+            permits.answered(permit, response)
+        return response
+    
+    def _settle_request(self, permits: PermitGroup, response, prompt: str,
+                        prompt_tokens: int = 0, completion_tokens: int = 0) -> float:
+        """
+        Settle a request's quota reservations with its real usage.
+        
+        Args:
+            permits: Permits taken by the request's attempts
+            response: Response the request was answered with (None if it failed)
+            prompt: Full section prompt, for estimating unreported prompt tokens
+            prompt_tokens: Prompt tokens reported by the model
+            completion_tokens: Completion tokens reported by the model
+            
+        Returns:
+            Total time spent waiting for quota in milliseconds
+        """
+        # The reported usage belongs to the winning attempt. Losing hedges, timed-out
+        # attempts and attempts that failed after sending are billed at least their prompt.
+        sent_tokens = prompt_tokens or self.token_estimator.estimate(prompt)
+        wait_s = permits.settle(response, prompt_tokens + completion_tokens, sent_tokens)
+        if completion_tokens:
+            self._completion_tokens_ema = (
+                completion_tokens if self._completion_tokens_ema is None
+                else 0.8 * self._completion_tokens_ema + 0.2 * completion_tokens
+            )
+        return wait_s * 1000
+    
+    @staticmethod
+    def _cached_prompt_tokens(response, shared_prefix: Optional[CachedPrefix]) -> int:
+        """Prompt tokens served from the context cache for a response."""
+        if shared_prefix is None:
+            return 0
+        usage = getattr(response, 'usage_metadata', None)
+        cached = getattr(usage, 'cached_content_token_count', None) if usage else None
+        return cached if isinstance(cached, int) and cached > 0 else shared_prefix.token_count
+    
+    def _cache_key(self, prompt: str, generation_params: Optional[Dict] = None) -> Optional[str]:
+        """
+        Get the response cache key for a request, if it may be cached.
+        
+        Sampling at a non-zero temperature gives a different answer each
+        time, so such requests are only cached when explicitly opted in.
+        
+        Args:
+            prompt: Fully constructed section prompt
+            generation_params: Generation parameter overrides
+            
+        Returns:
+            Cache key, or None if caching is disabled for this request
+        """
+        if self.response_cache is None:
+            return None
+        
+        config = self._generation_config(generation_params)
+        opted_in = bool(generation_params and generation_params.get("cache"))
+        if config.get("temperature") != 0 and not opted_in:
+            return None
+        
+        return ResponseCache.make_key(prompt, self.model_name, config)
+    
+    def _semantic_partition(self, section_type: str, persona: str,
+                            retrieval_context: Optional[Dict] = None,
+                            generation_params: Optional[Dict] = None) -> str:
+        """
+        Key of everything besides the user prompt that shapes a section request.
+        
+        Built from the request fields directly rather than a rendered prompt,
+        so a lookup never budgets or token counts a prompt that is not sent.
+        Matches are identified by source, chunk and score rather than text,
+        since context compression cuts their text per user prompt and
+        near-duplicate prompts must still share a partition.
+        """
+        matches = retrieval_context.get("matches", []) if retrieval_context else []
+        partition = json.dumps({
+            "section_type": section_type,
+            "template_version": self.templates.current().version,
+            "persona": persona,
+            "context": [
+                [
+                    match.get('metadata', {}).get('source', 'Unknown'),
+                    match.get('metadata', {}).get('chunk_id'),
+                    match.get('score', 0.0)
+                ]
+                for match in self._prompt_matches(matches)
+            ],
+            "prompt_token_budget": self.prompt_token_budget
+        }, sort_keys=True, ensure_ascii=False)
+        return ResponseCache.make_key(partition, self.model_name, self._generation_config(generation_params))
+    
+    def _cached_section(self, prompt: str, generation_id: str, start_time: float,
+                        section_type: str, user_prompt: str, persona: str,
+                        retrieval_context: Optional[Dict] = None,
+                        generation_params: Optional[Dict] = None,
+                        included_matches: Optional[List[Dict[str, Any]]] = None) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Look up a section in the response caches.
+        
+        The exact response cache is checked first, then the semantic cache
+        for near-duplicate user prompts.
+        
+        Args:
+            prompt: Fully constructed section prompt
+            generation_id: Section generation ID
+            start_time: Request start time
+            section_type: Section to generate
+            user_prompt: User's project description
+            persona: Persona to write as
+            retrieval_context: Retrieved context to ground the section
+            generation_params: Generation parameter overrides
+            included_matches: Retrieved matches the prompt includes
+            
+        Returns:
+            (section data on a hit or None, cache entries to fill on a miss)
+        """
+        pending = {"key": self._cache_key(prompt, generation_params)}
+        entry = None
+        similarity = None
+        
+        if pending["key"] is not None:
+            entry = self.response_cache.get(pending["key"])
+        
+        if entry is None and self.semantic_cache is not None:
+            pending["partition"] = self._semantic_partition(section_type, persona, retrieval_context, generation_params)
+            pending["embedding"] = self.semantic_cache.embed(user_prompt)
+            entry, similarity = self.semantic_cache.lookup(pending["partition"], pending["embedding"])
+            similarity_text = f"{similarity:.4f}" if similarity is not None else "n/a"
+            self.logger.info(
+                f"Semantic cache {'hit' if entry is not None else 'miss'} for section {section_type}: "
+                f"similarity={similarity_text} threshold={self.semantic_cache.threshold}"
+            )
+        
+        if entry is None:
+            return None, pending
+        
+        lookup_time_ms = (time.time() - start_time) * 1000
+        self.logger.info(f"Serving section {section_type} from cache")
+        section_data = self._build_section_data(
+            generation_id, section_type, persona, entry["text"],
+            0, 0, lookup_time_ms, lookup_time_ms,
+            retrieval_context, cache_hit=True, included_matches=included_matches
+        )
+        if similarity is not None:
+            section_data["generation_metadata"]["cache_similarity"] = similarity
+        return section_data, pending
+    
+    def _cache_response(self, pending: Dict[str, Any], markdown_content: str,
+                        prompt_tokens: int, completion_tokens: int):
+        """Store a freshly generated section in the caches that missed."""
+        if pending.get("key") is not None:
+            self.response_cache.put(pending["key"], self.model_name, markdown_content, prompt_tokens, completion_tokens)
+        
+        if pending.get("embedding") is not None:
+            self.semantic_cache.add(pending["partition"], pending["embedding"], {
+                "text": markdown_content,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens
+            })
+    
+    @staticmethod
+    def _token_counts(response) -> Tuple[int, int]:
+        """Extract prompt and completion token counts from a response (if available)."""
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            return (
+                response.usage_metadata.prompt_token_count or 0,
+                response.usage_metadata.candidates_token_count or 0
+            )
+        return 0, 0
+    
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        """Extract the text of one streamed response chunk."""
+        if not chunk.candidates:
+            return ""
+        return "".join(getattr(part, "text", "") or "" for part in chunk.candidates[0].content.parts)
+    
+    def _build_section_data(self, generation_id: str, section_type: str, persona: str,
+                            markdown_content: str, prompt_tokens: int, completion_tokens: int,
+                            generation_time_ms: float, time_to_first_token_ms: float,
+                            retrieval_context: Optional[Dict] = None,
+                            cache_hit: bool = False,
+                            cached_prompt_tokens: int = 0,
+                            call_stats: Optional[CallStats] = None,
+                            rate_limit_wait_ms: float = 0.0,
+                            included_matches: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Render, log and package generated section content."""
+        # Convert to HTML with a pooled converter
+        html_content = markdown_renderer.convert(markdown_content)
+        
+        # Calculate word count
+        word_count = len(markdown_content.split())
+        
+        # Log token usage (cache hits are recorded with their flag for hit rates)
+        self._log_token_usage(
+            generation_id, self.model_name, persona,
+            prompt_tokens, completion_tokens, section_type, generation_time_ms,
+            time_to_first_token_ms, cache_hit=cache_hit, call_stats=call_stats,
+            rate_limit_wait_ms=rate_limit_wait_ms
+        )
+        
+        # Sources of the matches the prompt actually included
+        sources_referenced = [
+            match.get("metadata", {}).get("source", "Unknown")
+            for match in included_matches or []
+        ]
+        
+        return {
+            "section_id": generation_id,
+            "section_type": section_type,
+            "title": section_type.replace('_', ' ').title(),
+            "content": {
+                "markdown": markdown_content,
+                "html": html_content
+            },
+            "word_count": word_count,
+            "sources_referenced": sources_referenced,
+            "confidence_score": 0.8,  # Could be calculated based on response quality
+            "generation_metadata": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "generation_time_ms": generation_time_ms,
+                "time_to_first_token_ms": time_to_first_token_ms,
+                "cache_hit": cache_hit,
+                "cached_prompt_tokens": cached_prompt_tokens,
+                "context_compression": retrieval_context.get("compression") if retrieval_context else None,
+                "resilience": (call_stats or CallStats()).as_dict(),
+                "rate_limit_wait_ms": rate_limit_wait_ms
+            }
+        }
     
     def _generate_section_content(self, section_type: str, user_prompt: str, 
                                  persona: str, retrieval_context: Optional[Dict] = None,
-                                 generation_params: Optional[Dict] = None) -> Dict[str, Any]:
+                                 generation_params: Optional[Dict] = None,
+                                 shared_prefix: Optional[CachedPrefix] = None) -> Dict[str, Any]:
         """Generate content for a specific section."""
         if self.model is None:
             raise RuntimeError("Gemini model not initialized")
@@ -314,28 +961,28 @@ Please generate the {section_type.replace('_', ' ').title()} section now:"""
         start_time = time.time()
         
         # Construct prompt
-        prompt = self._construct_section_prompt(section_type, user_prompt, persona, retrieval_context)
+        included: List[Dict[str, Any]] = []
+        prompt = self._construct_section_prompt(section_type, user_prompt, persona, retrieval_context, included)
+        permits = PermitGroup()
         
         try:
-            # Update generation config if parameters provided
-            if generation_params:
-                config = {
-                    "temperature": generation_params.get("temperature", 0.7),
-                    "top_p": generation_params.get("top_p", 0.9),
-                    "max_output_tokens": generation_params.get("max_tokens", 4000),
-                }
-                
-                # Create new model instance with updated config
-                model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    generation_config=config
-                )
-            else:
-                model = self.model
+            cached, pending = self._cached_section(
+                prompt, generation_id, start_time, section_type, user_prompt, persona,
+                retrieval_context, generation_params, included
+            )
+            if cached is not None:
+                return cached
             
-            # Generate content
-            response = model.generate_content(prompt)
+            model, request = self._section_request(section_type, prompt, generation_params, shared_prefix)
             
+            # Generate content, retrying transient failures and hedging slow calls
+            call_stats = CallStats()
+            response = self.llm_caller.call(
+                lambda timeout: self._send(model, request, prompt, generation_params, timeout, permits),
+                call_stats
+            )
+            
+            # The whole response arrives at once, so the first token comes with the last
             generation_time_ms = (time.time() - start_time) * 1000
             
             # Extract content
@@ -344,65 +991,341 @@ Please generate the {section_type.replace('_', ' ').title()} section now:"""
             else:
                 raise RuntimeError("No content generated")
             
-            # Convert to HTML
-            html_content = markdown.markdown(
-                markdown_content,
-                extensions=['tables', 'fenced_code', 'toc']
+            prompt_tokens, completion_tokens = self._token_counts(response)
+            self.token_estimator.observe(prompt, prompt_tokens)
+            rate_limit_wait_ms = self._settle_request(permits, response, prompt, prompt_tokens, completion_tokens)
+            
+            self._cache_response(pending, markdown_content, prompt_tokens, completion_tokens)
+            
+            return self._build_section_data(
+                generation_id, section_type, persona, markdown_content,
+                prompt_tokens, completion_tokens, generation_time_ms, generation_time_ms,
+                retrieval_context, cached_prompt_tokens=self._cached_prompt_tokens(response, shared_prefix),
+                call_stats=call_stats, rate_limit_wait_ms=rate_limit_wait_ms,
+                included_matches=included
             )
+        
+        except Exception as e:
+            self._settle_request(permits, None, prompt)
+            self.logger.error(f"Error generating section {section_type}: {e}")
+            raise
+    
+    def stream_section_content(self, section_type: str, user_prompt: str,
+                               persona: str, retrieval_context: Optional[Dict] = None,
+                               generation_params: Optional[Dict] = None,
+                               shared_prefix: Optional[CachedPrefix] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate content for a specific section, yielding Markdown as it arrives.
+        
+        Args:
+            section_type: Section to generate
+            user_prompt: User's project description
+            persona: Persona to write as
+            retrieval_context: Retrieved context to ground the section
+            generation_params: Generation parameter overrides
+            shared_prefix: Cached proposal prefix to continue instead of
+                sending the full prompt
             
-            # Calculate word count
-            word_count = len(markdown_content.split())
+        Yields:
+            ``{"event": "delta", "section_type", "text"}`` for each chunk, then
+            ``{"event": "section", "section"}`` with the same section data
+            that ``_generate_section_content`` returns
+        """
+        if self.model is None:
+            raise RuntimeError("Gemini model not initialized")
+        
+        generation_id = str(uuid.uuid4())
+        start_time = time.time()
+        
+        # Construct prompt
+        included: List[Dict[str, Any]] = []
+        prompt = self._construct_section_prompt(section_type, user_prompt, persona, retrieval_context, included)
+        permits = PermitGroup()
+        
+        try:
+            cached, pending = self._cached_section(
+                prompt, generation_id, start_time, section_type, user_prompt, persona,
+                retrieval_context, generation_params, included
+            )
+            if cached is not None:
+                yield {"event": "delta", "section_type": section_type, "text": cached["content"]["markdown"]}
+                yield {"event": "section", "section": cached}
+                return
             
-            # Extract token usage (if available)
-            prompt_tokens = 0
-            completion_tokens = 0
+            model, request = self._section_request(section_type, prompt, generation_params, shared_prefix)
             
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                prompt_tokens = response.usage_metadata.prompt_token_count or 0
-                completion_tokens = response.usage_metadata.candidates_token_count or 0
+            # Opening the stream is retried; chunks already relayed cannot be
+            call_stats = CallStats()
+            deadlines: List[Optional[float]] = []
             
-            # Log token usage
-            self._log_token_usage(
-                generation_id, self.model_name, persona,
-                prompt_tokens, completion_tokens, section_type, generation_time_ms
-            )
+            def open_stream(timeout: Optional[float]):
+                # The stream must finish within the deadline of the attempt that opened it
+                deadlines.append(time.monotonic() + timeout if timeout is not None else None)
+                return self._send(model, request, prompt, generation_params, timeout, permits, stream=True)
             
-            # Extract sources referenced
-            sources_referenced = []
-            if retrieval_context and retrieval_context.get("matches"):
-                sources_referenced = [
-                    match.get("metadata", {}).get("source", "Unknown")
-                    for match in retrieval_context["matches"][:5]
-                ]
+            response = self.llm_caller.call(open_stream, call_stats, hedge=False)
             
-            return {
-                "section_id": generation_id,
-                "section_type": section_type,
-                "title": section_type.replace('_', ' ').title(),
-                "content": {
-                    "markdown": markdown_content,
-                    "html": html_content
-                },
-                "word_count": word_count,
-                "sources_referenced": sources_referenced,
-                "confidence_score": 0.8,  # Could be calculated based on response quality
-                "generation_metadata": {
-                    "prompt_tokens": prompt_tokens,
-                    "completion_tokens": completion_tokens,
-                    "generation_time_ms": generation_time_ms
-                }
+            parts = []
+            time_to_first_token_ms = None
+            for chunk in iter_with_deadline(response, deadlines[-1]):
+                text = self._chunk_text(chunk)
+                if not text:
+                    continue
+                if time_to_first_token_ms is None:
+                    time_to_first_token_ms = (time.time() - start_time) * 1000
+                parts.append(text)
+                yield {"event": "delta", "section_type": section_type, "text": text}
+            
+            generation_time_ms = (time.time() - start_time) * 1000
+            
+            markdown_content = "".join(parts)
+            if not markdown_content:
+                raise RuntimeError("No content generated")
+            
+            # Usage metadata is complete once the stream is exhausted
+            prompt_tokens, completion_tokens = self._token_counts(response)
+            self.token_estimator.observe(prompt, prompt_tokens)
+            rate_limit_wait_ms = self._settle_request(permits, response, prompt, prompt_tokens, completion_tokens)
+            
+            self._cache_response(pending, markdown_content, prompt_tokens, completion_tokens)
+            
+            yield {
+                "event": "section",
+                "section": self._build_section_data(
+                    generation_id, section_type, persona, markdown_content,
+                    prompt_tokens, completion_tokens, generation_time_ms, time_to_first_token_ms,
+                    retrieval_context, cached_prompt_tokens=self._cached_prompt_tokens(response, shared_prefix),
+                    call_stats=call_stats, rate_limit_wait_ms=rate_limit_wait_ms,
+                    included_matches=included
+                )
             }
         
         except Exception as e:
-            self.logger.error(f"Error generating section {section_type}: {e}")
+            self._settle_request(permits, None, prompt)
+            self.logger.error(f"Error streaming section {section_type}: {e}")
             raise
     
-    def generate(self, writer_input: WriterInput) -> WriterOutput:
+    def _generate_sections(self, writer_input: WriterInput,
+                           shared_prefix: Optional[CachedPrefix] = None,
+                           contexts: Optional[Dict[str, Optional[Dict]]] = None,
+                           completed_sections: Optional[Dict[str, Dict[str, Any]]] = None,
+                           on_section: Optional[Callable[[Dict[str, Any]], None]] = None
+                           ) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """
+        Generate every requested section, several at a time if configured.
+        
+        Sections are independent requests, so up to ``max_concurrent_sections``
+        run in parallel on a thread pool. Results keep the requested order.
+        Unless partial results are allowed, the first failure is raised once
+        in-flight requests finish; otherwise failed sections are reported and
+        the rest are kept (the first failure is raised if every section fails).
+        
+        Args:
+            writer_input: Input containing prompt, persona, and context
+            shared_prefix: Cached proposal prefix the sections continue
+            contexts: Retrieval context per section (defaults to the input's)
+            completed_sections: Section data by section type from an earlier
+                run, used as is instead of generating those sections again
+            on_section: Called with each newly generated section's data as
+                soon as it completes (from worker threads when concurrent)
+            
+        Returns:
+            Section data in the order of ``sections_to_generate``, and the
+            ``{"section_type", "error"}`` of each failed section
+        """
+        completed_sections = completed_sections or {}
+        
+        def generate_section(section_type: str) -> Dict[str, Any]:
+            if section_type in completed_sections:
+                return completed_sections[section_type]
+            self.logger.info(f"Generating section: {section_type}")
+            section_data = self._generate_section_content(
+                section_type=section_type,
+                user_prompt=writer_input.user_prompt,
+                persona=writer_input.persona,
+                retrieval_context=contexts[section_type] if contexts else writer_input.retrieval_context,
+                generation_params=writer_input.generation_params,
+                shared_prefix=shared_prefix
+            )
+            if on_section is not None:
+                on_section(section_data)
+            return section_data
+        
+        def generate_or_fail(section_type: str):
+            try:
+                return generate_section(section_type)
+            except Exception as e:
+                if not self.allow_partial_results:
+                    raise
+                return e
+        
+        section_types = writer_input.sections_to_generate
+        pending = [section_type for section_type in section_types if section_type not in completed_sections]
+        workers = min(self.max_concurrent_sections, len(pending))
+        if workers <= 1:
+            results = [generate_or_fail(section_type) for section_type in section_types]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="writer-section") as pool:
+                futures = [pool.submit(generate_or_fail, section_type) for section_type in section_types]
+                try:
+                    results = [future.result() for future in futures]
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        section_data_list = [result for result in results if not isinstance(result, Exception)]
+        failures = [
+            {"section_type": section_type, "error": str(result)}
+            for section_type, result in zip(section_types, results)
+            if isinstance(result, Exception)
+        ]
+        if failures and not section_data_list:
+            raise next(result for result in results if isinstance(result, Exception))
+        if failures:
+            self.logger.warning(f"Keeping {len(section_data_list)} sections; failed: {[f['section_type'] for f in failures]}")
+        return section_data_list, failures
+    
+    def _build_output(self, generation_id: str, start_time: float, writer_input: WriterInput,
+                      section_data_list: List[Dict[str, Any]],
+                      shared_prefix: Optional[CachedPrefix] = None,
+                      failed_sections: Optional[List[Dict[str, str]]] = None,
+                      resumed_sections: Optional[List[str]] = None) -> WriterOutput:
+        """Combine generated sections into the final output with aggregated metadata."""
+        sections = []
+        section_timings = []
+        total_prompt_tokens = 0
+        total_completion_tokens = 0
+        cache_hits = 0
+        cached_prompt_tokens = 0
+        original_context_chars = 0
+        compressed_context_chars = 0
+        resilience = {"retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0}
+        rate_limit_wait_ms = 0.0
+        
+        for section_data in section_data_list:
+            sections.append(Section(**section_data))
+            
+            # Accumulate token usage
+            metadata = section_data.get("generation_metadata", {})
+            total_prompt_tokens += metadata.get("prompt_tokens", 0)
+            total_completion_tokens += metadata.get("completion_tokens", 0)
+            cache_hits += bool(metadata.get("cache_hit"))
+            cached_prompt_tokens += metadata.get("cached_prompt_tokens", 0)
+            if metadata.get("context_compression"):
+                original_context_chars += metadata["context_compression"]["original_chars"]
+                compressed_context_chars += metadata["context_compression"]["compressed_chars"]
+            for key, count in metadata.get("resilience", {}).items():
+                if key in resilience:
+                    resilience[key] += count
+            rate_limit_wait_ms += metadata.get("rate_limit_wait_ms", 0.0)
+            section_timings.append({
+                "section_type": section_data["section_type"],
+                "generation_time_ms": metadata.get("generation_time_ms", 0.0),
+                "time_to_first_token_ms": metadata.get("time_to_first_token_ms")
+            })
+        
+        # Combine all sections into full content
+        full_markdown = "\n\n".join([
+            f"# {section.title}\n\n{section.content['markdown']}"
+            for section in sections
+        ])
+        
+        # Stitch the already-rendered sections instead of converting everything again
+        full_html, toc_html = stitch_sections([
+            (section.title, section.content['html'])
+            for section in sections
+        ])
+        
+        total_word_count = sum(section.word_count for section in sections)
+        estimated_reading_time = max(1, total_word_count // 250)  # ~250 words per minute
+        
+        generation_time_ms = (time.time() - start_time) * 1000
+        
+        # Create output structure
+        output = WriterOutput(
+            generation_id=generation_id,
+            timestamp=datetime.now().isoformat(),
+            input_context={
+                "user_prompt": writer_input.user_prompt,
+                "persona_used": writer_input.persona,
+                "retrieval_context": {
+                    "retrieval_id": writer_input.retrieval_context.get("id", "") if writer_input.retrieval_context else "",
+                    "total_chunks_used": len(writer_input.retrieval_context.get("matches", [])) if writer_input.retrieval_context else 0,
+                    "primary_sources": list(set([
+                        match.get("metadata", {}).get("source", "Unknown")
+                        for match in writer_input.retrieval_context.get("matches", [])
+                    ])) if writer_input.retrieval_context else []
+                }
+            },
+            generated_content={
+                "sections": [section.dict() for section in sections],
+                "full_content": {
+                    "markdown": full_markdown,
+                    "html": full_html,
+                    "toc": toc_html
+                },
+                "word_count": total_word_count,
+                "estimated_reading_time": estimated_reading_time
+            },
+            generation_metadata={
+                "model_used": self.model_name,
+                "model_version": "2.5-flash",  # Gemini 2.5 Flash
+                "generation_time_ms": generation_time_ms,
+                "section_timings": section_timings,
+                "max_concurrent_sections": self.max_concurrent_sections,
+                "cache_hits": cache_hits,
+                "context_cache": {
+                    "backend": self.context_cache.backend if shared_prefix else None,
+                    "prefix_tokens": shared_prefix.token_count if shared_prefix else 0,
+                    "cached_prompt_tokens": cached_prompt_tokens,
+                    # The prefix is uploaded once instead of with every section
+                    "prompt_tokens_saved": max(0, cached_prompt_tokens - shared_prefix.token_count) if shared_prefix else 0
+                },
+                "context_compression": {
+                    "original_chars": original_context_chars,
+                    "compressed_chars": compressed_context_chars,
+                    "ratio": compressed_context_chars / original_context_chars
+                } if original_context_chars else None,
+                "resilience": {
+                    **resilience,
+                    "abandoned_in_flight": self.llm_caller.stats()["abandoned_in_flight"],
+                    "failed_sections": failed_sections or []
+                },
+                "partial": bool(failed_sections),
+                "resumed_sections": resumed_sections or [],
+                "rate_limit": {
+                    "wait_ms": rate_limit_wait_ms,
+                    **(self.rate_limiter.stats() if self.rate_limiter else {})
+                } if self.rate_limiter else None,
+                "token_usage": {
+                    "prompt_tokens": total_prompt_tokens,
+                    "completion_tokens": total_completion_tokens,
+                    "total_tokens": total_prompt_tokens + total_completion_tokens
+                },
+                "generation_parameters": writer_input.generation_params
+            }
+        )
+        
+        self.logger.info(f"Content generation completed: {generation_id}")
+        self.logger.info(f"Total word count: {total_word_count}")
+        self.logger.info(f"Total tokens: {total_prompt_tokens + total_completion_tokens}")
+        
+        return output
+    
+    def generate(self, writer_input: WriterInput,
+                 completed_sections: Optional[Dict[str, Dict[str, Any]]] = None,
+                 on_section: Optional[Callable[[Dict[str, Any]], None]] = None) -> WriterOutput:
         """
         Generate proposal content based on input specifications.
         
         Args:
             writer_input: Input containing prompt, persona, and context
+            completed_sections: Section data by section type checkpointed by
+                an earlier, interrupted run; those sections are not generated
+                again
+            on_section: Called with each newly generated section's data as
+                soon as it completes, e.g. to checkpoint it
             
         Returns:
             WriterOutput: Generated content with metadata
@@ -414,123 +1337,136 @@ Please generate the {section_type.replace('_', ' ').title()} section now:"""
         self.logger.info(f"Persona: {writer_input.persona}")
         self.logger.info(f"Sections: {writer_input.sections_to_generate}")
         
+        completed_sections = {
+            section_type: section_data
+            for section_type, section_data in (completed_sections or {}).items()
+            if section_type in writer_input.sections_to_generate
+        }
+        if completed_sections:
+            self.logger.info(f"Resuming with completed sections: {list(completed_sections)}")
+        
+        # Only the sections still to generate need context and a shared prefix
+        remaining_input = replace(writer_input, sections_to_generate=[
+            section_type for section_type in writer_input.sections_to_generate
+            if section_type not in completed_sections
+        ])
+        contexts, shared_prefix = {}, None
+        if remaining_input.sections_to_generate:
+            contexts = self._section_contexts(remaining_input)
+            shared_prefix = self._open_shared_prefix(remaining_input, contexts)
         try:
-            sections = []
-            total_prompt_tokens = 0
-            total_completion_tokens = 0
-            
-            # Generate each section
-            for section_type in writer_input.sections_to_generate:
-                self.logger.info(f"Generating section: {section_type}")
-                
-                section_data = self._generate_section_content(
-                    section_type=section_type,
-                    user_prompt=writer_input.user_prompt,
-                    persona=writer_input.persona,
-                    retrieval_context=writer_input.retrieval_context,
-                    generation_params=writer_input.generation_params
-                )
-                
-                sections.append(Section(**section_data))
-                
-                # Accumulate token usage
-                metadata = section_data.get("generation_metadata", {})
-                total_prompt_tokens += metadata.get("prompt_tokens", 0)
-                total_completion_tokens += metadata.get("completion_tokens", 0)
-            
-            # Combine all sections into full content
-            full_markdown = "\n\n".join([
-                f"# {section.title}\n\n{section.content['markdown']}"
-                for section in sections
-            ])
-            
-            full_html = markdown.markdown(
-                full_markdown,
-                extensions=['tables', 'fenced_code', 'toc']
+            section_data_list, failed_sections = self._generate_sections(
+                writer_input, shared_prefix, contexts, completed_sections, on_section
+            )
+            return self._build_output(
+                generation_id, start_time, writer_input, section_data_list, shared_prefix, failed_sections,
+                resumed_sections=list(completed_sections)
             )
+        
+        except Exception as e:
+            self.logger.error(f"Error in content generation: {e}")
+            raise
+        
+        finally:
+            self._release_shared_prefix(shared_prefix)
+    
+    def generate_stream(self, writer_input: WriterInput) -> Iterator[Dict[str, Any]]:
+        """
+        Generate proposal content, yielding Markdown deltas as they arrive.
+        
+        Sections are streamed one after another in the requested order.
+        
+        Args:
+            writer_input: Input containing prompt, persona, and context
             
-            total_word_count = sum(section.word_count for section in sections)
-            estimated_reading_time = max(1, total_word_count // 250)  # ~250 words per minute
+        Yields:
+            A ``start`` event, ``delta`` and ``section`` events for every
+            section, then a ``done`` event carrying the complete output
+            (or an ``error`` event if generation fails). With partial results
+            allowed, a failed section yields a ``section_error`` event and
+            the remaining sections still stream.
+        """
+        start_time = time.time()
+        generation_id = str(uuid.uuid4())
+        
+        self.logger.info(f"Starting streamed content generation {generation_id}")
+        yield {
+            "event": "start",
+            "generation_id": generation_id,
+            "sections": writer_input.sections_to_generate
+        }
+        
+        shared_prefix = None
+        try:
+            contexts = self._section_contexts(writer_input)
+            shared_prefix = self._open_shared_prefix(writer_input, contexts)
+            section_data_list = []
+            failed_sections = []
+            for section_type in writer_input.sections_to_generate:
+                self.logger.info(f"Streaming section: {section_type}")
+                try:
+                    for event in self.stream_section_content(
+                        section_type=section_type,
+                        user_prompt=writer_input.user_prompt,
+                        persona=writer_input.persona,
+                        retrieval_context=contexts[section_type],
+                        generation_params=writer_input.generation_params,
+                        shared_prefix=shared_prefix
+                    ):
+                        if event["event"] == "section":
+                            section_data_list.append(event["section"])
+                        yield event
+                except Exception as e:
+                    if not self.allow_partial_results:
+                        raise
+                    failed_sections.append({"section_type": section_type, "error": str(e)})
+                    yield {"event": "section_error", "section_type": section_type, "message": str(e)}
             
-            generation_time_ms = (time.time() - start_time) * 1000
+            if not section_data_list and failed_sections:
+                raise RuntimeError(f"Every section failed: {failed_sections[0]['error']}")
             
-            # Create output structure
-            output = WriterOutput(
-                generation_id=generation_id,
-                timestamp=datetime.now().isoformat(),
-                input_context={
-                    "user_prompt": writer_input.user_prompt,
-                    "persona_used": writer_input.persona,
-                    "retrieval_context": {
-                        "retrieval_id": writer_input.retrieval_context.get("id", "") if writer_input.retrieval_context else "",
-                        "total_chunks_used": len(writer_input.retrieval_context.get("matches", [])) if writer_input.retrieval_context else 0,
-                        "primary_sources": list(set([
-                            match.get("metadata", {}).get("source", "Unknown")
-                            for match in writer_input.retrieval_context.get("matches", [])
-                        ])) if writer_input.retrieval_context else []
-                    }
-                },
-                generated_content={
-                    "sections": [section.dict() for section in sections],
-                    "full_content": {
-                        "markdown": full_markdown,
-                        "html": full_html
-                    },
-                    "word_count": total_word_count,
-                    "estimated_reading_time": estimated_reading_time
-                },
-                generation_metadata={
-                    "model_used": self.model_name,
-                    "model_version": "2.5-flash",  # Gemini 2.5 Flash
-                    "generation_time_ms": generation_time_ms,
-                    "token_usage": {
-                        "prompt_tokens": total_prompt_tokens,
-                        "completion_tokens": total_completion_tokens,
-                        "total_tokens": total_prompt_tokens + total_completion_tokens
-                    },
-                    "generation_parameters": writer_input.generation_params
-                }
+            output = self._build_output(
+                generation_id, start_time, writer_input, section_data_list, shared_prefix, failed_sections
             )
-            
-            self.logger.info(f"Content generation completed: {generation_id}")
-            self.logger.info(f"Total word count: {total_word_count}")
-            self.logger.info(f"Total tokens: {total_prompt_tokens + total_completion_tokens}")
-            
-            return output
+            yield {"event": "done", "generation_id": generation_id, "output": output.dict()}
         
         except Exception as e:
-            self.logger.error(f"Error in content generation: {e}")
-            raise
+            self.logger.error(f"Error in streamed content generation: {e}")
+            yield {"event": "error", "generation_id": generation_id, "message": str(e)}
+        
+        finally:
+            self._release_shared_prefix(shared_prefix)
     
-    def save_result(self, output: WriterOutput, output_dir: str = "data/generated") -> str:
+    def save_result(self, output: WriterOutput, output_dir: Optional[str] = None) -> str:
         """
-        Save generation result to files.
+        Save generation result.
+        
+        Results are queued to the agent's output sink and written in the
+        background, unless an output directory is given.
         
         Args:
             output: WriterOutput to save
-            output_dir: Directory to save files
+            output_dir: Write the JSON, Markdown and HTML files to this
+                directory right away instead
             
         Returns:
-            str: Path to saved JSON file
+            str: Path to the saved JSON file, or where the sink stores the result
         """
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save JSON output
-        json_file = output_path / f"writer_output_{output.generation_id}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(output.dict(), f, indent=2, ensure_ascii=False)
-        
-        # Save markdown file
-        md_file = output_path / f"proposal_{output.generation_id}.md"
-        with open(md_file, 'w', encoding='utf-8') as f:
-            f.write(output.generated_content["full_content"]["markdown"])
+        record = OutputRecord(
+            output.generation_id,
+            output.dict(),
+            attachments={
+                f"proposal_{output.generation_id}.md": output.generated_content["full_content"]["markdown"],
+                f"proposal_{output.generation_id}.html": output.generated_content["full_content"]["html"]
+            }
+        )
         
-        # Save HTML file
-        html_file = output_path / f"proposal_{output.generation_id}.html"
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(output.generated_content["full_content"]["html"])
+        if output_dir is None:
+            location = self.output_sink.write(record)
+            self.logger.info(f"Results queued for: {location}")
+            return location
         
+        json_file = write_record_files(output_dir, "writer_output", record)[0]
         self.logger.info(f"Results saved to: {json_file}")
         return str(json_file)
 
@@ -554,6 +1490,7 @@ def main():
         
         # Save results
         saved_path = agent.save_result(result)
+        agent.flush_outputs()
         print(f"Generated proposal saved to: {saved_path}")
         
         # Display summary
@@ -0,0 +1,192 @@
+"""
+Generation Checkpoints
+SQLite store of batch generation jobs and the sections they have completed,
+so an interrupted batch resumes without regenerating finished work.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+JOB_STATUSES = ("running", "completed", "failed")
+
+
+class CheckpointStore:
+    """
+    Durable record of batch jobs and their completed sections.
+
+    Every write is committed before it returns, so a section is never lost
+    once it has been checkpointed. A job whose input changes between runs
+    (same id, different input hash) starts over.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            input_hash TEXT NOT NULL,
+            status TEXT NOT NULL,
+            retrieval_context TEXT,
+            output_path TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sections (
+            job_id TEXT NOT NULL,
+            section_type TEXT NOT NULL,
+            data TEXT NOT NULL,
+            completed_at REAL NOT NULL,
+            PRIMARY KEY (job_id, section_type)
+        );
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (or create) a checkpoint file.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def start_job(self, job_id: str, input_hash: str) -> Dict[str, Any]:
+        """
+        Mark a job as running, discarding checkpoints made for a different input.
+
+        Args:
+            job_id: Job identifier
+            input_hash: Hash of the job's input
+
+        Returns:
+            The job record before this run (``status`` is None for new jobs)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT input_hash, status, retrieval_context, output_path, attempts FROM jobs WHERE job_id = ?",
+                    (job_id,)
+                ).fetchone()
+                if row is not None and row[0] != input_hash:
+                    self._conn.execute("DELETE FROM sections WHERE job_id = ?", (job_id,))
+                    self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                    row = None
+
+                self._conn.execute(
+                    "INSERT INTO jobs (job_id, input_hash, status, attempts, updated_at) VALUES (?, ?, 'running', 1, ?) "
+                    "ON CONFLICT (job_id) DO UPDATE SET status = 'running', error = NULL, "
+                    "attempts = attempts + 1, updated_at = excluded.updated_at",
+                    (job_id, input_hash, now)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return {"status": None, "retrieval_context": None, "output_path": None, "attempts": 0}
+        return {
+            "status": row[1],
+            "retrieval_context": json.loads(row[2]) if row[2] else None,
+            "output_path": row[3],
+            "attempts": row[4]
+        }
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job record.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Status, input hash, output path, error and attempts, or None
+            for unknown jobs
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, input_hash, output_path, error, attempts FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "input_hash": row[1], "output_path": row[2], "error": row[3], "attempts": row[4]}
+
+    def save_retrieval_context(self, job_id: str, retrieval_context: Optional[Dict[str, Any]]):
+        """Keep the context a job was generated with, so resumed sections use the same one."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET retrieval_context = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(retrieval_context) if retrieval_context else None, time.time(), job_id)
+            )
+
+    def save_section(self, job_id: str, section_data: Dict[str, Any]):
+        """
+        Checkpoint a completed section.
+
+        Args:
+            job_id: Job identifier
+            section_data: Section data as produced by the Writer Agent
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (job_id, section_type, data, completed_at) VALUES (?, ?, ?, ?)",
+                (job_id, section_data["section_type"], json.dumps(section_data), time.time())
+            )
+
+    def completed_sections(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the sections a job has completed.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Section data by section type
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section_type, data FROM sections WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {section_type: json.loads(data) for section_type, data in rows}
+
+    def finish_job(self, job_id: str, status: str, output_path: Optional[str] = None,
+                   error: Optional[str] = None):
+        """
+        Record how a job ended.
+
+        Args:
+            job_id: Job identifier
+            status: "completed" or "failed"
+            output_path: Where the result was saved
+            error: Why the job failed
+        """
+        if status not in JOB_STATUSES:
+            raise ValueError(f"Unknown job status: {status}")
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, output_path = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, output_path, error, time.time(), job_id)
+            )
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status and of checkpointed sections."""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            counts["sections"] = self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+        return counts
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
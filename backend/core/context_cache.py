@@ -0,0 +1,136 @@
+"""
+Prompt Prefix Caching
+Uploads a prompt prefix shared by several requests once and binds model
+clients that only need the request-specific suffix.
+
+The Gemini backend uses the provider's context caching; the local backend
+keeps the prefix in process and prepends it to every request, for tests
+and for providers without context caching.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class CachedPrefix:
+    """A prompt prefix registered with a context cache backend."""
+    name: str
+    model_name: str
+    prefix: str
+    token_count: int
+    handle: Any = None
+
+
+class GeminiContextCache:
+    """Context caching through the Gemini caching API."""
+
+    backend = "gemini"
+
+    def __init__(self, ttl_seconds: int = 600, min_prefix_tokens: int = 1024):
+        """
+        Initialize the backend.
+
+        Args:
+            ttl_seconds: Lifetime of a cached prefix on the provider
+            min_prefix_tokens: Smallest prefix the provider accepts for caching
+        """
+        self.ttl_seconds = ttl_seconds
+        self.min_prefix_tokens = min_prefix_tokens
+
+    def create(self, model_name: str, prefix: str, token_count: int) -> CachedPrefix:
+        """
+        Upload a prefix to the provider's context cache.
+
+        Args:
+            model_name: Model the cached content is used with
+            prefix: Shared prompt prefix
+            token_count: Caller's estimate of the prefix tokens (the
+                provider's count is recorded instead)
+
+        Returns:
+            Handle for binding models to the cached prefix
+        """
+        from google.generativeai import caching
+
+        model_path = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        cached = caching.CachedContent.create(
+            model=model_path,
+            contents=[prefix],
+            ttl=timedelta(seconds=self.ttl_seconds)
+        )
+        return CachedPrefix(
+            name=cached.name,
+            model_name=model_name,
+            prefix=prefix,
+            token_count=cached.usage_metadata.total_token_count,
+            handle=cached
+        )
+
+    def bind(self, cached: CachedPrefix, generation_config: Dict[str, Any],
+             safety_settings: Optional[List[Dict[str, Any]]], model_factory: Callable[[Dict[str, Any]], Any]):
+        """
+        Get a model client whose requests continue the cached prefix.
+
+        Args:
+            cached: Prefix from create
+            generation_config: Generation parameters
+            safety_settings: Safety settings
+            model_factory: Builds a plain model for a generation config (unused)
+
+        Returns:
+            Model client to send the request suffix to
+        """
+        import google.generativeai as genai
+
+        return genai.GenerativeModel.from_cached_content(
+            cached.handle,
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
+
+    def release(self, cached: CachedPrefix):
+        """Delete the cached prefix from the provider before its TTL runs out."""
+        cached.handle.delete()
+
+
+class _PrefixedModel:
+    """Model wrapper that prepends a prefix to every prompt."""
+
+    def __init__(self, model, prefix: str):
+        self.model = model
+        self.prefix = prefix
+
+    def generate_content(self, contents: str, **kwargs):
+        return self.model.generate_content(self.prefix + contents, **kwargs)
+
+
+class LocalContextCache:
+    """In-process stand-in for provider context caching."""
+
+    backend = "local"
+    min_prefix_tokens = 0
+
+    def create(self, model_name: str, prefix: str, token_count: int) -> CachedPrefix:
+        """Register a prefix, with the caller's token count, without uploading it anywhere."""
+        return CachedPrefix(
+            name=f"local/{id(prefix):x}",
+            model_name=model_name,
+            prefix=prefix,
+            token_count=token_count
+        )
+
+    def bind(self, cached: CachedPrefix, generation_config: Dict[str, Any],
+             safety_settings: Optional[List[Dict[str, Any]]], model_factory: Callable[[Dict[str, Any]], Any]):
+        """Get a model that sends the prefix ahead of each request suffix."""
+        return _PrefixedModel(model_factory(generation_config), cached.prefix)
+
+    def release(self, cached: CachedPrefix):
+        """Nothing to release for local prefixes."""
+
+
+CONTEXT_CACHE_BACKENDS = {
+    "gemini": GeminiContextCache,
+    "local": LocalContextCache,
+}
@@ -0,0 +1,143 @@
+"""
+Extractive Context Compression
+Shrinks retrieved chunks to the sentences most similar to a query, scoring
+all sentences against all queries with one embedding batch and a matrix
+product.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.encoders import get_encoder
+
+
+# Sentence ends followed by whitespace, or line breaks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """
+    Split text into sentences.
+
+    Fragments shorter than min_chars (headings, list markers, the cut-off
+    ends of a chunk window) are merged into the following sentence.
+
+    Args:
+        text: Text to split
+        min_chars: Minimum sentence length
+
+    Returns:
+        Sentences in order
+    """
+    sentences = []
+    pending = ""
+    for piece in _SENTENCE_BOUNDARY.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class ContextCompressor:
+    """Keep the sentences of retrieved matches that are most relevant to a query."""
+
+    def __init__(
+        self,
+        sentences_per_match: int = 3,
+        model_name: str = "all-MiniLM-L6-v2",
+        encoder_backend: str = "torch",
+        encoder=None
+    ):
+        """
+        Initialize the compressor.
+
+        Args:
+            sentences_per_match: Sentences kept from each match
+            model_name: Sentence transformer model (shared with retrieval
+                through the encoder registry)
+            encoder_backend: Encoder backend ("torch" or "onnx")
+            encoder: Encoder to use instead of the shared one for model_name
+        """
+        self.sentences_per_match = sentences_per_match
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self._encoder = encoder
+
+    @property
+    def encoder(self):
+        """Sentence encoder, taken from the shared encoder registry on first use."""
+        if self._encoder is None:
+            self._encoder = get_encoder(self.model_name, backend=self.encoder_backend)
+        return self._encoder
+
+    def compress(
+        self,
+        matches: Sequence[Dict[str, Any]],
+        queries: Sequence[str]
+    ) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Compress matches once per query.
+
+        Sentences are embedded once and shared by every query. Each match
+        keeps its top sentences for the query in their original order.
+
+        Args:
+            matches: Retrieved matches with a "text" field
+            queries: Queries to compress for
+
+        Returns:
+            For each query, the compressed matches (copies with "text"
+            replaced) and stats with original_chars, compressed_chars and
+            ratio
+        """
+        sentences = []
+        owners = []
+        for i, match in enumerate(matches):
+            for sentence in split_sentences(match.get("text", "")):
+                sentences.append(sentence)
+                owners.append(i)
+
+        original_chars = sum(len(match.get("text", "")) for match in matches)
+        if not sentences or not queries:
+            stats = {"original_chars": original_chars, "compressed_chars": original_chars, "ratio": 1.0}
+            return [(list(matches), dict(stats)) for _ in queries]
+
+        embeddings = np.asarray(
+            self.encoder.encode(list(queries) + sentences, convert_to_numpy=True, normalize_embeddings=True),
+            dtype=np.float32
+        )
+        # (queries, sentences) cosine similarities
+        similarities = embeddings[:len(queries)] @ embeddings[len(queries):].T
+
+        owners = np.asarray(owners)
+        bounds = np.searchsorted(owners, np.arange(len(matches) + 1))
+
+        results = []
+        for row in similarities:
+            compressed = []
+            for i, match in enumerate(matches):
+                start, end = bounds[i], bounds[i + 1]
+                if end - start <= self.sentences_per_match:
+                    compressed.append(dict(match))
+                    continue
+                keep = np.sort(np.argpartition(-row[start:end], self.sentences_per_match)[:self.sentences_per_match])
+                compressed.append({**match, "text": " ".join(sentences[start + k] for k in keep)})
+
+            compressed_chars = sum(len(match.get("text", "")) for match in compressed)
+            results.append((compressed, {
+                "original_chars": original_chars,
+                "compressed_chars": compressed_chars,
+                "ratio": compressed_chars / original_chars if original_chars else 1.0
+            }))
+        return results
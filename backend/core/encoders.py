@@ -0,0 +1,426 @@
+"""
+Sentence Encoder Backends
+Loads sentence embedding models on PyTorch or ONNX Runtime behind the
+SentenceTransformer ``encode`` interface, and shares loaded models
+process-wide through an encoder registry.
+
+torch, sentence_transformers and onnxruntime are imported on first use.
+"""
+
+import inspect
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+
+ENCODER_BACKENDS = ("torch", "onnx")
+DEFAULT_ONNX_ROOT = Path("data/encoders")
+
+
+def _import_onnxruntime():
+    """Import the optional ONNX Runtime dependencies."""
+    try:
+        import onnxruntime
+        import transformers
+    except ImportError as e:
+        raise ImportError(
+            "ONNX backend requires onnxruntime and transformers: pip install onnxruntime transformers"
+        ) from e
+    return onnxruntime, transformers
+
+
+def default_onnx_dir(model_name: str) -> Path:
+    """Default export directory for a model's ONNX files."""
+    return DEFAULT_ONNX_ROOT / re.sub(r"[^\w\-\.]", "_", model_name)
+
+
+class OnnxEncoder:
+    """
+    Sentence encoder running an exported transformer on ONNX Runtime.
+
+    Pooling and normalization are applied in NumPy and follow the settings
+    of the SentenceTransformer model the graph was exported from.
+    """
+
+    CONFIG_FILE = "encoder_config.json"
+    MODEL_FILE = "model.onnx"
+    QUANTIZED_MODEL_FILE = "model_int8.onnx"
+
+    def __init__(
+        self,
+        model_dir: Path,
+        quantized: bool = False,
+        num_threads: Optional[int] = None
+    ):
+        """
+        Initialize the ONNX encoder.
+
+        Args:
+            model_dir: Directory created by export_onnx
+            quantized: Use the int8 dynamically quantized graph
+            num_threads: Intra-op thread count (ONNX Runtime default if None)
+        """
+        ort, transformers = _import_onnxruntime()
+
+        self.model_dir = Path(model_dir)
+        with open(self.model_dir / self.CONFIG_FILE, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        model_file = self.QUANTIZED_MODEL_FILE if quantized else self.MODEL_FILE
+        if not (self.model_dir / model_file).exists():
+            raise FileNotFoundError(f"ONNX model not found: {self.model_dir / model_file}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(
+            str(self.model_dir / model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(str(self.model_dir))
+        self.quantized = quantized
+
+        logger.info(f"Loaded ONNX encoder from {self.model_dir / model_file}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the embedding dimension."""
+        return self.config["dimension"]
+
+    def _pool(self, hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Pool token embeddings into sentence embeddings."""
+        pooling = self.config.get("pooling", "mean")
+        if pooling == "cls":
+            return hidden_states[:, 0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        if pooling == "max":
+            return np.where(mask > 0, hidden_states, -1e9).max(axis=1)
+
+        return (hidden_states * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode sentences into embeddings.
+
+        Args:
+            sentences: Sentence or list of sentences
+            batch_size: Sentences per inference call
+            show_progress_bar: Accepted for interface compatibility
+            convert_to_numpy: Accepted for interface compatibility (always NumPy)
+            normalize_embeddings: L2-normalize the embeddings
+
+        Returns:
+            Embeddings array of shape (n, dimension), or (dimension,) for a single string
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # Batch similar lengths together to minimize padding
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.config.get("max_seq_length", 256),
+                return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+            hidden_states = self.session.run(None, feeds)[0]
+            embeddings[batch_idx] = self._pool(hidden_states, encoded["attention_mask"])
+
+        if normalize_embeddings or self.config.get("normalize", False):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx(
+    model_name: str,
+    output_dir: Optional[Path] = None,
+    quantize: bool = True,
+    opset: int = 14
+) -> Path:
+    """
+    Export a SentenceTransformer model to ONNX.
+
+    Writes ``model.onnx``, optionally ``model_int8.onnx`` (dynamic int8
+    quantization of the linear layers), the tokenizer files and an
+    ``encoder_config.json`` describing pooling and normalization.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        output_dir: Export directory (defaults to data/encoders/<model_name>)
+        quantize: Also write an int8 quantized graph
+        opset: ONNX opset version
+
+    Returns:
+        Export directory
+    """
+    import torch
+    import sentence_transformers
+
+    _import_onnxruntime()
+
+    output_dir = Path(output_dir or default_onnx_dir(model_name))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = sentence_transformers.SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+
+    pooling = "mean"
+    normalize = False
+    for module in model:
+        if isinstance(module, sentence_transformers.models.Pooling):
+            mode = getattr(module, "pooling_mode", None)
+            if mode is None:
+                mode = module.get_pooling_mode_str()
+            if mode not in ("mean", "cls", "max"):
+                raise ValueError(f"Unsupported pooling mode for ONNX export: {mode}")
+            pooling = mode
+        elif isinstance(module, sentence_transformers.models.Normalize):
+            normalize = True
+
+    class _HiddenStates(torch.nn.Module):
+        """Expose last_hidden_state from keyword-only transformer inputs."""
+
+        def __init__(self, wrapped, input_names):
+            super().__init__()
+            self.wrapped = wrapped
+            self.input_names = input_names
+
+        def forward(self, *inputs):
+            return self.wrapped(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+    input_names = ["input_ids", "attention_mask"]
+    if "token_type_ids" in inspect.signature(transformer.forward).parameters:
+        input_names.append("token_type_ids")
+
+    sample = model.tokenizer(["sample sentence"], return_tensors="pt")
+    inputs = tuple(
+        sample.get(name, torch.zeros_like(sample["input_ids"])) for name in input_names
+    )
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    model_path = output_dir / OnnxEncoder.MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(transformer, input_names),
+            inputs,
+            str(model_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+    logger.info(f"Exported ONNX model to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        quantized_path = output_dir / OnnxEncoder.QUANTIZED_MODEL_FILE
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        logger.info(f"Wrote int8 quantized model to {quantized_path}")
+
+    model.tokenizer.save_pretrained(str(output_dir))
+
+    config = {
+        "model_name": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": pooling,
+        "normalize": normalize,
+        "quantized": quantize
+    }
+    with open(output_dir / OnnxEncoder.CONFIG_FILE, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    return output_dir
+
+
+def load_encoder(
+    model_name: str,
+    backend: str = "torch",
+    onnx_dir: Optional[Path] = None,
+    quantized: bool = True
+):
+    """
+    Load a sentence encoder on the requested backend.
+
+    The ONNX backend exports the model on first use if no export exists in
+    ``onnx_dir``.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        backend: "torch" or "onnx"
+        onnx_dir: ONNX export directory (defaults to data/encoders/<model_name>)
+        quantized: Use the int8 quantized graph on the ONNX backend
+
+    Returns:
+        Encoder exposing SentenceTransformer's encode interface
+    """
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (expected one of {ENCODER_BACKENDS})")
+
+    if backend == "torch":
+        import sentence_transformers
+
+        return sentence_transformers.SentenceTransformer(model_name)
+
+    onnx_dir = Path(onnx_dir or default_onnx_dir(model_name))
+    model_file = OnnxEncoder.QUANTIZED_MODEL_FILE if quantized else OnnxEncoder.MODEL_FILE
+    if not (onnx_dir / model_file).exists():
+        logger.info(f"No ONNX export found in {onnx_dir}, exporting {model_name}")
+        export_onnx(model_name, onnx_dir, quantize=quantized)
+
+    return OnnxEncoder(onnx_dir, quantized=quantized)
+
+
+_registry: Dict[Tuple, Any] = {}
+_registry_locks: Dict[Tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_encoder(
+    model_name: str,
+    backend: str = "torch",
+    onnx_dir: Optional[Path] = None,
+    quantized: bool = True
+):
+    """
+    Get the process-wide shared encoder for a model, loading it on first use.
+
+    Every component asking for the same model and backend receives the same
+    instance, so the model is loaded once per process. Concurrent first
+    calls for the same key wait for a single load.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        backend: "torch" or "onnx"
+        onnx_dir: ONNX export directory (defaults to data/encoders/<model_name>)
+        quantized: Use the int8 quantized graph on the ONNX backend
+
+    Returns:
+        Shared encoder exposing SentenceTransformer's encode interface
+    """
+    key = (model_name, backend, str(onnx_dir) if onnx_dir else None, quantized if backend == "onnx" else None)
+
+    with _registry_lock:
+        if key in _registry:
+            return _registry[key]
+        key_lock = _registry_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        with _registry_lock:
+            if key in _registry:
+                return _registry[key]
+
+        start = time.perf_counter()
+        encoder = load_encoder(model_name, backend=backend, onnx_dir=onnx_dir, quantized=quantized)
+        logger.info(f"Loaded shared encoder {model_name} ({backend}) in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        with _registry_lock:
+            _registry[key] = encoder
+        return encoder
+
+
+def clear_encoder_registry():
+    """Drop all shared encoders (mainly for tests)."""
+    with _registry_lock:
+        _registry.clear()
+        _registry_locks.clear()
+
+
+def parity_check(
+    reference,
+    candidate,
+    texts: List[str],
+    min_cosine: float = 0.99
+) -> Dict[str, Any]:
+    """
+    Compare two encoders by cosine similarity of their embeddings.
+
+    Args:
+        reference: Reference encoder (usually the PyTorch model)
+        candidate: Encoder under test
+        texts: Texts to embed with both encoders
+        min_cosine: Minimum per-text cosine required to pass
+
+    Returns:
+        Dictionary with min/mean cosine agreement and a pass flag
+    """
+    expected = reference.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    actual = candidate.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    cosines = np.sum(expected * actual, axis=1)
+
+    report = {
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "passed": bool(cosines.min() >= min_cosine)
+    }
+    logger.info(f"Encoder parity: min={report['min_cosine']:.5f} mean={report['mean_cosine']:.5f}")
+    return report
+
+
+def benchmark_encoder(
+    encoder,
+    queries: List[str],
+    chunks: List[str],
+    batch_size: int = 32
+) -> Dict[str, float]:
+    """
+    Measure query-time and build-time encoding throughput.
+
+    Queries are encoded one at a time, as RetrieverAgent does; chunks are
+    encoded in batches, as VectorDBBuilder does.
+
+    Args:
+        encoder: Encoder to benchmark
+        queries: Short query texts
+        chunks: Chunk-sized texts
+        batch_size: Batch size for chunk encoding
+
+    Returns:
+        Dictionary with queries/sec and chunks/sec
+    """
+    # Warm up
+    encoder.encode(queries[:1], convert_to_numpy=True, normalize_embeddings=True)
+
+    start = time.perf_counter()
+    for query in queries:
+        encoder.encode([query], convert_to_numpy=True, normalize_embeddings=True)
+    query_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encoder.encode(chunks, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    chunk_seconds = time.perf_counter() - start
+
+    return {
+        "queries_per_sec": len(queries) / query_seconds,
+        "chunks_per_sec": len(chunks) / chunk_seconds
+    }
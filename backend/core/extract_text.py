@@ -1,6 +1,9 @@
 """
 Text Extraction Utilities
 Handles parsing of PDF and DOCX documents with chunking capabilities.
+
+Parser libraries are imported on first use so that importing this module
+stays cheap for callers that only chunk text.
 """
 
 import re
@@ -8,10 +11,6 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
-import pypdf
-from docx import Document
-from sentence_transformers import SentenceTransformer
-import numpy as np
 from loguru import logger
 
 
@@ -57,6 +56,8 @@ class TextExtractor:
         Returns:
             Extracted text content
         """
+        import pypdf
+        
         try:
             text = ""
             with open(file_path, 'rb') as file:
@@ -84,8 +85,10 @@ class TextExtractor:
         Returns:
             Extracted text content
         """
+        import docx
+        
         try:
-            doc = Document(file_path)
+            doc = docx.Document(file_path)
             text = ""
             
             # Extract paragraphs
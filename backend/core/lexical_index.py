@@ -0,0 +1,254 @@
+"""
+Lexical Index
+Compact BM25 inverted index stored as memory-mappable NumPy arrays.
+"""
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+# Keeps compound identifiers such as "FA8750-24-R-0001" or "52.212-4" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[\-\./][a-z0-9]+)*")
+COMPOUND_SEPARATORS = re.compile(r"[\-\./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase lexical tokens.
+
+    Compound identifiers are emitted whole and as their individual parts so
+    that both exact and partial identifier queries match.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if COMPOUND_SEPARATORS.search(token):
+            tokens.extend(part for part in COMPOUND_SEPARATORS.split(token) if part)
+    return tokens
+
+
+class BM25Index:
+    """BM25 inverted index over a fixed list of chunks."""
+
+    VOCAB_FILE = "vocab.json"
+    OFFSETS_FILE = "offsets.npy"
+    DOC_IDS_FILE = "doc_ids.npy"
+    TERM_FREQS_FILE = "term_freqs.npy"
+    DOC_LENGTHS_FILE = "doc_lengths.npy"
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Initialize the index from its postings arrays.
+
+        Args:
+            vocab: Mapping of term to term id
+            offsets: Start offset of each term's postings (length len(vocab) + 1)
+            doc_ids: Concatenated postings document ids
+            term_freqs: Term frequency for each posting
+            doc_lengths: Token count of each document
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+
+        self.num_docs = len(doc_lengths)
+        self.avg_doc_length = float(np.mean(doc_lengths)) if self.num_docs else 0.0
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Build an index over a list of texts.
+
+        Args:
+            texts: Document texts, indexed by position
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25 index
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = np.zeros(len(texts), dtype=np.int32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, freq))
+
+        terms = sorted(postings)
+        vocab = {term: term_id for term_id, term in enumerate(terms)}
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for term_id, term in enumerate(terms):
+            offsets[term_id + 1] = offsets[term_id] + len(postings[term])
+
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.int32)
+        for term_id, term in enumerate(terms):
+            start, end = offsets[term_id], offsets[term_id + 1]
+            entries = np.asarray(postings[term], dtype=np.int32)
+            doc_ids[start:end] = entries[:, 0]
+            term_freqs[start:end] = entries[:, 1]
+
+        logger.info(f"Built BM25 index: {len(terms)} terms, {len(doc_ids)} postings")
+        return cls(vocab, offsets, doc_ids, term_freqs, doc_lengths, k1=k1, b=b)
+
+    def save(self, output_path: Path):
+        """
+        Save index to a directory.
+
+        Args:
+            output_path: Output directory path
+        """
+        output_path = Path(output_path)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        np.save(output_path / self.OFFSETS_FILE, np.asarray(self.offsets))
+        np.save(output_path / self.DOC_IDS_FILE, np.asarray(self.doc_ids))
+        np.save(output_path / self.TERM_FREQS_FILE, np.asarray(self.term_freqs))
+        np.save(output_path / self.DOC_LENGTHS_FILE, np.asarray(self.doc_lengths))
+
+        with open(output_path / self.VOCAB_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"k1": self.k1, "b": self.b, "terms": self.vocab}, f, ensure_ascii=False)
+
+        logger.info(f"Saved BM25 index to {output_path}")
+
+    @classmethod
+    def load(cls, index_path: Path, mmap: bool = True) -> "BM25Index":
+        """
+        Load index from a directory.
+
+        Args:
+            index_path: Index directory path
+            mmap: Memory-map postings instead of reading them into memory
+
+        Returns:
+            BM25 index
+        """
+        index_path = Path(index_path)
+        mmap_mode = "r" if mmap else None
+
+        with open(index_path / cls.VOCAB_FILE, 'r', encoding='utf-8') as f:
+            vocab_data = json.load(f)
+
+        index = cls(
+            vocab=vocab_data["terms"],
+            offsets=np.load(index_path / cls.OFFSETS_FILE, mmap_mode=mmap_mode),
+            doc_ids=np.load(index_path / cls.DOC_IDS_FILE, mmap_mode=mmap_mode),
+            term_freqs=np.load(index_path / cls.TERM_FREQS_FILE, mmap_mode=mmap_mode),
+            doc_lengths=np.load(index_path / cls.DOC_LENGTHS_FILE),
+            k1=vocab_data.get("k1", 1.5),
+            b=vocab_data.get("b", 0.75)
+        )
+        logger.info(f"Loaded BM25 index: {len(index.vocab)} terms")
+        return index
+
+    def _idf(self, doc_freq) -> float:
+        """Inverse document frequency of a term found in ``doc_freq`` documents."""
+        return np.log1p((self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def max_score(self, query_text: str) -> float:
+        """
+        Upper bound of a query's BM25 score, independent of the documents matched.
+
+        Every query term contributes its IDF times ``k1 + 1``, the limit of
+        its saturated term frequency; terms missing from the index count
+        with the IDF of an unseen term. Dividing by this bound maps scores
+        into [0, 1] so that a document matching only a few, common query
+        terms scores low.
+
+        Args:
+            query_text: Query text
+
+        Returns:
+            Score bound (0.0 for an empty query or index)
+        """
+        if not self.num_docs:
+            return 0.0
+
+        bound = 0.0
+        for term, query_freq in Counter(tokenize(query_text)).items():
+            term_id = self.vocab.get(term)
+            doc_freq = self.offsets[term_id + 1] - self.offsets[term_id] if term_id is not None else 0
+            bound += query_freq * self._idf(doc_freq) * (self.k1 + 1)
+        return float(bound)
+
+    def score(self, query_text: str) -> np.ndarray:
+        """
+        Compute BM25 scores of every document for a query.
+
+        Args:
+            query_text: Query text
+
+        Returns:
+            Array of scores, one per document
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+
+        for term, query_freq in Counter(tokenize(query_text)).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = np.asarray(self.doc_ids[start:end])
+            freqs = np.asarray(self.term_freqs[start:end], dtype=np.float32)
+
+            idf = self._idf(end - start)
+            scores[docs] += query_freq * idf * freqs * (self.k1 + 1) / (freqs + length_norm[docs])
+
+        return scores
+
+    def search(self, query_text: str, top_k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the highest scoring documents for a query.
+
+        Args:
+            query_text: Query text
+            top_k: Number of top results to return
+
+        Returns:
+            Tuple of (scores, indices) sorted by descending score, excluding
+            documents that share no terms with the query
+        """
+        scores = self.score(query_text)
+        top_k = min(top_k, self.num_docs)
+        if top_k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        candidates = candidates[scores[candidates] > 0]
+        return scores[candidates], candidates
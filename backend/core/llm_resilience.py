@@ -0,0 +1,364 @@
+"""
+LLM Call Resilience
+Per-call deadlines, jittered exponential retries and hedged duplicate
+requests for model calls, so one slow or failed call neither hangs nor
+sinks a whole proposal.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+from loguru import logger
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential
+)
+
+from core.rate_limiter import RateLimitTimeout
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    RETRYABLE_API_ERRORS = (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.ServerError,
+        api_exceptions.DeadlineExceeded
+    )
+except ImportError:
+    RETRYABLE_API_ERRORS = ()
+
+
+class CallTimeoutError(TimeoutError):
+    """A model call did not finish within its deadline."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call is worth retrying.
+
+    Rate limits, server errors, timeouts and dropped connections are
+    transient; invalid requests, safety blocks and empty responses are not.
+    Running out of time while queued for client-side quota is not retried
+    either, so the quota wait limit bounds how long a call can wait.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        True for transient errors
+    """
+    if isinstance(error, RateLimitTimeout):
+        return False
+    return isinstance(error, RETRYABLE_API_ERRORS + (TimeoutError, ConnectionError))
+
+
+def iter_with_deadline(iterable: Iterable, deadline: Optional[float]) -> Iterator:
+    """
+    Iterate a response stream, giving up once it stalls past a deadline.
+
+    A stream blocks in ``next`` until the server sends a chunk, so chunks are
+    read on a helper thread and handed over through a queue; the caller waits
+    for each one no longer than the time left.
+
+    Args:
+        iterable: Response stream
+        deadline: ``time.monotonic()`` value by which the stream must end
+            (read directly when None)
+
+    Yields:
+        Items of the stream
+
+    Raises:
+        CallTimeoutError: If the next item does not arrive before the deadline
+    """
+    if deadline is None:
+        yield from iterable
+        return
+
+    items: queue.Queue = queue.Queue()
+    end = object()
+
+    def read():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((end, e))
+            return
+        items.put((end, None))
+
+    threading.Thread(target=read, name="llm-stream", daemon=True).start()
+    while True:
+        try:
+            item, error = items.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise CallTimeoutError("Model stream stalled past its deadline") from None
+        if item is end:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+
+@dataclass
+class CallStats:
+    """What it took to complete one logical call."""
+    attempts: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    timeouts: int = 0
+
+    @property
+    def retries(self) -> int:
+        """Attempts after the first."""
+        return max(0, self.attempts - 1)
+
+    def as_dict(self) -> Dict[str, int]:
+        """Counts for generation metadata."""
+        return {**asdict(self), "retries": self.retries}
+
+
+class ResilientCaller:
+    """
+    Run model calls with deadlines, retries and optional hedging.
+
+    Each attempt may be given a deadline. Transient failures are retried
+    with full-jitter exponential backoff. With hedging enabled, an attempt
+    still running after the recent p95 latency gets a duplicate request and
+    whichever response arrives first is used (the other is abandoned, and
+    its tokens are still billed by the provider).
+
+    Threads cannot be interrupted, so a timed-out attempt or losing hedge
+    keeps its pool thread until the client's own deadline ends it. Such
+    attempts are tracked, and once they would make a new attempt queue the
+    pool is retired (its threads exit as they finish) and a fresh one
+    takes new attempts.
+    """
+
+    def __init__(self, max_attempts: int = 3, call_timeout_s: Optional[float] = None,
+                 deadline_s: Optional[float] = None, backoff_initial_s: float = 1.0,
+                 backoff_max_s: float = 30.0, hedge: bool = False,
+                 hedge_quantile: float = 0.95, hedge_min_samples: int = 20,
+                 hedge_min_delay_s: float = 0.5, latency_window: int = 200,
+                 max_workers: int = 16):
+        """
+        Initialize the caller.
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            call_timeout_s: Deadline for each attempt (none when None)
+            deadline_s: Deadline for the call across all attempts and backoff
+            backoff_initial_s: Backoff scale; the n-th retry waits a random
+                time up to ``backoff_initial_s * 2 ** n``
+            backoff_max_s: Upper bound of a single backoff
+            hedge: Send a duplicate request when an attempt runs long
+            hedge_quantile: Latency quantile after which attempts are hedged
+            hedge_min_samples: Successful calls observed before hedging starts
+            hedge_min_delay_s: Lower bound of the hedge delay
+            latency_window: Recent call latencies kept for the quantile
+            max_workers: Threads available for deadline and hedged attempts,
+                not counting abandoned attempts still running
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.call_timeout_s = call_timeout_s
+        self.deadline_s = deadline_s
+        self.backoff_initial_s = backoff_initial_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[Future, ThreadPoolExecutor] = {}
+        self._abandoned: Set[Future] = set()
+        self._pools_retired = 0
+
+    def observe_latency(self, seconds: float):
+        """Record the latency of a successful call."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Time after which a running attempt is hedged.
+
+        Returns:
+            Delay in seconds, or None until enough latencies are observed
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = np.fromiter(self._latencies, dtype=float)
+        return max(self.hedge_min_delay_s, float(np.quantile(latencies, self.hedge_quantile)))
+
+    def _submit(self, fn: Callable[[Optional[float]], Any], timeout: Optional[float]) -> Future:
+        """Start an attempt on the pool, replacing the pool if abandoned attempts would hold it up."""
+        with self._lock:
+            executor = self._executor
+            if executor is not None:
+                busy = [future for future, owner in self._in_flight.items() if owner is executor]
+                if len(busy) >= self.max_workers and self._abandoned.intersection(busy):
+                    executor.shutdown(wait=False)
+                    self._pools_retired += 1
+                    executor = None
+            if executor is None:
+                executor = self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-call"
+                )
+            future = executor.submit(fn, timeout)
+            self._in_flight[future] = executor
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future):
+        """Stop tracking an attempt once its thread is free."""
+        with self._lock:
+            self._in_flight.pop(future, None)
+            self._abandoned.discard(future)
+
+    def _abandon(self, futures: List[Future]):
+        """Give up on attempts; those already running are tracked until they end."""
+        for future in futures:
+            if not future.cancel():
+                with self._lock:
+                    if future in self._in_flight:
+                        self._abandoned.add(future)
+
+    def _attempt(self, fn: Callable[[Optional[float]], Any], timeout: Optional[float],
+                 stats: CallStats, hedge: bool) -> Any:
+        """Run one attempt, enforcing its deadline and hedging it if it runs long."""
+        hedge_delay = self.hedge_delay() if hedge else None
+        started = time.monotonic()
+
+        if timeout is None and hedge_delay is None:
+            result = fn(None)
+            self.observe_latency(time.monotonic() - started)
+            return result
+
+        deadline = started + timeout if timeout is not None else None
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+        primary = self._submit(fn, timeout)
+        running: List[Future] = [primary]
+        error: Optional[BaseException] = None
+
+        while running:
+            wake_times = [t for t in (deadline, hedge_at) if t is not None]
+            wait_s = max(0.0, min(wake_times) - time.monotonic()) if wake_times else None
+            done, _ = wait(running, timeout=wait_s, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                running.remove(future)
+                if future.exception() is None:
+                    self._abandon(running)
+                    if future is not primary:
+                        stats.hedge_wins += 1
+                    self.observe_latency(time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline and running:
+                self._abandon(running)
+                stats.timeouts += 1
+                raise CallTimeoutError(f"Model call exceeded its {timeout:.1f}s deadline")
+
+            if hedge_at is not None and now >= hedge_at:
+                hedge_at = None
+                if running:
+                    stats.hedges += 1
+                    remaining = deadline - now if deadline is not None else None
+                    running.append(self._submit(fn, remaining))
+
+        raise error
+
+    def call(self, fn: Callable[[Optional[float]], Any], stats: Optional[CallStats] = None,
+             hedge: bool = True) -> Any:
+        """
+        Call ``fn`` with deadlines, retries and hedging.
+
+        Args:
+            fn: The call; receives the attempt's remaining deadline in
+                seconds (or None) to pass on to the client, which must
+                enforce it so abandoned attempts free their threads
+            stats: Counters updated in place
+            hedge: Allow hedging this call (off for calls that must not be
+                sent twice, such as streams already being relayed)
+
+        Returns:
+            Result of the first successful attempt
+
+        Raises:
+            CallTimeoutError: If the last attempt ran out of time
+            Exception: The last error when attempts are exhausted or the
+                error is not retryable
+        """
+        stats = stats if stats is not None else CallStats()
+        started = time.monotonic()
+
+        def attempt():
+            stats.attempts += 1
+            timeout = self.call_timeout_s
+            if self.deadline_s is not None:
+                remaining = self.deadline_s - (time.monotonic() - started)
+                if remaining <= 0:
+                    stats.timeouts += 1
+                    raise CallTimeoutError(f"Model call exceeded its {self.deadline_s:.1f}s overall deadline")
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            return self._attempt(fn, timeout, stats, hedge)
+
+        def log_retry(retry_state):
+            logger.warning(
+                f"Model call attempt {retry_state.attempt_number} failed "
+                f"({retry_state.outcome.exception()}), retrying in {retry_state.next_action.sleep:.2f}s"
+            )
+
+        stop = stop_after_attempt(self.max_attempts)
+        if self.deadline_s is not None:
+            stop = stop | stop_after_delay(self.deadline_s)
+
+        retrying = Retrying(
+            stop=stop,
+            wait=wait_random_exponential(multiplier=self.backoff_initial_s, max=self.backoff_max_s),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=log_retry,
+            reraise=True
+        )
+        return retrying(attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        """Observed latencies, the current hedge delay and abandoned attempts still running."""
+        with self._lock:
+            samples = len(self._latencies)
+            abandoned = len(self._abandoned)
+            pools_retired = self._pools_retired
+        return {
+            "latency_samples": samples,
+            "hedge_delay_s": self.hedge_delay(),
+            "abandoned_in_flight": abandoned,
+            "pools_retired": pools_retired
+        }
+
+    def close(self):
+        """Stop the attempt thread pool without waiting for abandoned calls."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,291 @@
+"""
+Asynchronous Log Sink
+Background-thread writer for append-only log files (JSONL, CSV) with
+batched writes, periodic fsync and size-based rotation with compression.
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+_STOP = object()
+
+
+class AsyncLogSink:
+    """
+    Append lines to a log file from a background thread.
+
+    Callers enqueue complete lines without touching the disk. When the queue
+    is full the line is dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        header: Optional[str] = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval_s: float = 0.5,
+        fsync_interval_s: float = 5.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        compress: bool = True
+    ):
+        """
+        Initialize the log sink and start its writer thread.
+
+        Args:
+            path: Log file path
+            header: Line written at the top of every new file (e.g. a CSV header)
+            max_queue_size: Maximum number of pending lines before dropping
+            batch_size: Maximum number of lines written per batch
+            flush_interval_s: Maximum time a line waits before being written
+            fsync_interval_s: Minimum time between fsync calls
+            max_bytes: Rotate the file once it grows beyond this size (0 disables)
+            backup_count: Number of rotated files to keep
+            compress: Whether to gzip rotated files
+        """
+        self.path = Path(path)
+        self.header = header
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.fsync_interval_s = fsync_interval_s
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._file = None
+        self._last_fsync = time.monotonic()
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._rotations = 0
+        self._closed = False
+
+        self._open()
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-sink-{self.path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, line: str) -> bool:
+        """
+        Enqueue a line for writing.
+
+        Args:
+            line: Line content, without trailing newline
+
+        Returns:
+            True if the line was queued, False if it was dropped
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(line)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until every line queued so far has been written and synced.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the flush completed within the timeout
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Write remaining lines and stop the writer thread.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get sink counters.
+
+        Returns:
+            Dictionary with written, dropped and rotation counts and queue depth
+        """
+        with self._stats_lock:
+            return {
+                "path": str(self.path),
+                "written": self._written,
+                "dropped": self._dropped,
+                "rotations": self._rotations,
+                "queue_depth": self._queue.qsize()
+            }
+
+    def _open(self):
+        """Open the log file for appending, writing the header if it is new."""
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, 'a', encoding='utf-8', newline='')
+        if is_new and self.header is not None:
+            self._file.write(self.header + '\n')
+            self._file.flush()
+
+    def _run(self):
+        """Writer loop: gather a batch, write it, then handle fsync and rotation."""
+        stopping = False
+        while not stopping:
+            lines = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                item = None
+
+            deadline = time.monotonic() + self.flush_interval_s
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                lines.append(item)
+                if len(lines) >= self.batch_size or time.monotonic() >= deadline:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            written = False
+            try:
+                if lines:
+                    if self._file.closed:
+                        # A failed rotation could not reopen the file; retry before writing
+                        self._open()
+                    self._file.write('\n'.join(lines) + '\n')
+                    self._file.flush()
+                    written = True
+                    with self._stats_lock:
+                        self._written += len(lines)
+
+                if waiters or stopping or time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = time.monotonic()
+
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except Exception as e:
+                if lines and not written:
+                    with self._stats_lock:
+                        self._dropped += len(lines)
+                logger.error(f"Error writing log file {self.path}: {e}")
+
+            for waiter in waiters:
+                waiter.set()
+
+        self._file.close()
+
+    def _rotated_path(self, number: int) -> Path:
+        """Path of the n-th rotated file."""
+        suffix = ".gz" if self.compress else ""
+        return self.path.with_name(f"{self.path.name}.{number}{suffix}")
+
+    def _rotate(self):
+        """
+        Rotate the current file, compressing it, and open a fresh one.
+
+        The active file is reopened even if rotating fails partway, so later
+        lines are appended to whichever file is left in place.
+        """
+        self._file.close()
+        try:
+            oldest = self._rotated_path(self.backup_count)
+            if oldest.exists():
+                oldest.unlink()
+            for number in range(self.backup_count - 1, 0, -1):
+                rotated = self._rotated_path(number)
+                if rotated.exists():
+                    rotated.rename(self._rotated_path(number + 1))
+
+            if self.backup_count > 0:
+                if self.compress:
+                    with open(self.path, 'rb') as src, gzip.open(self._rotated_path(1), 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    self.path.unlink()
+                else:
+                    self.path.rename(self._rotated_path(1))
+            else:
+                self.path.unlink()
+
+            with self._stats_lock:
+                self._rotations += 1
+        finally:
+            self._open()
+        logger.info(f"Rotated log file {self.path}")
+
+
+_sinks: Dict[Path, AsyncLogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_log_sink(path: Path, **kwargs) -> AsyncLogSink:
+    """
+    Get the process-wide sink for a log file, creating it on first use.
+
+    Components logging to the same file share one sink so that writes,
+    rotation and fsync are serialized through a single thread. Keyword
+    arguments only apply when the sink is created.
+
+    Args:
+        path: Log file path
+        **kwargs: AsyncLogSink options
+
+    Returns:
+        Log sink for the path
+    """
+    key = Path(path).resolve()
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None or sink._closed:
+            sink = AsyncLogSink(key, **kwargs)
+            _sinks[key] = sink
+        return sink
+
+
+def close_all_sinks():
+    """Flush and close every sink created through get_log_sink."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_all_sinks)
@@ -0,0 +1,162 @@
+"""
+Markdown Rendering
+Pooled Markdown converters and single-pass document assembly from
+already-rendered section HTML.
+
+Building a ``markdown.Markdown`` parser (extension registry, processors,
+patterns) costs more than converting a typical section, and converting the
+joined document again repeats all of the per-section work. Converters are
+therefore reused across calls, and the full document is stitched from the
+section HTML with heading ids de-duplicated document-wide, the same way the
+``toc`` extension would have assigned them.
+"""
+
+import html
+import re
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+import markdown
+from markdown.extensions.toc import nest_toc_tokens, slugify, unique
+
+
+DEFAULT_EXTENSIONS = ("tables", "fenced_code", "toc")
+
+# Headings carrying an id assigned by the toc extension
+_HEADING_RE = re.compile(r'<h([1-6]) id="([^"]*)">(.*?)</h\1>', re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+class MarkdownRenderer:
+    """
+    Pool of reusable Markdown converters.
+
+    A converter is checked out for each conversion (they are not safe to
+    share between threads), reset afterwards and returned to the pool.
+    """
+
+    def __init__(self, extensions: Sequence[str] = DEFAULT_EXTENSIONS, max_idle: int = 8):
+        """
+        Initialize the pool.
+
+        Args:
+            extensions: Markdown extensions enabled on every converter
+            max_idle: Maximum number of idle converters kept
+        """
+        self.extensions = list(extensions)
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: List[markdown.Markdown] = []
+        self.created = 0
+        self.conversions = 0
+
+    def _checkout(self) -> markdown.Markdown:
+        """Take an idle converter, or build one if none is free."""
+        with self._lock:
+            self.conversions += 1
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        return markdown.Markdown(extensions=self.extensions)
+
+    def _checkin(self, converter: markdown.Markdown):
+        """Reset a converter and return it to the pool."""
+        converter.reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(converter)
+
+    def convert(self, text: str) -> str:
+        """
+        Convert Markdown to HTML.
+
+        Args:
+            text: Markdown source
+
+        Returns:
+            Rendered HTML (same output as ``markdown.markdown``)
+        """
+        converter = self._checkout()
+        try:
+            return converter.convert(text)
+        finally:
+            self._checkin(converter)
+
+    def stats(self) -> Dict[str, int]:
+        """Converters built, conversions served and idle converters."""
+        with self._lock:
+            return {"created": self.created, "conversions": self.conversions, "idle": len(self._idle)}
+
+    def clear(self):
+        """Drop every idle converter."""
+        with self._lock:
+            self._idle.clear()
+
+
+def render_toc(tokens: List[Dict[str, Any]]) -> str:
+    """
+    Render nested table of contents tokens as the toc extension does.
+
+    Args:
+        tokens: Nested tokens with ``id``, ``name`` (HTML-escaped) and ``children``
+
+    Returns:
+        Table of contents HTML (empty when there are no headings)
+    """
+    if not tokens:
+        return ""
+
+    def render_list(items: List[Dict[str, Any]]) -> str:
+        parts = ["<ul>\n"]
+        for item in items:
+            parts.append(f'<li><a href="#{item["id"]}">{item["name"]}</a>')
+            if item["children"]:
+                parts.append(render_list(item["children"]))
+            parts.append("</li>\n")
+        parts.append("</ul>\n")
+        return "".join(parts)
+
+    return f'<div class="toc">\n{render_list(tokens)}</div>\n'
+
+
+def stitch_sections(sections: Sequence[Tuple[str, str]]) -> Tuple[str, str]:
+    """
+    Assemble a document from rendered sections without re-parsing them.
+
+    Each section becomes a level 1 heading followed by its HTML, matching
+    the conversion of ``"# {title}\\n\\n{markdown}"`` blocks joined by blank
+    lines. Heading ids repeated across sections are renamed in document
+    order (``overview``, ``overview_1``, ...) and the table of contents is
+    merged from every section's headings. Reference-style links defined in
+    a different section than they are used in are the one case a full
+    re-conversion would resolve differently.
+
+    Args:
+        sections: (title, section HTML) pairs in document order
+
+    Returns:
+        Document HTML and merged table of contents HTML
+    """
+    used_ids = set()
+    headings: List[Dict[str, Any]] = []
+    parts = []
+
+    def rename(match: re.Match) -> str:
+        level, heading_id, inner = match.groups()
+        heading_id = unique(heading_id, used_ids)
+        headings.append({"level": int(level), "id": heading_id, "name": _TAG_RE.sub("", inner)})
+        return f'<h{level} id="{heading_id}">{inner}</h{level}>'
+
+    for title, section_html in sections:
+        title_html = html.escape(title, quote=False)
+        title_id = unique(slugify(title, "-"), used_ids)
+        headings.append({"level": 1, "id": title_id, "name": title_html})
+        parts.append(f'<h1 id="{title_id}">{title_html}</h1>')
+        if section_html:
+            parts.append(_HEADING_RE.sub(rename, section_html))
+
+    return "\n".join(parts), render_toc(nest_toc_tokens(headings))
+
+
+# Process-wide converter pool shared by every WriterAgent
+markdown_renderer = MarkdownRenderer()
@@ -0,0 +1,249 @@
+"""
+Latency Metrics
+Per-stage request timers, in-process latency histograms and Prometheus
+text exposition.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Tracing spans are optional
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond index lookups up to multi-second LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram for one metric, split by label values."""
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            description: Help text
+            label_names: Names of the labels observations are split by
+            buckets: Upper bounds of the histogram buckets
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values, one per label name
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            # Layout: bucket counts..., +Inf count, sum
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """
+        Get count and sum for every label combination.
+
+        Returns:
+            Mapping of label values to {"count", "sum"}
+        """
+        with self._lock:
+            return {key: {"count": series[-2], "sum": series[-1]} for key, series in self._series.items()}
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within buckets.
+
+        Args:
+            q: Quantile between 0 and 1
+            **labels: Label values selecting the series
+
+        Returns:
+            Estimated value, or None without observations
+        """
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = list(self._series.get(key, []))
+        if not series or series[-2] == 0:
+            return None
+
+        rank = q * series[-2]
+        lower_bound, lower_count = 0.0, 0.0
+        for bound, count in zip(self.buckets, series):
+            if count >= rank:
+                if count == lower_count:
+                    return bound
+                return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+            lower_bound, lower_count = bound, count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        """Render the histogram in Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((key, list(series)) for key, series in self._series.items())
+
+        for key, series in series_items:
+            base_labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            for bound, count in zip(self.buckets, series):
+                labels = ",".join(base_labels + [f'le="{bound:g}"'])
+                lines.append(f"{self.name}_bucket{{{labels}}} {count:g}")
+            labels = ",".join(base_labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{labels}}} {series[-2]:g}")
+            suffix = "{" + ",".join(base_labels) + "}" if base_labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-1]:.9g}")
+            lines.append(f"{self.name}_count{suffix} {series[-2]:g}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Collection of histograms rendered together on the metrics endpoint."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, description: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get a histogram by name, creating it on first use.
+
+        Args:
+            name: Metric name
+            description: Help text
+            label_names: Names of the labels observations are split by
+            buckets: Upper bounds of the histogram buckets
+
+        Returns:
+            Histogram registered under the name
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(name, description, label_names, buckets)
+            return histogram
+
+    def render_prometheus(self) -> str:
+        """Render every registered metric in Prometheus text format."""
+        with self._lock:
+            histograms = sorted(self._histograms.values(), key=lambda h: h.name)
+        lines = []
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Drop every registered metric (mainly for tests)."""
+        with self._lock:
+            self._histograms.clear()
+
+
+# Process-wide registry exposed by the /metrics route
+registry = MetricsRegistry()
+
+
+class StageTimer:
+    """
+    Time the stages of a single request.
+
+    Stage durations are reported in milliseconds for result metadata and can
+    be recorded into a latency histogram labelled by stage. With tracing
+    enabled and OpenTelemetry installed, each stage is also a span.
+    """
+
+    def __init__(self, operation: str, tracing: bool = False):
+        """
+        Initialize the timer.
+
+        Args:
+            operation: Operation name, used as the span name prefix
+            tracing: Open an OpenTelemetry span per stage
+        """
+        self.operation = operation
+        self.start_time = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self._tracer = trace.get_tracer("propulse") if tracing and trace is not None else None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time a block of code as a named stage.
+
+        Repeated stages with the same name accumulate.
+
+        Args:
+            name: Stage name
+        """
+        span = self._tracer.start_as_current_span(f"{self.operation}.{name}") if self._tracer else None
+        start = time.perf_counter()
+        try:
+            if span is not None:
+                with span:
+                    yield
+            else:
+                yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        """
+        Add a duration measured elsewhere to a stage.
+
+        Args:
+            name: Stage name
+            seconds: Duration in seconds
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self.start_time
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations in milliseconds."""
+        return {f"{name}_ms": seconds * 1000 for name, seconds in self.durations.items()}
+
+    def observe(self, stage_histogram: Histogram, total_histogram: Optional[Histogram] = None):
+        """
+        Record stage durations (and optionally the total) into histograms.
+
+        Args:
+            stage_histogram: Histogram labelled by stage
+            total_histogram: Histogram for the end-to-end duration
+        """
+        for name, seconds in self.durations.items():
+            stage_histogram.observe(seconds, stage=name)
+        if total_histogram is not None:
+            total_histogram.observe(self.elapsed())
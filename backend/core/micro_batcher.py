@@ -0,0 +1,148 @@
+"""
+Micro-Batching Utilities
+Coalesces concurrent async requests into batched calls executed off the event loop.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+class MicroBatcher:
+    """
+    Collect items submitted from coroutines and process them in batches.
+
+    The first pending item opens a batch; further items join it until either
+    ``max_batch_size`` items are collected or ``max_wait_ms`` has elapsed.
+    The batch function runs in an executor thread and must return one result
+    per item, in order.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher"
+    ):
+        """
+        Initialize the micro-batcher.
+
+        Args:
+            batch_fn: Function processing a list of items into a list of results
+            max_batch_size: Maximum number of items per batch
+            max_wait_ms: Maximum time to wait for a batch to fill
+            name: Name used in log messages
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+
+    def _ensure_worker(self):
+        """Start the worker task on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            Result produced by the batch function for this item
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Wait for the first item, then gather more until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Worker loop processing batches one at a time."""
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+
+            with self._stats_lock:
+                self._batch_sizes[len(batch)] += 1
+
+            try:
+                results = await self._loop.run_in_executor(None, self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: batch function returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                logger.error(f"Error processing {self.name} batch of {len(items)}: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        """Stop the worker task."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get achieved batch size statistics.
+
+        Returns:
+            Dictionary with batch counts, mean size and a size histogram
+        """
+        with self._stats_lock:
+            sizes = dict(self._batch_sizes)
+
+        batches = sum(sizes.values())
+        items = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "max_batch_size_seen": max(sizes, default=0),
+            "batch_size_histogram": dict(sorted(sizes.items()))
+        }
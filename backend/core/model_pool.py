@@ -0,0 +1,120 @@
+"""
+Generative Model Pool
+Process-wide cache of LLM client objects keyed by model name, generation
+config and safety settings, so identical configurations share one client.
+"""
+
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Convert a configuration value into a hashable, order-independent key.
+
+    Args:
+        value: Dicts, lists, enums and scalars in any combination
+
+    Returns:
+        Hashable equivalent of the value
+    """
+    # Enums first: IntEnum members are also ints but hash slowly
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, Hashable):
+        return value
+    return repr(value)
+
+
+class ModelPool:
+    """
+    Least-recently-used pool of model clients.
+
+    Clients are created by a caller-supplied factory on first request for a
+    configuration and reused afterwards, across sections and requests.
+    """
+
+    def __init__(self, max_size: int = 32):
+        """
+        Initialize the pool.
+
+        Args:
+            max_size: Maximum number of configurations kept
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name: str, generation_config: Optional[Dict[str, Any]], safety_settings: Optional[Any]) -> Hashable:
+        """
+        Build the pool key for a configuration.
+
+        Args:
+            model_name: Model name
+            generation_config: Generation parameters
+            safety_settings: Safety settings
+
+        Returns:
+            Hashable key
+        """
+        return (model_name, freeze(generation_config), freeze(safety_settings))
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get the client for a configuration, creating it on first use.
+
+        Args:
+            key: Configuration key from ``ModelPool.key``
+            factory: Zero-argument callable creating the client
+
+        Returns:
+            Shared client for the configuration
+        """
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+
+        # Built outside the lock; a concurrent duplicate is simply discarded
+        model = factory()
+
+        with self._lock:
+            existing = self._models.get(key)
+            if existing is not None:
+                return existing
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return model
+
+    def stats(self) -> Dict[str, int]:
+        """Get pool size and hit/miss counts."""
+        with self._lock:
+            return {"size": len(self._models), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Drop every pooled client (mainly for tests)."""
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide pool shared by all writer agents
+model_pool = ModelPool()
@@ -0,0 +1,562 @@
+"""
+Output Sinks
+Background writers for agent results (retrievals, generated proposals),
+taking file I/O off the request path.
+
+Three layouts are available: one JSON file per result (plus attachments
+such as Markdown and HTML renderings), rolling JSONL segments that are
+gzipped once full, and a SQLite table. Results are queued, written in
+batches by a writer thread, and fsynced together at most every
+``fsync_interval_s`` seconds or when a caller flushes.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from loguru import logger
+
+from core import serialization
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments are never adopted from other writers
+    fcntl = None
+
+
+_STOP = object()
+
+
+@dataclass
+class OutputRecord:
+    """One result to persist."""
+    record_id: str
+    document: Dict[str, Any]
+    # Extra files by name (e.g. "proposal_<id>.md"), written by the file sink only;
+    # the document already holds their content
+    attachments: Dict[str, str] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+def write_record_files(directory: Union[str, Path], prefix: str, record: OutputRecord,
+                       indent: bool = True) -> List[Path]:
+    """
+    Write a record as ``<prefix>_<id>.json`` plus its attachments.
+
+    Each file is written to a temporary name and renamed into place, so
+    readers never see a partial file.
+
+    Args:
+        directory: Output directory
+        prefix: JSON file name prefix
+        record: Record to write
+        indent: Pretty-print the JSON document
+
+    Returns:
+        Written paths, JSON document first
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    files = {f"{prefix}_{record.record_id}.json": serialization.dumps(record.document, indent=indent)}
+    files.update({name: text.encode('utf-8') for name, text in record.attachments.items()})
+
+    paths = []
+    for name, data in files.items():
+        path = directory / name
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def _fsync_path(path: Path):
+    """Flush a file or directory to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class OutputSink(ABC):
+    """
+    Base class: queue records and persist them from a background thread.
+
+    Unlike log sinks, results are never dropped; ``write`` blocks while the
+    queue is full.
+    """
+
+    backend = "base"
+
+    def __init__(self, directory: Union[str, Path], prefix: str, max_queue_size: int = 1000,
+                 batch_size: int = 64, flush_interval_s: float = 0.5, fsync_interval_s: float = 5.0):
+        """
+        Initialize the sink and start its writer thread.
+
+        Args:
+            directory: Output directory
+            prefix: Name prefix of the files written
+            max_queue_size: Maximum number of pending records before writers block
+            batch_size: Maximum number of records written per batch
+            flush_interval_s: Maximum time a record waits before being written
+            fsync_interval_s: Minimum time between fsyncs (flushes always sync)
+        """
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.fsync_interval_s = fsync_interval_s
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._syncs = 0
+        self._errors = 0
+        self._last_fsync = time.monotonic()
+        self._closed = False
+
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=f"output-sink-{prefix}", daemon=True)
+        self._thread.start()
+
+    @abstractmethod
+    def locate(self, record_id: str) -> str:
+        """Where a record is (or will be) stored."""
+
+    def _open(self):
+        """Prepare storage before the writer thread starts."""
+
+    @abstractmethod
+    def _write_batch(self, records: List[OutputRecord]):
+        """Persist a batch of records (writer thread)."""
+
+    def _sync(self):
+        """Make written records durable (writer thread)."""
+
+    def _close(self):
+        """Release storage after the writer thread stops."""
+
+    def write(self, record: OutputRecord) -> str:
+        """
+        Queue a record for writing.
+
+        Args:
+            record: Record to persist
+
+        Returns:
+            Location of the record (see ``locate``)
+        """
+        if self._closed:
+            raise RuntimeError(f"Output sink {self.directory / self.prefix} is closed")
+        self._queue.put(record)
+        return self.locate(record.record_id)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until every record queued so far has been written and synced.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the flush completed within the timeout
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """
+        Write remaining records and stop the writer thread.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Records written, fsyncs, write errors and queue depth."""
+        with self._stats_lock:
+            return {
+                "backend": self.backend,
+                "location": str(self.directory),
+                "written": self._written,
+                "syncs": self._syncs,
+                "errors": self._errors,
+                "queue_depth": self._queue.qsize()
+            }
+
+    def _run(self):
+        """Writer loop: gather a batch, write it, then fsync when due."""
+        stopping = False
+        while not stopping:
+            records = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                item = None
+
+            deadline = time.monotonic() + self.flush_interval_s
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                records.append(item)
+                if len(records) >= self.batch_size or time.monotonic() >= deadline:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            try:
+                if records:
+                    self._write_batch(records)
+                    with self._stats_lock:
+                        self._written += len(records)
+
+                if waiters or stopping or time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+                    self._sync()
+                    self._last_fsync = time.monotonic()
+                    with self._stats_lock:
+                        self._syncs += 1
+            except Exception as e:
+                with self._stats_lock:
+                    self._errors += 1
+                logger.error(f"Error writing {self.prefix} outputs to {self.directory}: {e}")
+
+            for waiter in waiters:
+                waiter.set()
+
+        self._close()
+
+
+class FileOutputSink(OutputSink):
+    """One JSON file per record, plus its attachments."""
+
+    backend = "files"
+
+    def __init__(self, directory: Union[str, Path], prefix: str, indent: bool = True, **kwargs):
+        """
+        Args:
+            directory: Output directory
+            prefix: JSON file name prefix
+            indent: Pretty-print JSON documents
+            **kwargs: OutputSink options
+        """
+        self.indent = indent
+        self._unsynced: List[Path] = []
+        super().__init__(directory, prefix, **kwargs)
+
+    def locate(self, record_id: str) -> str:
+        return str(self.directory / f"{self.prefix}_{record_id}.json")
+
+    def _write_batch(self, records: List[OutputRecord]):
+        for record in records:
+            self._unsynced.extend(write_record_files(self.directory, self.prefix, record, self.indent))
+
+    def _sync(self):
+        if not self._unsynced:
+            return
+        for path in self._unsynced:
+            _fsync_path(path)
+        # Persist the renames
+        _fsync_path(self.directory)
+        self._unsynced = []
+
+
+class JsonlSegmentSink(OutputSink):
+    """
+    Records appended to JSONL segments, gzipped once a segment is full.
+
+    The active segment ``<prefix>-<timestamp>-<pid>-<token>.jsonl`` receives
+    one line per record (``{"id", "timestamp", "document"}``). Once it
+    reaches ``max_segment_bytes`` it is compressed to ``.jsonl.gz`` and a new
+    one is started.
+
+    Several processes may share a directory: each holds an exclusive lock
+    on its active segment, and a segment is only reused or compressed by a
+    sink that takes its lock, i.e. once its writer has exited. A restarted
+    process thus keeps appending to the last segment left behind.
+    """
+
+    backend = "jsonl"
+
+    def __init__(self, directory: Union[str, Path], prefix: str,
+                 max_segment_bytes: int = 64 * 1024 * 1024, compress: bool = True, **kwargs):
+        """
+        Args:
+            directory: Output directory
+            prefix: Segment file name prefix
+            max_segment_bytes: Size at which the active segment is rolled
+            compress: Gzip rolled segments
+            **kwargs: OutputSink options
+        """
+        self.max_segment_bytes = max_segment_bytes
+        self.compress = compress
+        self._file = None
+        self._segment: Optional[Path] = None
+        self._rolls = 0
+        super().__init__(directory, prefix, **kwargs)
+
+    def locate(self, record_id: str) -> str:
+        return f"{self.directory / self.prefix}-*.jsonl#{record_id}"
+
+    def segments(self) -> List[Path]:
+        """Segment files of every writer, oldest first."""
+        segments = list(self.directory.glob(f"{self.prefix}-*.jsonl")) + list(self.directory.glob(f"{self.prefix}-*.jsonl.gz"))
+        return sorted(segments, key=lambda path: path.name.split(".")[0])
+
+    def _open(self):
+        # Segments whose writer has exited are adopted: the newest is reused, older ones rolled
+        for segment in sorted(self.directory.glob(f"{self.prefix}-*.jsonl"), reverse=True):
+            f = self._lock_segment(segment)
+            if f is None:
+                continue
+            if self._file is None and os.fstat(f.fileno()).st_size < self.max_segment_bytes:
+                self._segment, self._file = segment, f
+                continue
+            try:
+                self._compress(segment)
+            finally:
+                f.close()
+
+        if self._file is None:
+            self._start_segment()
+
+    @staticmethod
+    def _lock_segment(segment: Path):
+        """
+        Open an existing segment for appending under an exclusive lock.
+
+        Returns:
+            The open file, or None if another writer holds the segment or it
+            was rolled away meanwhile
+        """
+        if fcntl is None:
+            return None
+        try:
+            f = os.fdopen(os.open(segment, os.O_WRONLY | os.O_APPEND), 'ab')
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # The previous holder may have compressed and removed the segment before unlocking
+            if os.stat(segment).st_ino != os.fstat(f.fileno()).st_ino:
+                raise FileNotFoundError(segment)
+        except OSError:
+            f.close()
+            return None
+        return f
+
+    def _start_segment(self):
+        """Create and lock a new segment, ordered by creation time."""
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        self._segment = self.directory / f"{self.prefix}-{stamp}-{os.getpid()}-{secrets.token_hex(3)}.jsonl"
+        self._file = os.fdopen(os.open(self._segment, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644), 'ab')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def _compress(self, segment: Path):
+        """Gzip a finished segment (empty ones are removed); the caller holds its lock."""
+        if segment.stat().st_size == 0:
+            segment.unlink()
+            return
+        if not self.compress:
+            return
+        target = segment.with_name(segment.name + ".gz")
+        tmp_path = target.with_name(target.name + ".tmp")
+        with open(segment, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, target)
+        segment.unlink()
+
+    def _roll(self):
+        """Compress the full segment and start a new one."""
+        os.fsync(self._file.fileno())
+        # Compressed before closing, so the segment stays locked until it is gone
+        try:
+            self._compress(self._segment)
+        finally:
+            self._file.close()
+            self._start_segment()
+        self._rolls += 1
+        logger.info(f"Rolled {self.prefix} output segment in {self.directory}")
+
+    def _write_batch(self, records: List[OutputRecord]):
+        lines = [
+            serialization.dumps({"id": record.record_id, "timestamp": record.timestamp, "document": record.document})
+            for record in records
+        ]
+        self._file.write(b"\n".join(lines) + b"\n")
+        self._file.flush()
+        if self._file.tell() >= self.max_segment_bytes:
+            self._roll()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        try:
+            if self._segment.exists() and os.fstat(self._file.fileno()).st_size == 0:
+                self._segment.unlink()
+        finally:
+            self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "segment": str(self._segment), "rolls": self._rolls}
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Read every record written so far, oldest first.
+
+        Yields:
+            ``{"id", "timestamp", "document"}`` per record
+        """
+        for segment in self.segments():
+            opener = gzip.open if segment.suffix == ".gz" else open
+            with opener(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+class SQLiteOutputSink(OutputSink):
+    """Records stored as JSON in a SQLite table (``<prefix>.sqlite``)."""
+
+    backend = "sqlite"
+
+    def __init__(self, directory: Union[str, Path], prefix: str, **kwargs):
+        """
+        Args:
+            directory: Directory of the database file
+            prefix: Database file name
+            **kwargs: OutputSink options
+        """
+        self.path = Path(directory) / f"{prefix}.sqlite"
+        self._conn = None
+        self._db_lock = threading.Lock()
+        super().__init__(directory, prefix, **kwargs)
+
+    def locate(self, record_id: str) -> str:
+        return f"{self.path}#{record_id}"
+
+    def _open(self):
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Commits are only fsynced at WAL checkpoints; _sync checkpoints explicitly
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outputs ("
+            "record_id TEXT PRIMARY KEY, timestamp REAL NOT NULL, document TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outputs_timestamp ON outputs (timestamp)")
+        self._conn.commit()
+
+    def _write_batch(self, records: List[OutputRecord]):
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO outputs (record_id, timestamp, document) VALUES (?, ?, ?)",
+                [
+                    (record.record_id, record.timestamp, serialization.dumps(record.document).decode('utf-8'))
+                    for record in records
+                ]
+            )
+
+    def _sync(self):
+        with self._db_lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _close(self):
+        with self._db_lock:
+            self._conn.close()
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a record's document.
+
+        Args:
+            record_id: Record identifier
+
+        Returns:
+            The document, or None if it has not been written
+        """
+        with self._db_lock:
+            row = self._conn.execute("SELECT document FROM outputs WHERE record_id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+OUTPUT_SINK_BACKENDS = {
+    "files": FileOutputSink,
+    "jsonl": JsonlSegmentSink,
+    "sqlite": SQLiteOutputSink,
+}
+
+_sinks: Dict[tuple, OutputSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_output_sink(backend: str, directory: Union[str, Path], prefix: str, **kwargs) -> OutputSink:
+    """
+    Get the process-wide sink for an output location, creating it on first use.
+
+    Keyword arguments only apply when the sink is created.
+
+    Args:
+        backend: "files", "jsonl" or "sqlite"
+        directory: Output directory
+        prefix: Name prefix of the files written
+        **kwargs: Options of the backend's sink class
+
+    Returns:
+        Output sink for the location
+    """
+    if backend not in OUTPUT_SINK_BACKENDS:
+        raise ValueError(f"Unknown output sink backend: {backend}")
+    key = (backend, Path(directory).resolve(), prefix)
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None or sink._closed:
+            sink = _sinks[key] = OUTPUT_SINK_BACKENDS[backend](key[1], prefix, **kwargs)
+        return sink
+
+
+def close_all_output_sinks():
+    """Flush and close every sink created through get_output_sink."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_all_output_sinks)
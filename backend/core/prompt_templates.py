@@ -0,0 +1,254 @@
+"""
+Prompt Templates
+Compiled persona and section prompt templates, shared process-wide and
+reloaded when the files they were loaded from change on disk.
+
+Everything that only depends on the template files (persona preambles,
+persona instructions, section suffixes) is rendered once at load, so
+building a prompt is a handful of string concatenations.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from loguru import logger
+
+
+NO_CONTEXT_TEXT = "No specific context provided."
+
+
+@dataclass(frozen=True)
+class CompiledPersona:
+    """A persona with its fixed prompt parts pre-rendered."""
+    name: str
+    config: Dict[str, Any]
+    preamble: str
+    instructions: str
+
+    @classmethod
+    def compile(cls, name: str, config: Dict[str, Any]) -> "CompiledPersona":
+        """Pre-render a persona's preamble and instructions."""
+        writing_style = config.get('writing_style', {})
+        preamble = (
+            f"You are an expert proposal writer. {config.get('prompt_additions', '')}\n\n"
+            f"## User Requirements:\n"
+        )
+        instructions = (
+            f"\n\n## Instructions:\n"
+            f"- Write in {writing_style.get('tone', 'professional')} tone\n"
+            f"- Focus on {', '.join(writing_style.get('focus_areas', ['solutions']))}\n"
+            f"- Ensure content is relevant to the user requirements\n"
+            f"- Use the retrieved context to inform your response\n"
+            f"- Generate high-quality, structured content suitable for a professional proposal\n\n"
+        )
+        return cls(name=name, config=config, preamble=preamble, instructions=instructions)
+
+    def render_prefix(self, user_prompt: str, context_text: str) -> str:
+        """
+        Render the proposal-wide prompt prefix.
+
+        Args:
+            user_prompt: User's project description
+            context_text: Formatted retrieved context (may be empty)
+
+        Returns:
+            Prompt prefix shared by every section
+        """
+        return (
+            self.preamble + user_prompt
+            + "\n\n## Retrieved Context:\n" + (context_text or NO_CONTEXT_TEXT)
+            + self.instructions
+        )
+
+
+def render_section_suffix(section_type: str, section_prompt: str) -> str:
+    """Render the section-specific end of a prompt."""
+    return f"{section_prompt}\n\nPlease generate the {section_type.replace('_', ' ').title()} section now:"
+
+
+@dataclass
+class TemplateSet:
+    """One loaded version of the persona and section prompt templates."""
+    personas_data: Dict[str, Any]
+    section_prompts: Dict[str, str]
+    version: int = 0
+    personas: Dict[str, CompiledPersona] = field(init=False)
+    default_persona: CompiledPersona = field(init=False)
+    section_suffixes: Dict[str, str] = field(init=False)
+
+    def __post_init__(self):
+        persona_configs = self.personas_data.get("personas", {})
+        self.personas = {name: CompiledPersona.compile(name, config) for name, config in persona_configs.items()}
+
+        default_name = self.personas_data.get("default_persona", "consultant")
+        self.default_persona = self.personas.get(default_name) or CompiledPersona.compile(default_name, {})
+
+        self.section_suffixes = {
+            section_type: render_section_suffix(section_type, prompt)
+            for section_type, prompt in self.section_prompts.items()
+        }
+
+    def persona(self, name: str) -> CompiledPersona:
+        """Get a compiled persona, falling back to the default persona."""
+        return self.personas.get(name, self.default_persona)
+
+    def section_suffix(self, section_type: str) -> str:
+        """Get the pre-rendered suffix for a section (rendered on the fly for unknown sections)."""
+        suffix = self.section_suffixes.get(section_type)
+        if suffix is None:
+            suffix = render_section_suffix(section_type, "")
+        return suffix
+
+
+def load_personas(personas_path: Path) -> Dict[str, Any]:
+    """Load the personas configuration, falling back to an empty set."""
+    try:
+        with open(personas_path, 'r', encoding='utf-8') as f:
+            personas_data = json.load(f)
+
+        logger.info(f"Loaded {len(personas_data.get('personas', {}))} personas")
+        return personas_data
+
+    except FileNotFoundError:
+        logger.warning(f"Personas file not found: {personas_path}")
+        return {"personas": {}, "default_persona": "consultant"}
+
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid JSON in personas file: {e}")
+        return {"personas": {}, "default_persona": "consultant"}
+
+
+def load_section_prompts(section_prompts_dir: Path) -> Dict[str, str]:
+    """Load section prompt templates (one ``<section_type>.txt`` file each)."""
+    section_prompts = {}
+
+    if not section_prompts_dir.exists():
+        logger.warning(f"Section prompts directory not found: {section_prompts_dir}")
+        return section_prompts
+
+    for prompt_file in sorted(section_prompts_dir.glob("*.txt")):
+        try:
+            with open(prompt_file, 'r', encoding='utf-8') as f:
+                section_prompts[prompt_file.stem] = f.read()
+        except Exception as e:
+            logger.error(f"Error loading section prompt {prompt_file.stem}: {e}")
+
+    logger.info(f"Loaded {len(section_prompts)} section prompts")
+    return section_prompts
+
+
+class TemplateStore:
+    """
+    Template files compiled once and reloaded when they change.
+
+    Changes are detected from file modification times and sizes, checked
+    at most once per check interval so prompt building rarely touches the
+    filesystem.
+    """
+
+    def __init__(self, personas_path: Path, section_prompts_dir: Path, check_interval_s: float = 1.0):
+        """
+        Load and compile the templates.
+
+        Args:
+            personas_path: Personas configuration file
+            section_prompts_dir: Directory of section prompt templates
+            check_interval_s: Minimum time between checks for changed files
+        """
+        self.personas_path = Path(personas_path)
+        self.section_prompts_dir = Path(section_prompts_dir)
+        self.check_interval_s = check_interval_s
+        self.reloads = 0
+
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._templates = self._load(version=0)
+        self._checked_at = time.monotonic()
+
+    def _file_signature(self) -> Tuple:
+        """Modification times and sizes of every template file."""
+        entries = []
+        try:
+            stat = os.stat(self.personas_path)
+            entries.append((str(self.personas_path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            entries.append((str(self.personas_path), None, None))
+
+        try:
+            with os.scandir(self.section_prompts_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith(".txt") and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            pass
+        return tuple(sorted(entries, key=lambda e: e[0]))
+
+    def _load(self, version: int) -> TemplateSet:
+        """Read and compile the template files."""
+        return TemplateSet(
+            personas_data=load_personas(self.personas_path),
+            section_prompts=load_section_prompts(self.section_prompts_dir),
+            version=version
+        )
+
+    def current(self) -> TemplateSet:
+        """
+        Get the current templates, reloading them if the files changed.
+
+        Returns:
+            Compiled templates
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_s:
+            return self._templates
+
+        with self._lock:
+            if now - self._checked_at >= self.check_interval_s:
+                signature = self._file_signature()
+                if signature != self._signature:
+                    self._templates = self._load(version=self._templates.version + 1)
+                    self._signature = signature
+                    self.reloads += 1
+                    logger.info(f"Reloaded prompt templates (version {self._templates.version})")
+                self._checked_at = time.monotonic()
+            return self._templates
+
+
+# Process-wide template stores, keyed by resolved file locations
+_stores: Dict[Tuple[Path, Path], TemplateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_template_store(personas_path: Path, section_prompts_dir: Path, **kwargs) -> TemplateStore:
+    """
+    Get the process-wide template store for a set of template files.
+
+    Agents using the same files share one compiled copy and one reload
+    check. Keyword arguments only apply when the store is created.
+
+    Args:
+        personas_path: Personas configuration file
+        section_prompts_dir: Directory of section prompt templates
+        **kwargs: TemplateStore options
+
+    Returns:
+        Template store for the files
+    """
+    key = (Path(personas_path).resolve(), Path(section_prompts_dir).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = TemplateStore(personas_path, section_prompts_dir, **kwargs)
+        return store
+
+
+def clear_template_stores():
+    """Drop every shared template store (mainly for tests)."""
+    with _stores_lock:
+        _stores.clear()
@@ -0,0 +1,416 @@
+"""
+LLM Rate Limiter
+Client-side token buckets for provider quotas (requests and tokens per
+minute), so concurrent generations queue for capacity instead of failing.
+
+Requests are admitted first come, first served. Each request reserves its
+estimated prompt and completion tokens up front and settles the difference
+once the real usage is known. Limiters are shared per model within a
+process, and optionally across processes through a SQLite file.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+from core.metrics import registry as metrics_registry
+
+
+RATE_LIMIT_WAIT_SECONDS = metrics_registry.histogram(
+    "propulse_llm_rate_limit_wait_seconds",
+    "Time model requests spent queued for provider quota in seconds",
+    label_names=("limiter",)
+)
+
+
+class RateLimitTimeout(TimeoutError):
+    """A request was not admitted within its wait limit."""
+
+
+class Permit:
+    """Admission of one request, holding the tokens it reserved."""
+
+    def __init__(self, limiter: "RateLimiter", tokens: int, wait_s: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.wait_s = wait_s
+
+    def settle(self, actual_tokens: int):
+        """
+        Correct the reservation with the tokens the request really used.
+
+        Args:
+            actual_tokens: Prompt plus completion tokens reported by the model
+        """
+        delta = actual_tokens - self.tokens
+        if delta:
+            self.limiter.adjust(delta)
+        self.tokens = actual_tokens
+
+
+class PermitGroup:
+    """
+    Permits taken by the attempts of one logical request.
+
+    Retries and hedged duplicates of a request each take their own permit.
+    Every attempt that went on to send is billed by the provider, winner or
+    not. Once the request is settled the group is closed, and an attempt
+    still queued for quota at that point releases its permit instead of
+    sending.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses: Dict[Permit, Any] = {}
+        self.closed = False
+
+    def send(self, permit: Permit) -> bool:
+        """
+        Record that an attempt is about to send its request.
+
+        Args:
+            permit: Permit the attempt was admitted with
+
+        Returns:
+            False if the request was already settled, in which case the
+            permit's tokens are refunded and the attempt must not send
+        """
+        with self._lock:
+            if not self.closed:
+                self._responses[permit] = None
+                return True
+        permit.settle(0)
+        return False
+
+    def answered(self, permit: Permit, response: Any):
+        """Record the response an attempt received."""
+        with self._lock:
+            if permit in self._responses:
+                self._responses[permit] = response
+
+    def settle(self, response: Any, actual_tokens: int, sent_tokens: int) -> float:
+        """
+        Close the group and settle every attempt that sent.
+
+        Args:
+            response: Response the request was answered with (None if it failed)
+            actual_tokens: Prompt plus completion tokens of that response
+            sent_tokens: Tokens charged for each other attempt that sent,
+                at least its prompt
+
+        Returns:
+            Seconds the settled attempts spent waiting for quota
+        """
+        with self._lock:
+            if self.closed:
+                return 0.0
+            self.closed = True
+            responses = dict(self._responses)
+        for permit, answer in responses.items():
+            permit.settle(actual_tokens if response is not None and answer is response else sent_tokens)
+        return sum(permit.wait_s for permit in responses)
+
+
+class RateLimiter:
+    """
+    In-process requests-per-minute and tokens-per-minute limiter.
+
+    Both quotas are token buckets holding up to one minute of capacity and
+    refilling continuously. Waiting requests form a FIFO queue; only the
+    head of the queue may take capacity, so a large request is not starved
+    by a stream of small ones.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, name: str = "default",
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the limiter with full buckets.
+
+        Args:
+            requests_per_minute: Request quota (unlimited when None)
+            tokens_per_minute: Token quota (unlimited when None)
+            name: Label for metrics and logs
+            clock: Time source in seconds
+        """
+        if requests_per_minute is not None and requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        if tokens_per_minute is not None and tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute must be positive")
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.name = name
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._queue: Deque[object] = deque()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self.admitted = 0
+        self.timeouts = 0
+
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated_at = clock()
+
+    @staticmethod
+    def _refill(level: float, capacity: Optional[int], elapsed: float) -> float:
+        """Bucket level after refilling for ``elapsed`` seconds."""
+        if capacity is None:
+            return level
+        return min(float(capacity), level + elapsed * capacity / 60.0)
+
+    def _take(self, requests: float, tokens: float, tokens_needed: int) -> Tuple[float, float, float]:
+        """
+        Try to take one request and ``tokens_needed`` tokens from bucket levels.
+
+        Returns:
+            New request level, new token level, and the seconds to wait
+            (0 when the capacity was taken)
+        """
+        waits = [0.0]
+        if self.requests_per_minute is not None and requests < 1:
+            waits.append((1 - requests) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute is not None:
+            # Requests larger than the whole bucket wait for a full bucket
+            needed = min(tokens_needed, self.tokens_per_minute)
+            if tokens < needed:
+                waits.append((needed - tokens) * 60.0 / self.tokens_per_minute)
+
+        wait_s = max(waits)
+        if wait_s > 0:
+            return requests, tokens, wait_s
+
+        if self.requests_per_minute is not None:
+            requests -= 1
+        if self.tokens_per_minute is not None:
+            tokens -= tokens_needed
+        return requests, tokens, 0.0
+
+    def _try_take(self, tokens_needed: int) -> float:
+        """Take capacity for a request, or return the seconds until it is available."""
+        now = self.clock()
+        elapsed = max(0.0, now - self._updated_at)
+        self._updated_at = now
+        self._requests = self._refill(self._requests, self.requests_per_minute, elapsed)
+        self._tokens = self._refill(self._tokens, self.tokens_per_minute, elapsed)
+
+        self._requests, self._tokens, wait_s = self._take(self._requests, self._tokens, tokens_needed)
+        return wait_s
+
+    def _adjust_tokens(self, delta: int):
+        """Charge (positive) or refund (negative) tokens."""
+        if self.tokens_per_minute is not None:
+            self._tokens = min(float(self.tokens_per_minute), self._tokens - delta)
+
+    def adjust(self, delta: int):
+        """
+        Charge or refund tokens after a request's real usage is known.
+
+        Args:
+            delta: Tokens used beyond the reservation (negative to refund)
+        """
+        with self._cond:
+            self._adjust_tokens(delta)
+            self._cond.notify_all()
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> Permit:
+        """
+        Wait in line until a request with ``tokens`` estimated tokens fits.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens
+            timeout: Maximum seconds to wait (unbounded when None)
+
+        Returns:
+            Permit to settle with the real token usage
+
+        Raises:
+            RateLimitTimeout: If the request was not admitted in time
+        """
+        ticket = object()
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    wait_s = None
+                    if self._queue[0] is ticket:
+                        wait_s = self._try_take(tokens)
+                        if wait_s == 0:
+                            break
+
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise RateLimitTimeout(
+                                f"Not admitted by rate limiter '{self.name}' within {timeout:.1f}s"
+                            )
+                        wait_s = remaining if wait_s is None else min(wait_s, remaining)
+                    self._cond.wait(wait_s)
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self.admitted += 1
+            self._waits.append(waited)
+
+        RATE_LIMIT_WAIT_SECONDS.observe(waited, limiter=self.name)
+        if waited > 1.0:
+            logger.info(f"Rate limiter '{self.name}' admitted a request after {waited:.2f}s")
+        return Permit(self, tokens, waited)
+
+    async def acquire_async(self, tokens: int = 0, timeout: Optional[float] = None) -> Permit:
+        """Like ``acquire``, waiting on a worker thread instead of the event loop."""
+        return await asyncio.to_thread(self.acquire, tokens, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, admissions and recent queue wait times."""
+        with self._cond:
+            waits = np.fromiter(self._waits, dtype=float)
+            depth = len(self._queue)
+        return {
+            "name": self.name,
+            "queue_depth": depth,
+            "admitted": self.admitted,
+            "timeouts": self.timeouts,
+            "wait_ms_p50": float(np.quantile(waits, 0.5) * 1000) if len(waits) else 0.0,
+            "wait_ms_p95": float(np.quantile(waits, 0.95) * 1000) if len(waits) else 0.0,
+            "wait_ms_max": float(waits.max() * 1000) if len(waits) else 0.0
+        }
+
+    def close(self):
+        """Release resources held by the limiter."""
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Rate limiter whose buckets live in a SQLite file shared by processes.
+
+    Each process still queues its own requests first come, first served;
+    bucket updates are serialized across processes by SQLite's write lock.
+    """
+
+    def __init__(self, path: Union[str, Path], requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, name: str = "default",
+                 max_poll_s: float = 1.0):
+        """
+        Open (or create) the shared bucket file.
+
+        Args:
+            path: SQLite database file
+            requests_per_minute: Request quota (unlimited when None)
+            tokens_per_minute: Token quota (unlimited when None)
+            name: Bucket name; processes sharing a quota use the same name
+            max_poll_s: Longest wait before re-reading buckets that other
+                processes may have refunded
+        """
+        # Wall-clock time, comparable between processes
+        super().__init__(requests_per_minute, tokens_per_minute, name=name, clock=time.time)
+        self.path = Path(path)
+        self.max_poll_s = max_poll_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "name TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO rate_limits (name, requests, tokens, updated_at) VALUES (?, ?, ?, ?)",
+            (name, float(requests_per_minute or 0), float(tokens_per_minute or 0), time.time())
+        )
+
+    def _transaction(self, update: Callable[[float, float], Tuple[float, float, Any]]) -> Any:
+        """Read, refill and update the shared buckets atomically."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            requests, tokens, updated_at = self._conn.execute(
+                "SELECT requests, tokens, updated_at FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = self.clock()
+            elapsed = max(0.0, now - updated_at)
+            requests = self._refill(requests, self.requests_per_minute, elapsed)
+            tokens = self._refill(tokens, self.tokens_per_minute, elapsed)
+
+            requests, tokens, result = update(requests, tokens)
+            self._conn.execute(
+                "UPDATE rate_limits SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                (requests, tokens, now, self.name)
+            )
+            self._conn.execute("COMMIT")
+            return result
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _try_take(self, tokens_needed: int) -> float:
+        wait_s = self._transaction(lambda requests, tokens: self._take(requests, tokens, tokens_needed))
+        return min(wait_s, self.max_poll_s) if wait_s > 0 else 0.0
+
+    def _adjust_tokens(self, delta: int):
+        def update(requests, tokens):
+            if self.tokens_per_minute is not None:
+                tokens = min(float(self.tokens_per_minute), tokens - delta)
+            return requests, tokens, None
+
+        self._transaction(update)
+
+    def close(self):
+        """Close the database connection."""
+        with self._cond:
+            self._conn.close()
+
+
+# Process-wide limiters keyed by name and shared file
+_limiters: Dict[Tuple[str, Optional[str]], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, requests_per_minute: Optional[int] = None,
+                     tokens_per_minute: Optional[int] = None,
+                     path: Optional[Union[str, Path]] = None) -> RateLimiter:
+    """
+    Get the process-wide limiter for a quota, creating it on first use.
+
+    Quotas only apply when the limiter is created; later callers share it.
+
+    Args:
+        name: Quota name, typically the model name
+        requests_per_minute: Request quota
+        tokens_per_minute: Token quota
+        path: SQLite file to share the quota with other processes
+
+    Returns:
+        Shared rate limiter
+    """
+    key = (name, str(Path(path).resolve()) if path else None)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if path:
+                limiter = SQLiteRateLimiter(path, requests_per_minute, tokens_per_minute, name=name)
+            else:
+                limiter = RateLimiter(requests_per_minute, tokens_per_minute, name=name)
+            _limiters[key] = limiter
+        return limiter
+
+
+def clear_rate_limiters():
+    """Close and drop every shared limiter (mainly for tests)."""
+    with _limiters_lock:
+        for limiter in _limiters.values():
+            limiter.close()
+        _limiters.clear()
@@ -0,0 +1,157 @@
+"""
+LLM Response Cache
+SQLite-backed cache of generated text keyed by prompt, model and generation
+config, with least-recently-used eviction under a size bound.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+class ResponseCache:
+    """Persistent, size-bounded cache of model responses."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            text TEXT NOT NULL,
+            prompt_tokens INTEGER NOT NULL,
+            completion_tokens INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 256 * 1024 * 1024):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Total response text size kept before evicting the
+                least recently used entries
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, generation_config: Optional[Dict[str, Any]]) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            prompt: Fully constructed prompt
+            model_name: Model name
+            generation_config: Generation parameters sent to the model
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps(
+            {"prompt": prompt, "model": model_name, "config": generation_config or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Dict with text, prompt_tokens, completion_tokens and created_at,
+            or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, prompt_tokens, completion_tokens, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+
+        text, prompt_tokens, completion_tokens, created_at = row
+        return {
+            "text": text,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "created_at": created_at
+        }
+
+    def put(self, key: str, model_name: str, text: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """
+        Store a response, evicting old entries if the cache is over its size bound.
+
+        Args:
+            key: Cache key from make_key
+            model_name: Model that produced the response
+            text: Response text
+            prompt_tokens: Prompt tokens the original request used
+            completion_tokens: Completion tokens the original request used
+        """
+        now = time.time()
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, text, prompt_tokens, completion_tokens, size, now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the size bound holds (lock held)."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry count, stored bytes and hit/miss counts."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        """Delete every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,154 @@
+"""
+Semantic Response Cache
+In-memory cache that serves a stored response for a request whose text is
+a near duplicate of an earlier one, using sentence embeddings and small
+FAISS inner-product indexes.
+
+Entries are grouped into partitions; a lookup only considers entries from
+its own partition, so everything except the embedded text must match
+exactly for a hit.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from core.encoders import get_encoder
+
+
+class SemanticCache:
+    """Near-duplicate lookup of cached values by embedding similarity."""
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        model_name: str = "all-MiniLM-L6-v2",
+        encoder_backend: str = "torch",
+        max_entries: int = 2048,
+        encoder=None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            model_name: Sentence transformer model used for embeddings
+            encoder_backend: Encoder backend ("torch" or "onnx")
+            max_entries: Entries kept before the oldest are dropped
+            encoder: Encoder to use instead of the shared one for model_name
+        """
+        self.threshold = threshold
+        self.model_name = model_name
+        self.encoder_backend = encoder_backend
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._encoder = encoder
+        self._lock = threading.Lock()
+        # partition -> (index, embeddings, values)
+        self._partitions: Dict[Hashable, Tuple[faiss.Index, list, list]] = {}
+        self._order: deque = deque()
+
+    @property
+    def encoder(self):
+        """Text encoder, taken from the shared encoder registry on first use."""
+        if self._encoder is None:
+            self._encoder = get_encoder(self.model_name, backend=self.encoder_backend)
+        return self._encoder
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a text for lookup and insertion.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Normalized float32 embedding
+        """
+        embedding = self.encoder.encode([text], convert_to_numpy=True, normalize_embeddings=True)
+        return np.ascontiguousarray(embedding, dtype=np.float32).reshape(1, -1)
+
+    def lookup(self, partition: Hashable, embedding: np.ndarray) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Find the most similar cached entry in a partition.
+
+        Args:
+            partition: Partition key the entry must share
+            embedding: Query embedding from embed
+
+        Returns:
+            (value, similarity) where value is None below the threshold and
+            similarity is None when the partition is empty
+        """
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is None or entry[0].ntotal == 0:
+                self.misses += 1
+                return None, None
+
+            index, _, values = entry
+            scores, indices = index.search(embedding, 1)
+            similarity = float(scores[0][0])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, similarity
+
+            self.hits += 1
+            return values[int(indices[0][0])], similarity
+
+    def add(self, partition: Hashable, embedding: np.ndarray, value: Any):
+        """
+        Add an entry, dropping the oldest entries beyond max_entries.
+
+        Args:
+            partition: Partition key
+            embedding: Embedding from embed
+            value: Value returned on a hit
+        """
+        with self._lock:
+            entry = self._partitions.get(partition)
+            if entry is None:
+                entry = self._partitions[partition] = (faiss.IndexFlatIP(embedding.shape[1]), [], [])
+
+            index, embeddings, values = entry
+            index.add(embedding)
+            embeddings.append(embedding)
+            values.append(value)
+            self._order.append(partition)
+
+            while len(self._order) > self.max_entries:
+                self._drop_oldest(self._order.popleft())
+
+    def _drop_oldest(self, partition: Hashable):
+        """Remove the oldest entry of a partition and rebuild its index (lock held)."""
+        index, embeddings, values = self._partitions[partition]
+        del embeddings[0]
+        del values[0]
+        if not values:
+            del self._partitions[partition]
+            return
+
+        index.reset()
+        index.add(np.vstack(embeddings))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry, partition and hit/miss counts."""
+        with self._lock:
+            return {
+                "entries": len(self._order),
+                "partitions": len(self._partitions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "threshold": self.threshold
+            }
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._partitions.clear()
+            self._order.clear()
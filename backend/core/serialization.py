@@ -0,0 +1,59 @@
+"""
+JSON Serialization
+Fast JSON encoding backed by orjson when it is installed, with a standard
+library fallback producing the same document.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+
+# orjson is optional; it is several times faster for large result documents
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Convert NumPy values that the JSON encoders do not handle natively."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON.
+
+    Args:
+        obj: JSON-compatible object (NumPy scalars and arrays allowed)
+        indent: Pretty-print with two-space indentation
+
+    Returns:
+        Encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def dump(obj: Any, path: Union[str, Path], indent: bool = True):
+    """
+    Serialize an object to a JSON file.
+
+    Args:
+        obj: JSON-compatible object
+        path: Output file
+        indent: Pretty-print with two-space indentation
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
@@ -0,0 +1,176 @@
+"""
+Prompt Token Budgeting
+Estimates prompt sizes locally and fits ranked context into a token budget
+before a prompt is sent.
+
+The estimator approximates the model tokenizer by a characters-per-token
+ratio that is calibrated from the token counts the provider reports back;
+an exact counting function (e.g. the provider's count_tokens call) can be
+used where precision matters more than a round trip.
+"""
+
+import threading
+from typing import Callable, List, Optional, Sequence
+
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Calibrated ratios are kept within a plausible range for natural language
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 8.0
+
+
+class TokenEstimator:
+    """Calibrated character-ratio approximation of a model tokenizer."""
+
+    def __init__(
+        self,
+        chars_per_token: float = DEFAULT_CHARS_PER_TOKEN,
+        smoothing: float = 0.2,
+        count_fn: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Initialize the estimator.
+
+        Args:
+            chars_per_token: Initial characters-per-token ratio
+            smoothing: Weight of each observation in the calibrated ratio
+            count_fn: Exact token counter used by count()
+        """
+        self.chars_per_token = chars_per_token
+        self.smoothing = smoothing
+        self.count_fn = count_fn
+        self.observations = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the token count of a text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+        return max(1, int(len(text) / self.chars_per_token + 0.5))
+
+    def count(self, text: str) -> int:
+        """
+        Count tokens exactly when a counter is configured, otherwise estimate.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Token count
+        """
+        if self.count_fn is not None:
+            return self.count_fn(text)
+        return self.estimate(text)
+
+    def observe(self, text: str, actual_tokens: int):
+        """
+        Calibrate the ratio from a provider-reported token count.
+
+        Args:
+            text: Text that was sent
+            actual_tokens: Tokens the provider counted for it
+        """
+        if not text or actual_tokens <= 0:
+            return
+
+        observed = min(max(len(text) / actual_tokens, MIN_CHARS_PER_TOKEN), MAX_CHARS_PER_TOKEN)
+        with self._lock:
+            self.chars_per_token += self.smoothing * (observed - self.chars_per_token)
+            self.observations += 1
+
+    def truncate(self, text: str, max_tokens: int, marker: str = " …") -> str:
+        """
+        Cut a text to an estimated token count at a word boundary.
+
+        Args:
+            text: Text to cut
+            max_tokens: Token budget for the result
+            marker: Appended when the text was cut
+
+        Returns:
+            The text, shortened if it exceeds the budget
+        """
+        if self.estimate(text) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+
+        max_chars = int((max_tokens - self.estimate(marker)) * self.chars_per_token)
+        cut = text[:max(0, max_chars)]
+        if " " in cut:
+            cut = cut.rsplit(" ", 1)[0]
+        return cut + marker
+
+
+class TokenBudgeter:
+    """Select and trim ranked context items to fit a token budget."""
+
+    def __init__(self, estimator: TokenEstimator, min_item_tokens: int = 32):
+        """
+        Initialize the budgeter.
+
+        Args:
+            estimator: Token estimator
+            min_item_tokens: Smallest budget left worth filling with a
+                truncated item
+        """
+        self.estimator = estimator
+        self.min_item_tokens = min_item_tokens
+
+    def fit(
+        self,
+        items: Sequence[str],
+        budget: int,
+        scores: Optional[Sequence[float]] = None,
+        separator: str = "",
+        max_items: Optional[int] = None
+    ) -> List[str]:
+        """
+        Choose the items that fit a budget, best first.
+
+        Items are taken in descending score order (or as given without
+        scores). An item that no longer fits is truncated into the remaining
+        budget if at least min_item_tokens remain, and selection stops there.
+
+        Args:
+            items: Candidate texts
+            budget: Token budget for the selected items and separators
+            scores: Relevance score per item
+            separator: Text joining the selected items
+            max_items: Maximum number of items to select
+
+        Returns:
+            Selected (possibly truncated) items in rank order
+        """
+        order = range(len(items))
+        if scores is not None:
+            order = sorted(order, key=lambda i: scores[i], reverse=True)
+
+        separator_tokens = self.estimator.estimate(separator)
+        selected = []
+        remaining = budget
+        for i in order:
+            if max_items is not None and len(selected) >= max_items:
+                break
+
+            cost = self.estimator.estimate(items[i]) + (separator_tokens if selected else 0)
+            if cost <= remaining:
+                selected.append(items[i])
+                remaining -= cost
+                continue
+
+            room = remaining - (separator_tokens if selected else 0)
+            if room >= self.min_item_tokens:
+                selected.append(self.estimator.truncate(items[i], room))
+            break
+
+        return selected
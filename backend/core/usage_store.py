@@ -0,0 +1,472 @@
+"""
+Usage Metrics Store
+SQLite (WAL) store of per-section token usage and latency, written in
+batches from a background thread and queryable for percentiles and cost by
+persona, section or model over time windows. Imports the token usage CSV
+files written by earlier versions.
+"""
+
+import atexit
+import csv
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import astuple, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+
+# USD per million tokens (input, output)
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+
+GROUP_COLUMNS = ("persona", "section_type", "model")
+
+_STOP = object()
+
+
+@dataclass
+class UsageRecord:
+    """Token usage and latency of one generated section."""
+    generation_id: str
+    timestamp: float
+    model: str
+    persona: str
+    section_type: str
+    prompt_tokens: int
+    completion_tokens: int
+    generation_time_ms: float
+    time_to_first_token_ms: Optional[float] = None
+    cache_hit: bool = False
+    retries: int = 0
+    hedges: int = 0
+    rate_limit_wait_ms: float = 0.0
+
+
+COLUMNS = tuple(field.name for field in fields(UsageRecord))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    generation_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    model TEXT NOT NULL,
+    persona TEXT NOT NULL,
+    section_type TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    generation_time_ms REAL NOT NULL,
+    time_to_first_token_ms REAL,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    hedges INTEGER NOT NULL DEFAULT 0,
+    rate_limit_wait_ms REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS usage_timestamp ON usage (timestamp);
+CREATE INDEX IF NOT EXISTS usage_persona ON usage (persona, timestamp);
+CREATE INDEX IF NOT EXISTS usage_section ON usage (section_type, timestamp);
+CREATE TABLE IF NOT EXISTS csv_imports (
+    path TEXT PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    imported_at REAL NOT NULL
+);
+"""
+
+
+def _to_epoch(value: Union[None, float, str, datetime]) -> Optional[float]:
+    """Convert an ISO timestamp, datetime or epoch seconds to epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int,
+                  pricing: Optional[Dict[str, Tuple[float, float]]] = None) -> Optional[float]:
+    """
+    Estimate the cost of token usage in USD.
+
+    Args:
+        model: Model name
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+        pricing: Per-million-token (input, output) prices by model
+
+    Returns:
+        Cost, or None for models without a price
+    """
+    prices = (pricing or MODEL_PRICING).get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class UsageStore:
+    """
+    Buffered usage metrics store.
+
+    Callers enqueue records without touching the disk; a background thread
+    inserts them in batches, one transaction per batch.
+    """
+
+    def __init__(self, path: Union[str, Path], max_queue_size: int = 10000,
+                 batch_size: int = 256, flush_interval_s: float = 0.5):
+        """
+        Open (or create) the store and start its writer thread.
+
+        Args:
+            path: SQLite database file
+            max_queue_size: Maximum number of pending records before dropping
+            batch_size: Maximum number of records inserted per transaction
+            flush_interval_s: Maximum time a record waits before being written
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._db_lock = threading.Lock()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._written = 0
+        self._dropped = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"usage-store-{self.path.name}", daemon=True)
+        self._thread.start()
+
+    def record(self, record: UsageRecord) -> bool:
+        """
+        Enqueue a record for writing.
+
+        Args:
+            record: Usage record
+
+        Returns:
+            True if the record was queued, False if it was dropped
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self._dropped += 1
+            return False
+
+    def _insert(self, records: Sequence[UsageRecord]):
+        """Insert records in one transaction."""
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO usage ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [astuple(record) for record in records]
+            )
+        self._written += len(records)
+
+    def _run(self):
+        """Writer loop: gather a batch and insert it."""
+        stopping = False
+        while not stopping:
+            records = []
+            waiters = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                item = None
+
+            deadline = time.monotonic() + self.flush_interval_s
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                records.append(item)
+                if len(records) >= self.batch_size or time.monotonic() >= deadline:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            if records:
+                try:
+                    self._insert(records)
+                except Exception as e:
+                    logger.error(f"Error writing usage metrics to {self.path}: {e}")
+
+            for waiter in waiters:
+                waiter.set()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until every record queued so far has been written.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the flush completed within the timeout
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Write remaining records, stop the writer thread and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Records written and dropped, and queue depth."""
+        return {
+            "path": str(self.path),
+            "written": self._written,
+            "dropped": self._dropped,
+            "queue_depth": self._queue.qsize()
+        }
+
+    def records(self, since: Union[None, float, str, datetime] = None,
+                until: Union[None, float, str, datetime] = None, **filters) -> List[UsageRecord]:
+        """
+        Read records in a time window.
+
+        Args:
+            since: Start of the window (epoch seconds, ISO string or datetime)
+            until: End of the window
+            **filters: Exact matches on persona, section_type or model
+
+        Returns:
+            Matching records, oldest first
+        """
+        where, params = self._where(since, until, filters)
+        with self._db_lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM usage {where} ORDER BY timestamp", params
+            ).fetchall()
+        return [UsageRecord(*row) for row in rows]
+
+    @staticmethod
+    def _where(since, until, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """SQL filter for a time window and column filters."""
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_epoch(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_to_epoch(until))
+        for column, value in filters.items():
+            if column not in GROUP_COLUMNS:
+                raise ValueError(f"Cannot filter on {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def summary(self, group_by: Sequence[str] = ("persona",),
+                since: Union[None, float, str, datetime] = None,
+                until: Union[None, float, str, datetime] = None,
+                percentiles: Sequence[float] = (50, 95, 99),
+                pricing: Optional[Dict[str, Tuple[float, float]]] = None,
+                **filters) -> List[Dict[str, Any]]:
+        """
+        Aggregate usage, latency percentiles and cost per group.
+
+        Args:
+            group_by: Columns to group by (persona, section_type, model)
+            since: Start of the window (epoch seconds, ISO string or datetime)
+            until: End of the window
+            percentiles: Latency percentiles to report
+            pricing: Per-million-token (input, output) prices by model
+            **filters: Exact matches on persona, section_type or model
+
+        Returns:
+            One row per group, most expensive first
+        """
+        unknown = set(group_by) - set(GROUP_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot group by {sorted(unknown)}")
+
+        where, params = self._where(since, until, filters)
+        columns = ["model"] + [column for column in group_by if column != "model"]
+        with self._db_lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)}, prompt_tokens, completion_tokens, generation_time_ms, "
+                f"time_to_first_token_ms, cache_hit, retries, hedges FROM usage {where}",
+                params
+            ).fetchall()
+
+        groups: Dict[Tuple, List[Tuple]] = {}
+        for row in rows:
+            key = tuple(row[columns.index(column)] for column in group_by)
+            groups.setdefault(key, []).append(row)
+
+        offset = len(columns)
+        summaries = []
+        for key, group_rows in groups.items():
+            latencies = np.array([row[offset + 2] for row in group_rows], dtype=float)
+            first_token = np.array([row[offset + 3] for row in group_rows if row[offset + 3] is not None], dtype=float)
+            prompt_tokens = sum(row[offset] for row in group_rows)
+            completion_tokens = sum(row[offset + 1] for row in group_rows)
+
+            costs = [estimate_cost(row[0], row[offset], row[offset + 1], pricing) for row in group_rows]
+            summary = dict(zip(group_by, key))
+            summary.update({
+                "sections": len(group_rows),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cost_usd": sum(cost for cost in costs if cost is not None),
+                "unpriced_sections": sum(cost is None for cost in costs),
+                "cache_hit_rate": sum(row[offset + 4] for row in group_rows) / len(group_rows),
+                "retries": sum(row[offset + 5] for row in group_rows),
+                "hedges": sum(row[offset + 6] for row in group_rows),
+            })
+            for p in percentiles:
+                summary[f"latency_ms_p{p:g}"] = float(np.percentile(latencies, p))
+            if len(first_token):
+                summary["time_to_first_token_ms_p50"] = float(np.percentile(first_token, 50))
+            summaries.append(summary)
+
+        return sorted(summaries, key=lambda s: s["cost_usd"], reverse=True)
+
+    def import_csv(self, csv_path: Union[str, Path]) -> int:
+        """
+        Import a token usage CSV written by earlier versions.
+
+        Older files without latency or first-token columns are accepted.
+        Each file is imported once; later calls for the same path are no-ops.
+
+        Args:
+            csv_path: CSV file to import
+
+        Returns:
+            Number of rows imported
+        """
+        csv_path = Path(csv_path).resolve()
+        with self._db_lock:
+            if self._conn.execute("SELECT 1 FROM csv_imports WHERE path = ?", (str(csv_path),)).fetchone():
+                return 0
+
+        def number(row: Dict[str, str], column: str, cast=float, default=0):
+            value = row.get(column)
+            try:
+                return cast(float(value)) if value not in (None, "") else default
+            except ValueError:
+                return default
+
+        records = []
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    timestamp = datetime.fromisoformat(row["timestamp"]).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    continue
+                records.append(UsageRecord(
+                    generation_id=row.get("generation_id") or "",
+                    timestamp=timestamp,
+                    model=row.get("model") or "unknown",
+                    persona=row.get("persona") or "unknown",
+                    section_type=row.get("section_type") or "unknown",
+                    prompt_tokens=number(row, "prompt_tokens", int),
+                    completion_tokens=number(row, "completion_tokens", int),
+                    generation_time_ms=number(row, "generation_time_ms"),
+                    time_to_first_token_ms=number(row, "time_to_first_token_ms", default=None)
+                ))
+
+        with self._db_lock, self._conn:
+            placeholders = ", ".join("?" for _ in COLUMNS)
+            self._conn.executemany(
+                f"INSERT INTO usage ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [astuple(record) for record in records]
+            )
+            self._conn.execute(
+                "INSERT INTO csv_imports (path, rows, imported_at) VALUES (?, ?, ?)",
+                (str(csv_path), len(records), time.time())
+            )
+
+        logger.info(f"Imported {len(records)} usage rows from {csv_path}")
+        return len(records)
+
+    def import_legacy_logs(self, logs_dir: Union[str, Path], pattern: str = "token_usage*.csv") -> int:
+        """
+        Import every legacy token usage CSV in a directory, renaming each
+        imported file to ``*.imported`` so nothing appends to it unnoticed.
+
+        Args:
+            logs_dir: Directory the CSV files were written to
+            pattern: Glob pattern of the CSV files
+
+        Returns:
+            Number of rows imported
+        """
+        imported = 0
+        for csv_path in sorted(Path(logs_dir).glob(pattern)):
+            try:
+                imported += self.import_csv(csv_path)
+                csv_path.rename(csv_path.with_name(csv_path.name + ".imported"))
+            except Exception as e:
+                logger.error(f"Error importing usage CSV {csv_path}: {e}")
+        return imported
+
+
+_stores: Dict[Path, UsageStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_usage_store(path: Union[str, Path], **kwargs) -> UsageStore:
+    """
+    Get the process-wide store for a database file, creating it on first use.
+
+    Keyword arguments only apply when the store is created.
+
+    Args:
+        path: SQLite database file
+        **kwargs: UsageStore options
+
+    Returns:
+        Usage store for the file
+    """
+    key = Path(path).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store._closed:
+            store = _stores[key] = UsageStore(key, **kwargs)
+        return store
+
+
+def close_all_stores():
+    """Flush and close every store created through get_usage_store."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+atexit.register(close_all_stores)
@@ -3,8 +3,16 @@ Propulse Backend Service
 Main application entry point
 """
 
-from fastapi import FastAPI
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from core.metrics import PROMETHEUS_CONTENT_TYPE, registry
 
 app = FastAPI(
     title="Propulse API",
@@ -21,7 +29,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class GenerateRequest(BaseModel):
+    """Request body for proposal generation."""
+    user_prompt: str
+    persona: str = "consultant"
+    sections_to_generate: Optional[List[str]] = None
+    retrieval_context: Optional[Dict[str, Any]] = None
+    generation_params: Optional[Dict[str, Any]] = None
+
+
+_writer_agent = None
+_writer_agent_lock = threading.Lock()
+
+
+def get_writer_agent():
+    """Get the shared Writer Agent, creating it on first use."""
+    global _writer_agent
+    with _writer_agent_lock:
+        if _writer_agent is None:
+            # Imported lazily so the API starts without loading the Gemini SDK
+            from agents.writer_agent import WriterAgent
+            _writer_agent = WriterAgent()
+        return _writer_agent
+
+
+def format_sse(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Format generation events as Server-Sent Events."""
+    for event in events:
+        data = {key: value for key, value in event.items() if key != "event"}
+        yield f"event: {event['event']}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {"message": "Welcome to Propulse API"} 
\ No newline at end of file
+    return {"message": "Welcome to Propulse API"} 
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.post("/generate/stream")
+def generate_stream(request: GenerateRequest):
+    """Stream proposal sections as Server-Sent Events while they are generated"""
+    from agents.writer_agent import WriterInput
+
+    writer_input = WriterInput(**request.model_dump())
+    return StreamingResponse(
+        format_sse(get_writer_agent().generate_stream(writer_input)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
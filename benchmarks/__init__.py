@@ -0,0 +1,3 @@
+"""
+Propulse performance benchmarks.
+"""
@@ -0,0 +1,85 @@
+"""
+Benchmark Comparison
+Compares two results files written by run_benchmarks.py and reports the
+change in median time for every benchmark they share.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/base.json benchmarks/results/head.json
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.harness import load_results
+
+
+def compare_results(base: Dict[str, Any], head: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare median times of two results documents.
+
+    Args:
+        base: Baseline results
+        head: Results to compare against the baseline
+
+    Returns:
+        One row per shared benchmark with the relative change in median time
+    """
+    rows = []
+    for name in sorted(set(base["benchmarks"]) & set(head["benchmarks"])):
+        base_ms = base["benchmarks"][name]["median_ms"]
+        head_ms = head["benchmarks"][name]["median_ms"]
+        rows.append({
+            "benchmark": name,
+            "base_ms": base_ms,
+            "head_ms": head_ms,
+            "change": (head_ms - base_ms) / base_ms if base_ms > 0 else 0.0
+        })
+    return rows
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Compare two benchmark results files")
+
+    parser.add_argument("base", type=Path, help="Baseline results JSON")
+    parser.add_argument("head", type=Path, help="Results JSON to compare")
+
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown reported as a regression"
+    )
+
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 if any benchmark regressed"
+    )
+
+    args = parser.parse_args()
+
+    base, head = load_results(args.base), load_results(args.head)
+    if base.get("config") != head.get("config"):
+        print("Warning: benchmark configurations differ; results may not be comparable")
+
+    rows = compare_results(base, head)
+    print(f"{'benchmark':<28} {'base ms':>10} {'head ms':>10} {'change':>8}")
+    regressions = []
+    for row in rows:
+        marker = ""
+        if row["change"] > args.threshold:
+            marker = "  REGRESSION"
+            regressions.append(row["benchmark"])
+        print(f"{row['benchmark']:<28} {row['base_ms']:>10.2f} {row['head_ms']:>10.2f} {row['change']:>+8.1%}{marker}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Synthetic Corpus Generator
+Deterministically generates RFP-like documents in PDF, DOCX and TXT format
+for benchmarking extraction, chunking, indexing and retrieval.
+"""
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+FORMATS = ("pdf", "docx", "txt")
+
+AGENCIES = [
+    "Department of Transportation", "Department of Health", "State University System",
+    "City Water Authority", "Department of Revenue", "Regional Transit District",
+    "County Public Library", "Department of Veterans Affairs"
+]
+
+TOPICS = [
+    "web application", "cloud migration", "data analytics platform", "mobile application",
+    "cybersecurity assessment", "help desk support", "ERP integration", "document management system",
+    "GIS mapping portal", "case management system", "data warehouse modernization", "identity management"
+]
+
+SECTIONS = [
+    "Scope of Work", "Technical Requirements", "Project Management", "Security Requirements",
+    "Deliverables", "Period of Performance", "Evaluation Criteria", "Staffing and Key Personnel",
+    "Quality Assurance", "Transition Plan"
+]
+
+SUBJECTS = [
+    "The contractor", "The selected vendor", "The offeror", "The solution", "The project team",
+    "The service provider", "The proposed system"
+]
+
+VERBS = [
+    "shall provide", "must support", "will deliver", "shall maintain", "must integrate with",
+    "shall document", "will implement", "must demonstrate", "shall configure", "will migrate"
+]
+
+OBJECTS = [
+    "role-based access control", "single sign-on through SAML 2.0", "audit logging for all transactions",
+    "a responsive user interface", "nightly encrypted backups", "FedRAMP Moderate compliance",
+    "integration with the existing Oracle database", "REST APIs documented with OpenAPI",
+    "99.9 percent availability", "Section 508 accessibility", "a disaster recovery plan",
+    "monthly status reports", "a training program for end users", "automated regression testing",
+    "data retention policies", "multi-factor authentication", "real-time dashboards",
+    "load balancing across two regions", "a configurable workflow engine", "NAICS 541511 services"
+]
+
+QUALIFIERS = [
+    "within ninety days of contract award", "in accordance with agency standards",
+    "for all production environments", "at no additional cost to the agency",
+    "as described in Attachment B", "during the base period and all option years",
+    "subject to approval by the contracting officer", "across all supported browsers"
+]
+
+
+@dataclass
+class CorpusConfig:
+    """Size and shape of a synthetic corpus."""
+    num_documents: int = 12
+    sections_per_document: int = 6
+    paragraphs_per_section: int = 4
+    sentences_per_paragraph: int = 5
+    formats: Tuple[str, ...] = FORMATS
+    seed: int = 1234
+
+    def __post_init__(self):
+        unknown = set(self.formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unsupported corpus formats: {sorted(unknown)}")
+
+
+# Named corpus sizes used by the benchmark runner
+CORPUS_SIZES: Dict[str, CorpusConfig] = {
+    "small": CorpusConfig(num_documents=6, sections_per_document=4, paragraphs_per_section=3),
+    "medium": CorpusConfig(num_documents=24, sections_per_document=8, paragraphs_per_section=4),
+    "large": CorpusConfig(num_documents=96, sections_per_document=10, paragraphs_per_section=6),
+}
+
+
+@dataclass
+class SyntheticDocument:
+    """A generated document before it is written to disk."""
+    title: str
+    sections: List[Tuple[str, List[str]]] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Plain text rendering of the document."""
+        parts = [self.title]
+        for heading, paragraphs in self.sections:
+            parts.append(heading)
+            parts.extend(paragraphs)
+        return "\n\n".join(parts)
+
+
+def _sentence(rng: random.Random) -> str:
+    """Generate one requirement-style sentence."""
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)}."
+
+
+def generate_document(rng: random.Random, config: CorpusConfig, index: int) -> SyntheticDocument:
+    """
+    Generate one RFP-like document.
+
+    Args:
+        rng: Random generator driving the content
+        config: Corpus configuration
+        index: Document number, used in the title
+
+    Returns:
+        Generated document
+    """
+    title = f"RFP {2024000 + index}: {rng.choice(TOPICS).title()} for the {rng.choice(AGENCIES)}"
+    document = SyntheticDocument(title=title)
+
+    for heading in rng.sample(SECTIONS, min(config.sections_per_document, len(SECTIONS))):
+        paragraphs = [
+            " ".join(_sentence(rng) for _ in range(config.sentences_per_paragraph))
+            for _ in range(config.paragraphs_per_section)
+        ]
+        document.sections.append((heading, paragraphs))
+
+    return document
+
+
+def _pdf_escape(text: str) -> str:
+    """Escape a string for a PDF literal."""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text: str, width: int) -> List[str]:
+    """Greedy word wrap."""
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def write_pdf(document: SyntheticDocument, path: Path, lines_per_page: int = 60, width: int = 95):
+    """
+    Write a document as a minimal text-only PDF.
+
+    The file is assembled by hand so that generating a corpus needs no PDF
+    authoring library; pypdf reads it back like any other text PDF.
+
+    Args:
+        document: Document to write
+        path: Output file
+        lines_per_page: Text lines per page
+        width: Characters per line
+    """
+    lines = []
+    for block in document.text.split("\n\n"):
+        lines.extend(_wrap(block, width))
+        lines.append("")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_ids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        page_ids.append(page_id)
+        stream = "BT /F1 10 Tf 12 TL 50 770 Td\n" + "".join(
+            f"({_pdf_escape(line)}) Tj T*\n" for line in page_lines
+        ) + "ET"
+        data = stream.encode("latin-1", errors="replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(output)
+        output += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in sorted(objects):
+        output += b"%010d 00000 n \n" % offsets[obj_id]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    path.write_bytes(bytes(output))
+
+
+def write_docx(document: SyntheticDocument, path: Path):
+    """
+    Write a document as DOCX with headings and body paragraphs.
+
+    Args:
+        document: Document to write
+        path: Output file
+    """
+    import docx
+
+    doc = docx.Document()
+    doc.add_heading(document.title, level=0)
+    for heading, paragraphs in document.sections:
+        doc.add_heading(heading, level=1)
+        for paragraph in paragraphs:
+            doc.add_paragraph(paragraph)
+    doc.save(str(path))
+
+
+def write_txt(document: SyntheticDocument, path: Path):
+    """
+    Write a document as plain text.
+
+    Args:
+        document: Document to write
+        path: Output file
+    """
+    path.write_text(document.text, encoding="utf-8")
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+
+def generate_corpus(output_dir: Path, config: CorpusConfig) -> List[Path]:
+    """
+    Generate a corpus on disk.
+
+    The same configuration always produces the same text, so results are
+    comparable across commits and machines.
+
+    Args:
+        output_dir: Directory to write documents into
+        config: Corpus configuration
+
+    Returns:
+        Paths of the generated files
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(config.seed)
+
+    paths = []
+    for i in range(config.num_documents):
+        document = generate_document(rng, config, i)
+        fmt = config.formats[i % len(config.formats)]
+        path = output_dir / f"rfp_{i:04d}.{fmt}"
+        WRITERS[fmt](document, path)
+        paths.append(path)
+
+    return paths
+
+
+def generate_queries(count: int, seed: int = 4321) -> List[str]:
+    """
+    Generate retrieval queries in the vocabulary of the corpus.
+
+    Args:
+        count: Number of queries
+        seed: Random seed
+
+    Returns:
+        Query strings
+    """
+    rng = random.Random(seed)
+    return [f"{rng.choice(TOPICS)} with {rng.choice(OBJECTS)}" for _ in range(count)]
+
+
+PROPOSAL_SECTIONS = [
+    "executive_summary", "technical_approach", "project_management", "staffing_plan",
+    "quality_assurance", "security_approach", "transition_plan", "past_performance",
+    "risk_management", "pricing_narrative"
+]
+
+# Subheadings reused across sections, so assembled documents need id de-duplication
+PROPOSAL_SUBHEADINGS = ["Overview", "Approach", "Deliverables", "Risks and Mitigations", "Schedule"]
+
+
+def generate_proposal_sections(pages: int = 50, words_per_page: int = 500,
+                               seed: int = 2024) -> List[Tuple[str, str]]:
+    """
+    Generate generated-proposal-like Markdown sections.
+
+    Sections mix subheadings, paragraphs, bullet lists, tables and code
+    blocks, like the writer's model output.
+
+    Args:
+        pages: Approximate proposal length in pages
+        words_per_page: Words per page
+        seed: Random seed
+
+    Returns:
+        (section type, Markdown) pairs
+    """
+    rng = random.Random(seed)
+    words_per_section = pages * words_per_page // len(PROPOSAL_SECTIONS)
+    sections = []
+
+    for section_type in PROPOSAL_SECTIONS:
+        blocks = []
+        words = 0
+        while words < words_per_section:
+            blocks.append(f"## {rng.choice(PROPOSAL_SUBHEADINGS)}")
+            for _ in range(3):
+                paragraph = " ".join(_sentence(rng) for _ in range(5))
+                blocks.append(paragraph)
+                words += len(paragraph.split())
+            blocks.append("\n".join(f"- {_sentence(rng)}" for _ in range(4)))
+            blocks.append(
+                "| Milestone | Owner | Due |\n|-----------|-------|-----|\n"
+                + "\n".join(f"| {rng.choice(OBJECTS)} | {rng.choice(SUBJECTS)} | Week {rng.randint(1, 52)} |" for _ in range(4))
+            )
+            if rng.random() < 0.2:
+                blocks.append("```yaml\nenvironment: production\nreplicas: 3\n```")
+            words += 60
+        sections.append((section_type, "\n\n".join(blocks)))
+
+    return sections
@@ -0,0 +1,487 @@
+"""
+Benchmark Runner
+Generates a synthetic corpus and times text extraction, chunking, database
+builds, vector search, end-to-end retrieval, proposal generation and HTML
+assembly.
+
+Usage:
+    python benchmarks/run_benchmarks.py --size medium --output benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+from loguru import logger
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.append(str(REPO_ROOT))
+sys.path.append(str(REPO_ROOT / "backend"))
+sys.path.append(str(REPO_ROOT / "scripts"))
+
+from benchmarks.corpus import (
+    CORPUS_SIZES,
+    FORMATS,
+    generate_corpus,
+    generate_proposal_sections,
+    generate_queries
+)
+from benchmarks.harness import (
+    HashingEncoder,
+    StubGenerativeModel,
+    build_results,
+    measure,
+    save_results,
+    stub_genai
+)
+
+
+BENCHMARKS = (
+    "extract_text", "chunk_text", "build_database", "vector_search",
+    "retrieve", "retrieval_paths", "writer_generate", "section_overhead",
+    "html_assembly"
+)
+
+
+class BenchmarkSuite:
+    """Run the benchmarks against one generated corpus."""
+
+    def __init__(self, work_dir: Path, size: str, repeat: int, queries: int,
+                 top_k: int, encoder_backend: str, model_name: str,
+                 path_top_ks: Tuple[int, ...] = (10, 100, 1000), proposal_pages: int = 50):
+        """
+        Initialize the suite and generate its corpus.
+
+        Args:
+            work_dir: Scratch directory for the corpus, databases and logs
+            size: Named corpus size
+            repeat: Timed runs per benchmark
+            queries: Queries per search benchmark run
+            top_k: Results requested per query
+            encoder_backend: "hashing" for the offline stand-in, or a real encoder backend
+            model_name: Sentence transformer model for real encoder backends
+            path_top_ks: top_k values compared by the retrieval_paths benchmark
+            proposal_pages: Proposal length for the html_assembly benchmark
+        """
+        self.work_dir = Path(work_dir)
+        self.repeat = repeat
+        self.top_k = top_k
+        self.encoder_backend = encoder_backend
+        self.model_name = model_name
+        self.path_top_ks = path_top_ks
+        self.proposal_pages = proposal_pages
+
+        self.corpus_dir = self.work_dir / "corpus"
+        self.paths = generate_corpus(self.corpus_dir, CORPUS_SIZES[size])
+        self.queries = generate_queries(queries)
+
+        from core.extract_text import TextExtractor
+        self.extractor = TextExtractor()
+        self.texts = [self.extractor.extract_text(path) for path in self.paths]
+
+        self._encoder = None
+        self._db_path = None
+
+    @property
+    def encoder(self):
+        """Encoder shared by the database builder and the retriever."""
+        if self._encoder is None:
+            if self.encoder_backend == "hashing":
+                self._encoder = HashingEncoder()
+            else:
+                from core.encoders import get_encoder
+                self._encoder = get_encoder(self.model_name, backend=self.encoder_backend)
+        return self._encoder
+
+    def _builder(self):
+        """Database builder using the suite's encoder."""
+        from build_vector_db import VectorDBBuilder
+
+        dimension = self.encoder.get_sentence_embedding_dimension()
+        builder = VectorDBBuilder(model_name=self.model_name, dimension=dimension)
+        builder._encoder = self.encoder
+        return builder
+
+    @property
+    def db_path(self) -> Path:
+        """Database built once from the corpus for the search benchmarks."""
+        if self._db_path is None:
+            self._db_path = self.work_dir / "vector_db"
+            self._builder().build_database(self.corpus_dir, self._db_path, doc_type="rfp")
+        return self._db_path
+
+    def bench_extract_text(self) -> Dict[str, Any]:
+        """Time TextExtractor.extract_text per document format."""
+        results = {}
+        for fmt in FORMATS:
+            paths = [path for path in self.paths if path.suffix == f".{fmt}"]
+            if paths:
+                results[f"extract_text.{fmt}"] = measure(
+                    lambda: [self.extractor.extract_text(path) for path in paths],
+                    repeat=self.repeat,
+                    items=len(paths)
+                )
+        return results
+
+    def bench_chunk_text(self) -> Dict[str, Any]:
+        """Time TextExtractor.chunk_text over every extracted document."""
+        return {"chunk_text": measure(
+            lambda: [self.extractor.chunk_text(text, f"doc_{i}") for i, text in enumerate(self.texts)],
+            repeat=self.repeat,
+            items=len(self.texts)
+        )}
+
+    def bench_build_database(self) -> Dict[str, Any]:
+        """Time VectorDBBuilder.build_database end to end, encoding included."""
+        builder = self._builder()
+        output = self.work_dir / "build_db"
+        return {"build_database": measure(
+            lambda: builder.build_database(self.corpus_dir, output, doc_type="rfp"),
+            repeat=self.repeat,
+            warmup=0,
+            items=len(self.paths)
+        )}
+
+    def bench_vector_search(self) -> Dict[str, Any]:
+        """Time VectorDatabase.search with precomputed query embeddings."""
+        from agents.retriever_agent import VectorDatabase
+
+        db = VectorDatabase(self.db_path)
+        embeddings = self.encoder.encode(self.queries, convert_to_numpy=True, normalize_embeddings=True)
+        return {f"vector_search.top_k_{self.top_k}": measure(
+            lambda: [db.search(embedding, top_k=self.top_k, similarity_threshold=0.0) for embedding in embeddings],
+            repeat=self.repeat,
+            items=len(self.queries)
+        )}
+
+    def bench_retrieve(self) -> Dict[str, Any]:
+        """Time RetrieverAgent.retrieve for text queries, encoding included."""
+        from agents.retriever_agent import QueryInput, RetrieverAgent
+
+        agent = RetrieverAgent(
+            str(self.db_path),
+            str(self.db_path),
+            model_name=self.model_name,
+            log_file=str(self.work_dir / "logs" / "retriever_log.jsonl")
+        )
+        agent._encoder = self.encoder
+        queries = [QueryInput(text=text, top_k=self.top_k, similarity_threshold=0.0) for text in self.queries]
+
+        results = {"retrieve": measure(
+            lambda: [agent.retrieve(query) for query in queries],
+            repeat=self.repeat,
+            items=len(queries)
+        )}
+        agent.flush_logs()
+        return results
+
+    def bench_retrieval_paths(self) -> Dict[str, Any]:
+        """
+        Compare the default and fast retrieval paths, and pretty-printed json
+        against the lean serializer, at several top_k values.
+        """
+        from agents.retriever_agent import QueryInput, RetrieverAgent
+        from core import serialization
+
+        agents = {}
+        for path_name, fast_path in (("default", False), ("fast", True)):
+            agent = RetrieverAgent(
+                str(self.db_path),
+                str(self.db_path),
+                model_name=self.model_name,
+                log_file=str(self.work_dir / "logs" / f"retriever_{path_name}.jsonl"),
+                fast_path=fast_path
+            )
+            agent._encoder = self.encoder
+            agents[path_name] = agent
+
+        results = {}
+        for top_k in self.path_top_ks:
+            queries = [QueryInput(text=text, top_k=top_k, similarity_threshold=0.0) for text in self.queries]
+            for path_name, agent in agents.items():
+                results[f"retrieve.{path_name}.top_k_{top_k}"] = measure(
+                    lambda: [agent.retrieve(query) for query in queries],
+                    repeat=self.repeat,
+                    items=len(queries)
+                )
+
+            documents = [agents["fast"].result_document(agents["fast"].retrieve(query)) for query in queries]
+            results[f"serialize.json.top_k_{top_k}"] = measure(
+                lambda: [json.dumps(document, indent=2, ensure_ascii=False) for document in documents],
+                repeat=self.repeat,
+                items=len(documents)
+            )
+            results[f"serialize.lean.top_k_{top_k}"] = measure(
+                lambda: [serialization.dumps(document, indent=True) for document in documents],
+                repeat=self.repeat,
+                items=len(documents)
+            )
+
+        for agent in agents.values():
+            agent.flush_logs()
+        return results
+
+    def bench_writer_generate(self) -> Dict[str, Any]:
+        """Time WriterAgent.generate against a stub model (prompting and rendering only)."""
+        from agents import writer_agent
+        from agents.writer_agent import WriterAgent, WriterInput
+
+        model = StubGenerativeModel()
+        with patch.object(writer_agent, "genai", stub_genai(model)), \
+                patch.dict("os.environ", {"GOOGLE_API_KEY": "benchmark"}):
+            agent = WriterAgent(
+                personas_path=str(REPO_ROOT / "shared" / "personas.json"),
+                section_prompts_dir=str(REPO_ROOT / "shared" / "templates" / "section_prompts"),
+                logs_dir=str(self.work_dir / "logs")
+            )
+            agent.logger.setLevel(logging.WARNING)
+            writer_input = WriterInput(
+                user_prompt=self.queries[0],
+                retrieval_context={"matches": [{"content": text[:1000]} for text in self.texts[:5]]}
+            )
+
+            results = {"writer_generate": measure(
+                lambda: agent.generate(writer_input),
+                repeat=self.repeat,
+                items=len(writer_input.sections_to_generate)
+            )}
+            agent.flush_logs()
+        return results
+
+    def bench_section_overhead(self) -> Dict[str, Any]:
+        """
+        Time per-section model client setup with the real Gemini SDK (no
+        network calls): a new GenerativeModel per section against the pool.
+        """
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            logger.warning("google-generativeai not installed, skipping section_overhead")
+            return {}
+
+        from agents.writer_agent import WriterAgent, WriterInput
+        from core.model_pool import model_pool
+
+        with patch.dict("os.environ", {"GOOGLE_API_KEY": "benchmark"}):
+            agent = WriterAgent(
+                personas_path=str(REPO_ROOT / "shared" / "personas.json"),
+                section_prompts_dir=str(REPO_ROOT / "shared" / "templates" / "section_prompts"),
+                logs_dir=str(self.work_dir / "logs")
+            )
+        agent.logger.setLevel(logging.WARNING)
+        params = WriterInput(user_prompt="benchmark").generation_params
+        config = {
+            "temperature": params["temperature"],
+            "top_p": params["top_p"],
+            "max_output_tokens": params["max_tokens"],
+        }
+        sections = 100
+
+        safety_settings = agent._safety_settings()
+
+        def per_section_construction():
+            for _ in range(sections):
+                genai.GenerativeModel(
+                    model_name=agent.model_name,
+                    generation_config=config,
+                    safety_settings=safety_settings
+                ).generate_content
+
+        def pooled():
+            for _ in range(sections):
+                agent._section_model(params).generate_content
+
+        results = {
+            "section_overhead.new_client": measure(per_section_construction, repeat=self.repeat, items=sections),
+            "section_overhead.pooled": measure(pooled, repeat=self.repeat, items=sections)
+        }
+        model_pool.clear()
+        return results
+
+    def bench_html_assembly(self) -> Dict[str, Any]:
+        """
+        Compare rendering a proposal's HTML in two passes (a new parser per
+        section, then the joined document again) against pooled section
+        converters and stitching the section HTML.
+        """
+        import markdown
+        from core.markdown_render import markdown_renderer, stitch_sections
+
+        sections = [
+            (section_type.replace("_", " ").title(), text)
+            for section_type, text in generate_proposal_sections(pages=self.proposal_pages)
+        ]
+        extensions = ["tables", "fenced_code", "toc"]
+
+        def two_pass():
+            for _, text in sections:
+                markdown.markdown(text, extensions=extensions)
+            full_markdown = "\n\n".join(f"# {title}\n\n{text}" for title, text in sections)
+            markdown.markdown(full_markdown, extensions=extensions)
+
+        def stitched():
+            stitch_sections([(title, markdown_renderer.convert(text)) for title, text in sections])
+
+        section_html = [(title, markdown_renderer.convert(text)) for title, text in sections]
+        name = f"html_assembly.pages_{self.proposal_pages}"
+        return {
+            f"{name}.two_pass": measure(two_pass, repeat=self.repeat, items=len(sections)),
+            f"{name}.stitched": measure(stitched, repeat=self.repeat, items=len(sections)),
+            f"{name}.stitch_only": measure(lambda: stitch_sections(section_html), repeat=self.repeat, items=len(sections))
+        }
+
+    def run(self, names: List[str]) -> Dict[str, Any]:
+        """
+        Run the selected benchmarks.
+
+        Args:
+            names: Benchmark names from BENCHMARKS
+
+        Returns:
+            Timing summary per benchmark
+        """
+        results = {}
+        for name in names:
+            bench: Callable[[], Dict[str, Any]] = getattr(self, f"bench_{name}")
+            logger.info(f"Running {name}...")
+            results.update(bench())
+        return results
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Run Propulse performance benchmarks")
+
+    parser.add_argument(
+        "--size",
+        choices=sorted(CORPUS_SIZES),
+        default="small",
+        help="Synthetic corpus size"
+    )
+
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=list(BENCHMARKS),
+        help="Benchmarks to run"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timed runs per benchmark"
+    )
+
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=50,
+        help="Queries per search benchmark run"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=10,
+        help="Results requested per query"
+    )
+
+    parser.add_argument(
+        "--path-top-ks",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="top_k values for the retrieval_paths benchmark (large corpora reach 1000 hits)"
+    )
+
+    parser.add_argument(
+        "--proposal-pages",
+        type=int,
+        default=50,
+        help="Proposal length in pages for the html_assembly benchmark"
+    )
+
+    parser.add_argument(
+        "--encoder-backend",
+        choices=["hashing", "torch", "onnx"],
+        default="hashing",
+        help="Embedding backend; 'hashing' is an offline stand-in with no model download"
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="all-MiniLM-L6-v2",
+        help="Sentence transformer model for the torch and onnx backends"
+    )
+
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=None,
+        help="Scratch directory to keep (defaults to a temporary directory)"
+    )
+
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write results as JSON to this file (defaults to benchmarks/results/<commit>.json)"
+    )
+
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="propulse_bench_"))
+    try:
+        suite = BenchmarkSuite(
+            work_dir,
+            size=args.size,
+            repeat=args.repeat,
+            queries=args.queries,
+            top_k=args.top_k,
+            encoder_backend=args.encoder_backend,
+            model_name=args.model,
+            path_top_ks=tuple(args.path_top_ks),
+            proposal_pages=args.proposal_pages
+        )
+        benchmarks = suite.run(args.only)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = build_results(benchmarks, {
+        "size": args.size,
+        "documents": len(suite.paths),
+        "repeat": args.repeat,
+        "queries": args.queries,
+        "top_k": args.top_k,
+        "path_top_ks": args.path_top_ks,
+        "proposal_pages": args.proposal_pages,
+        "encoder_backend": args.encoder_backend,
+        "model": args.model if args.encoder_backend != "hashing" else None
+    })
+
+    print(f"{'benchmark':<32} {'median ms':>10} {'p95 ms':>10} {'items/s':>10}")
+    for name, entry in benchmarks.items():
+        rate = entry.get("items_per_sec")
+        rate_text = f"{rate:>10.1f}" if rate else f"{'-':>10}"
+        print(f"{name:<32} {entry['median_ms']:>10.2f} {entry['p95_ms']:>10.2f} {rate_text}")
+
+    output = args.output or REPO_ROOT / "benchmarks" / "results" / f"{results['git_commit'] or 'local'}.json"
+    save_results(results, output)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+Batch Proposal Generation
+Generates draft proposals for every row of a JSONL or CSV manifest of
+Writer Agent inputs, optionally retrieving context for each first. Jobs run
+with bounded concurrency and every completed section is checkpointed, so a
+crash or quota error resumes without regenerating finished work.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+from agents.writer_agent import WriterAgent, WriterInput
+from core.checkpoint_store import CheckpointStore
+from core.output_sink import OUTPUT_SINK_BACKENDS
+from core.usage_store import estimate_cost
+
+
+# Manifest columns holding JSON in CSV files
+JSON_COLUMNS = ("generation_params", "retrieval_context")
+
+
+@dataclass
+class BatchJob:
+    """One manifest row."""
+    job_id: str
+    writer_input: WriterInput
+    retrieval_query: Optional[str] = None
+    line: int = 0
+
+    @property
+    def input_hash(self) -> str:
+        """Hash of everything the job's output depends on."""
+        document = {
+            "user_prompt": self.writer_input.user_prompt,
+            "persona": self.writer_input.persona,
+            "sections": self.writer_input.sections_to_generate,
+            "generation_params": self.writer_input.generation_params,
+            "retrieval_context": self.writer_input.retrieval_context,
+            "retrieval_query": self.retrieval_query
+        }
+        return hashlib.sha256(json.dumps(document, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class BatchSummary:
+    """Outcome, throughput and cost of a batch run."""
+    jobs: int = 0
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    not_run: int = 0
+    sections_generated: int = 0
+    sections_resumed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    elapsed_s: float = 0.0
+    failures: List[Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def jobs_per_minute(self) -> float:
+        return self.completed * 60.0 / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def sections_per_minute(self) -> float:
+        return self.sections_generated * 60.0 / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        tokens = self.prompt_tokens + self.completion_tokens
+        return tokens / self.elapsed_s if self.elapsed_s else 0.0
+
+    def format(self) -> str:
+        """Human-readable summary."""
+        lines = [
+            f"Jobs:       {self.jobs} ({self.completed} completed, {self.failed} failed, "
+            f"{self.skipped} already done, {self.not_run} not run)",
+            f"Sections:   {self.sections_generated} generated, {self.sections_resumed} resumed from checkpoints",
+            f"Tokens:     {self.prompt_tokens} prompt, {self.completion_tokens} completion",
+            f"Cost:       ${self.cost_usd:.4f}",
+            f"Elapsed:    {self.elapsed_s:.1f}s",
+            f"Throughput: {self.jobs_per_minute:.1f} jobs/min, {self.sections_per_minute:.1f} sections/min, "
+            f"{self.tokens_per_second:.0f} tokens/s"
+        ]
+        for failure in self.failures:
+            lines.append(f"Failed {failure['job_id']}: {failure['error']}")
+        return "\n".join(lines)
+
+
+def _parse_sections(value: Any) -> Optional[List[str]]:
+    """Section list from a JSON list or a comma, semicolon or pipe separated string."""
+    if value is None or isinstance(value, list):
+        return value
+    sections = [section.strip() for section in re.split(r"[,;|]", str(value)) if section.strip()]
+    return sections or None
+
+
+def _job_from_row(row: Dict[str, Any], line: int) -> BatchJob:
+    """Build a job from a manifest row."""
+    if not row.get("user_prompt"):
+        raise ValueError(f"Manifest line {line}: user_prompt is required")
+
+    writer_input = WriterInput(
+        user_prompt=row["user_prompt"],
+        persona=row.get("persona") or "consultant",
+        retrieval_context=row.get("retrieval_context") or None,
+        sections_to_generate=_parse_sections(row.get("sections_to_generate")),
+        generation_params=row.get("generation_params") or None
+    )
+    job = BatchJob(
+        job_id="",
+        writer_input=writer_input,
+        retrieval_query=row.get("retrieval_query") or None,
+        line=line
+    )
+    job.job_id = str(row.get("id") or "") or job.input_hash[:16]
+    return job
+
+
+def load_manifest(path: Path) -> List[BatchJob]:
+    """
+    Read a manifest of Writer Agent inputs.
+
+    JSONL files hold one object per line; CSV files one row per input, with
+    sections separated by commas, semicolons or pipes and JSON in the
+    ``generation_params`` and ``retrieval_context`` columns. Rows may set an
+    ``id`` (otherwise derived from the input) and a ``retrieval_query``.
+
+    Args:
+        path: Manifest file (.jsonl or .csv)
+
+    Returns:
+        Jobs in manifest order
+
+    Raises:
+        ValueError: If a row is invalid or two rows share an id
+    """
+    path = Path(path)
+    rows = []
+    if path.suffix.lower() == ".csv":
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                for column in JSON_COLUMNS:
+                    if row.get(column):
+                        try:
+                            row[column] = json.loads(row[column])
+                        except json.JSONDecodeError as e:
+                            raise ValueError(f"Manifest line {line}: invalid JSON in {column}: {e}")
+                rows.append((line, row))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    rows.append((line, json.loads(text)))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Manifest line {line}: invalid JSON: {e}")
+
+    jobs = [_job_from_row(row, line) for line, row in rows]
+    seen = {}
+    for job in jobs:
+        if job.job_id in seen:
+            raise ValueError(f"Manifest lines {seen[job.job_id]} and {job.line} share the id {job.job_id}")
+        seen[job.job_id] = job.line
+    return jobs
+
+
+def retrieval_context_from_result(result) -> Optional[Dict[str, Any]]:
+    """
+    Convert a Retriever Agent result to the context the Writer Agent expects.
+
+    Args:
+        result: RetrievalResult
+
+    Returns:
+        ``{"id", "matches"}`` with matches ordered by score, or None when
+        nothing was found
+    """
+    matches = result.results.get("rfp_matches", []) + result.results.get("proposal_matches", [])
+    if not matches:
+        return None
+    matches = sorted(matches, key=lambda match: match["similarity_score"], reverse=True)
+    return {
+        "id": result.retrieval_id,
+        "matches": [
+            {
+                "text": match["content"],
+                "score": match["similarity_score"],
+                "metadata": {**match.get("chunk_metadata", {}), "source": match["source_file"]}
+            }
+            for match in matches
+        ]
+    }
+
+
+class BatchRunner:
+    """Run manifest jobs through a Writer Agent with checkpointing."""
+
+    def __init__(self, writer: WriterAgent, checkpoints: CheckpointStore,
+                 retriever=None, max_concurrent_jobs: int = 4, retrieval_top_k: int = 5,
+                 max_failures: Optional[int] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            writer: Writer Agent generating the proposals
+            checkpoints: Store of job status and completed sections
+            retriever: Retriever Agent providing context for jobs without
+                one (no retrieval when None)
+            max_concurrent_jobs: Proposals generated at once
+            retrieval_top_k: Matches retrieved per job
+            max_failures: Stop starting new jobs after this many failures,
+                e.g. once the provider quota is exhausted (never when None)
+        """
+        if max_concurrent_jobs < 1:
+            raise ValueError("max_concurrent_jobs must be at least 1")
+
+        self.writer = writer
+        self.checkpoints = checkpoints
+        self.retriever = retriever
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.retrieval_top_k = retrieval_top_k
+        self.max_failures = max_failures
+
+        self._lock = threading.Lock()
+        self._summary = BatchSummary()
+
+    def _retrieve(self, job: BatchJob) -> Optional[Dict[str, Any]]:
+        """Retrieve context for a job."""
+        from agents.retriever_agent import QueryInput
+
+        result = self.retriever.retrieve(QueryInput(
+            text=job.retrieval_query or job.writer_input.user_prompt,
+            top_k=self.retrieval_top_k
+        ))
+        if result.metadata.get("error"):
+            raise RuntimeError(f"Retrieval failed: {result.metadata['error']}")
+        return retrieval_context_from_result(result)
+
+    def _record_section(self, job: BatchJob, section_data: Dict[str, Any]):
+        """Checkpoint a newly generated section and count its usage."""
+        self.checkpoints.save_section(job.job_id, section_data)
+
+        metadata = section_data.get("generation_metadata", {})
+        if metadata.get("cache_hit"):
+            return
+        prompt_tokens = metadata.get("prompt_tokens", 0)
+        completion_tokens = metadata.get("completion_tokens", 0)
+        with self._lock:
+            self._summary.sections_generated += 1
+            self._summary.prompt_tokens += prompt_tokens
+            self._summary.completion_tokens += completion_tokens
+            self._summary.cost_usd += estimate_cost(self.writer.model_name, prompt_tokens, completion_tokens) or 0.0
+
+    def run_job(self, job: BatchJob) -> str:
+        """
+        Generate, save and checkpoint one job.
+
+        Args:
+            job: Manifest job
+
+        Returns:
+            Final job status: "completed", "failed", "skipped" (already
+            completed by an earlier run) or "not_run" (failure limit reached)
+        """
+        with self._lock:
+            if self.max_failures is not None and self._summary.failed >= self.max_failures:
+                self._summary.not_run += 1
+                return "not_run"
+
+        previous = self.checkpoints.job(job.job_id)
+        if previous and previous["status"] == "completed" and previous["input_hash"] == job.input_hash:
+            with self._lock:
+                self._summary.skipped += 1
+            return "skipped"
+
+        state = self.checkpoints.start_job(job.job_id, job.input_hash)
+
+        try:
+            writer_input = job.writer_input
+            if writer_input.retrieval_context is None and self.retriever is not None:
+                context = state["retrieval_context"]
+                if context is None:
+                    context = self._retrieve(job)
+                    self.checkpoints.save_retrieval_context(job.job_id, context)
+                writer_input = replace(writer_input, retrieval_context=context)
+
+            completed = self.checkpoints.completed_sections(job.job_id)
+            output = self.writer.generate(
+                writer_input,
+                completed_sections=completed,
+                on_section=lambda section_data: self._record_section(job, section_data)
+            )
+            failed_sections = output.generation_metadata["resilience"]["failed_sections"]
+            if failed_sections:
+                raise RuntimeError("Sections failed: " + ", ".join(
+                    f"{failure['section_type']} ({failure['error']})" for failure in failed_sections
+                ))
+
+            # The job only counts as completed once its result is on disk
+            output_path = self.writer.save_result(output)
+            if not self.writer.flush_outputs(timeout=60.0):
+                raise RuntimeError("Timed out saving the result")
+            self.checkpoints.finish_job(job.job_id, "completed", output_path=output_path)
+            with self._lock:
+                self._summary.completed += 1
+                self._summary.sections_resumed += len(output.generation_metadata["resumed_sections"])
+            logger.info(f"Job {job.job_id} completed: {output_path}")
+            return "completed"
+
+        except Exception as e:
+            self.checkpoints.finish_job(job.job_id, "failed", error=str(e))
+            with self._lock:
+                self._summary.failed += 1
+                self._summary.failures.append({"job_id": job.job_id, "error": str(e)})
+            logger.error(f"Job {job.job_id} failed: {e}")
+            return "failed"
+
+    def run(self, jobs: List[BatchJob]) -> BatchSummary:
+        """
+        Run jobs with at most ``max_concurrent_jobs`` in flight.
+
+        Args:
+            jobs: Manifest jobs
+
+        Returns:
+            Summary of this run
+        """
+        self._summary = BatchSummary(jobs=len(jobs))
+        start_time = time.perf_counter()
+
+        if self.max_concurrent_jobs == 1:
+            for job in jobs:
+                self.run_job(job)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix="batch-job") as pool:
+                list(pool.map(self.run_job, jobs))
+
+        self._summary.elapsed_s = time.perf_counter() - start_time
+        return self._summary
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Generate proposals for every input in a manifest")
+
+    parser.add_argument(
+        "manifest",
+        type=Path,
+        help="JSONL or CSV file of Writer Agent inputs"
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="Checkpoint database (defaults to <manifest>.checkpoint.sqlite next to the manifest)"
+    )
+
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="data/generated",
+        help="Directory generated proposals are saved to"
+    )
+
+    parser.add_argument(
+        "--output-sink",
+        choices=sorted(OUTPUT_SINK_BACKENDS),
+        default="jsonl",
+        help="How proposals are stored (files writes JSON, Markdown and HTML per proposal)"
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Proposals generated at once"
+    )
+
+    parser.add_argument(
+        "--section-concurrency",
+        type=int,
+        default=1,
+        help="Sections of one proposal generated at once"
+    )
+
+    parser.add_argument(
+        "--max-failures",
+        type=int,
+        default=None,
+        help="Stop starting new jobs after this many failures"
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="gemini-2.5-flash",
+        help="Gemini model to use"
+    )
+
+    parser.add_argument(
+        "--requests-per-minute",
+        type=int,
+        default=None,
+        help="Provider request quota shared by all jobs"
+    )
+
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=int,
+        default=None,
+        help="Provider token quota shared by all jobs"
+    )
+
+    parser.add_argument(
+        "--retrieve",
+        action="store_true",
+        help="Retrieve context for inputs that do not include one"
+    )
+
+    parser.add_argument(
+        "--rfp-db",
+        type=str,
+        default="data/vector_dbs/rfp_db",
+        help="Path to RFP vector database"
+    )
+
+    parser.add_argument(
+        "--proposal-db",
+        type=str,
+        default="data/vector_dbs/proposal_db",
+        help="Path to proposal vector database"
+    )
+
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=5,
+        help="Matches retrieved per input"
+    )
+
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    checkpoint_path = args.checkpoint or args.manifest.with_name(f"{args.manifest.stem}.checkpoint.sqlite")
+    checkpoints = CheckpointStore(checkpoint_path)
+
+    retriever = None
+    if args.retrieve:
+        from agents.retriever_agent import RetrieverAgent
+        retriever = RetrieverAgent(rfp_db_path=args.rfp_db, proposal_db_path=args.proposal_db)
+
+    writer = WriterAgent(
+        model_name=args.model,
+        max_concurrent_sections=args.section_concurrency,
+        allow_partial_results=True,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        output_sink=args.output_sink,
+        output_dir=args.output_dir
+    )
+
+    runner = BatchRunner(
+        writer,
+        checkpoints,
+        retriever=retriever,
+        max_concurrent_jobs=args.concurrency,
+        retrieval_top_k=args.top_k,
+        max_failures=args.max_failures
+    )
+
+    logger.info(f"Running {len(jobs)} jobs from {args.manifest} (checkpoints in {checkpoint_path})")
+    try:
+        summary = runner.run(jobs)
+    finally:
+        writer.flush_logs()
+        checkpoints.close()
+
+    print(summary.format())
+    sys.exit(1 if summary.failed or summary.not_run else 0)
+
+
+if __name__ == "__main__":
+    main()
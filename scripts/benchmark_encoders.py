@@ -0,0 +1,135 @@
+"""
+Encoder Backend Benchmark
+Exports the embedding model to ONNX, checks parity against PyTorch and
+compares query and chunk encoding throughput across backends.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+from core.encoders import (
+    OnnxEncoder,
+    benchmark_encoder,
+    default_onnx_dir,
+    export_onnx,
+    load_encoder,
+    parity_check
+)
+
+
+SAMPLE_QUERIES = [
+    "web application for project management with user authentication",
+    "cloud migration services for legacy systems",
+    "NAICS 541511 custom computer programming services",
+    "data analytics dashboard with role-based access control",
+    "mobile app development with offline synchronization",
+    "cybersecurity assessment and FedRAMP compliance",
+    "help desk support with 24/7 availability",
+    "ERP integration and data warehouse modernization"
+]
+
+SAMPLE_CHUNK = (
+    "The contractor shall provide all personnel, equipment, and services necessary to design, "
+    "develop, test, and deploy a secure web-based platform. The solution must support single sign-on, "
+    "role-based access control, audit logging, and reporting. Deliverables include a project management "
+    "plan, system architecture document, test plan, and training materials. The period of performance "
+    "is twelve months from contract award with two optional twelve-month extensions. "
+)
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Benchmark sentence encoder backends")
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="all-MiniLM-L6-v2",
+        help="Sentence transformer model name"
+    )
+
+    parser.add_argument(
+        "--onnx-dir",
+        type=Path,
+        default=None,
+        help="ONNX export directory (defaults to data/encoders/<model>)"
+    )
+
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=200,
+        help="Number of single-query encodes to time"
+    )
+
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        default=512,
+        help="Number of chunks to encode in batches"
+    )
+
+    parser.add_argument(
+        "--min-cosine",
+        type=float,
+        default=0.99,
+        help="Minimum cosine agreement with PyTorch required to pass"
+    )
+
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    onnx_dir = args.onnx_dir or default_onnx_dir(args.model)
+    if not (onnx_dir / OnnxEncoder.QUANTIZED_MODEL_FILE).exists():
+        export_onnx(args.model, onnx_dir, quantize=True)
+
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(args.queries)]
+    chunks = [f"Section {i}. {SAMPLE_CHUNK}" for i in range(args.chunks)]
+    parity_texts = SAMPLE_QUERIES + chunks[:32]
+
+    reference = load_encoder(args.model, backend="torch")
+    encoders = {
+        "torch": reference,
+        "onnx_fp32": OnnxEncoder(onnx_dir, quantized=False),
+        "onnx_int8": OnnxEncoder(onnx_dir, quantized=True)
+    }
+
+    results = {"model": args.model, "backends": {}}
+    for name, encoder in encoders.items():
+        logger.info(f"Benchmarking {name}...")
+        entry = benchmark_encoder(encoder, queries, chunks)
+        if encoder is not reference:
+            entry["parity"] = parity_check(reference, encoder, parity_texts, min_cosine=args.min_cosine)
+        results["backends"][name] = entry
+
+    print(f"{'backend':<12} {'queries/s':>10} {'chunks/s':>10} {'min cos':>9}")
+    for name, entry in results["backends"].items():
+        min_cos = entry.get("parity", {}).get("min_cosine", 1.0)
+        print(f"{name:<12} {entry['queries_per_sec']:>10.1f} {entry['chunks_per_sec']:>10.1f} {min_cos:>9.5f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Saved benchmark results to {args.output}")
+
+    failed = [name for name, entry in results["backends"].items() if not entry.get("parity", {}).get("passed", True)]
+    if failed:
+        logger.error(f"Parity check failed for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
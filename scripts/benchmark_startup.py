@@ -0,0 +1,155 @@
+"""
+Startup Time Benchmark
+Measures import and construction costs in fresh interpreter processes:
+importing core.extract_text, constructing RetrieverAgent, the first query
+encode, and constructing a second agent that reuses the shared encoder.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+IMPORT_EXTRACTOR = """
+import sys, time
+sys.path.insert(0, {backend!r})
+start = time.perf_counter()
+import core.extract_text
+print(time.perf_counter() - start)
+"""
+
+AGENT_STARTUP = """
+import sys, time, json
+sys.path.insert(0, {backend!r})
+timings = {{}}
+
+start = time.perf_counter()
+from agents.retriever_agent import RetrieverAgent
+timings["import_retriever_agent"] = time.perf_counter() - start
+
+start = time.perf_counter()
+agent = RetrieverAgent({rfp_db!r}, {proposal_db!r}, model_name={model!r}, encoder_backend={backend_name!r})
+timings["construct_agent"] = time.perf_counter() - start
+
+start = time.perf_counter()
+agent.warmup()
+timings["first_encode"] = time.perf_counter() - start
+
+start = time.perf_counter()
+second = RetrieverAgent({rfp_db!r}, {proposal_db!r}, model_name={model!r}, encoder_backend={backend_name!r})
+second.warmup()
+timings["second_agent_ready"] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+def run_snippet(code: str) -> str:
+    """Run code in a fresh interpreter and return its last output line."""
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return completed.stdout.strip().splitlines()[-1]
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Benchmark import and agent startup time")
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of fresh-process runs per measurement"
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="all-MiniLM-L6-v2",
+        help="Sentence transformer model name"
+    )
+
+    parser.add_argument(
+        "--encoder-backend",
+        type=str,
+        default="torch",
+        help="Encoder backend for the agent"
+    )
+
+    parser.add_argument(
+        "--rfp-db",
+        type=str,
+        default="data/vector_dbs/rfp_db",
+        help="Path to RFP vector database"
+    )
+
+    parser.add_argument(
+        "--proposal-db",
+        type=str,
+        default="data/vector_dbs/proposal_db",
+        help="Path to proposal vector database"
+    )
+
+    parser.add_argument(
+        "--skip-agent",
+        action="store_true",
+        help="Only measure the extractor import"
+    )
+
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write results as JSON to this file"
+    )
+
+    args = parser.parse_args()
+
+    samples = {"import_core_extract_text": []}
+    for _ in range(args.repeat):
+        samples["import_core_extract_text"].append(
+            float(run_snippet(IMPORT_EXTRACTOR.format(backend=str(BACKEND_DIR))))
+        )
+
+    if not args.skip_agent:
+        code = AGENT_STARTUP.format(
+            backend=str(BACKEND_DIR),
+            rfp_db=args.rfp_db,
+            proposal_db=args.proposal_db,
+            model=args.model,
+            backend_name=args.encoder_backend
+        )
+        for _ in range(args.repeat):
+            for name, seconds in json.loads(run_snippet(code)).items():
+                samples.setdefault(name, []).append(seconds)
+
+    results = {
+        name: {
+            "median_ms": statistics.median(values) * 1000,
+            "min_ms": min(values) * 1000,
+            "runs": len(values)
+        }
+        for name, values in samples.items()
+    }
+
+    print(f"{'measurement':<28} {'median ms':>10} {'min ms':>10}")
+    for name, entry in results.items():
+        print(f"{name:<28} {entry['median_ms']:>10.1f} {entry['min_ms']:>10.1f}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Builds FAISS vector databases from document collections.
 
 import json
 import pickle
+import shutil
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import argparse
@@ -13,13 +14,14 @@ from datetime import datetime
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from loguru import logger
 import os
 
 # Add backend to path for imports
 sys.path.append(str(Path(__file__).parent.parent / "backend"))
 from core.extract_text import TextExtractor, TextChunk
+from core.lexical_index import BM25Index
+from core.encoders import ENCODER_BACKENDS, get_encoder
 
 
 class VectorDBBuilder:
@@ -28,7 +30,10 @@ class VectorDBBuilder:
     def __init__(
         self,
         model_name: str = "all-MiniLM-L6-v2",
-        dimension: int = 384
+        dimension: int = 384,
+        build_lexical_index: bool = True,
+        encoder_backend: str = "torch",
+        onnx_dir: Optional[Path] = None
     ):
         """
         Initialize the vector database builder.
@@ -36,13 +41,26 @@ class VectorDBBuilder:
         Args:
             model_name: Name of the sentence transformer model
             dimension: Embedding dimension
+            build_lexical_index: Whether to also emit a BM25 index over the chunks
+            encoder_backend: Embedding backend ("torch" or "onnx")
+            onnx_dir: ONNX export directory for the onnx backend
         """
         self.model_name = model_name
         self.dimension = dimension
-        self.encoder = SentenceTransformer(model_name)
+        self.build_lexical_index = build_lexical_index
+        self.encoder_backend = encoder_backend
+        self.onnx_dir = onnx_dir
+        self._encoder = None
         self.text_extractor = TextExtractor()
         
-        logger.info(f"Initialized VectorDBBuilder with model: {model_name}")
+        logger.info(f"Initialized VectorDBBuilder with model: {model_name} ({encoder_backend} backend)")
+    
+    @property
+    def encoder(self):
+        """Chunk encoder, taken from the shared encoder registry on first use."""
+        if self._encoder is None:
+            self._encoder = get_encoder(self.model_name, backend=self.encoder_backend, onnx_dir=self.onnx_dir)
+        return self._encoder
     
     def process_documents(
         self,
@@ -191,6 +209,16 @@ class VectorDBBuilder:
         with open(chunks_path, 'w', encoding='utf-8') as f:
             json.dump(chunks_data, f, indent=2, ensure_ascii=False)
         
+        # Save lexical index over the same chunks (row i matches chunk id i)
+        lexical_path = output_path / "lexical"
+        if self.build_lexical_index:
+            lexical_index = BM25Index.build([chunk.content for chunk in chunks])
+            lexical_index.save(lexical_path)
+        elif lexical_path.exists():
+            # A previous build's postings would not match the new chunk ids
+            shutil.rmtree(lexical_path)
+            logger.info(f"Removed stale lexical index: {lexical_path}")
+        
         # Save database metadata
         db_metadata = {
             "created_at": datetime.now().isoformat(),
@@ -198,6 +226,8 @@ class VectorDBBuilder:
             "dimension": self.dimension,
             "total_chunks": len(chunks),
             "total_documents": len(set(chunk.source_file for chunk in chunks)),
+            "lexical_index": self.build_lexical_index,
+            "encoder_backend": self.encoder_backend,
             **(metadata or {})
         }
         
@@ -208,6 +238,8 @@ class VectorDBBuilder:
         logger.info(f"Saved vector database to {output_path}")
         logger.info(f"  - Index: {index_path}")
         logger.info(f"  - Chunks: {chunks_path}")
+        if self.build_lexical_index:
+            logger.info(f"  - Lexical index: {lexical_path}")
         logger.info(f"  - Metadata: {metadata_path}")
     
     def build_database(
@@ -288,6 +320,19 @@ def main():
         help="Use GPU acceleration"
     )
     
+    parser.add_argument(
+        "--encoder-backend",
+        choices=ENCODER_BACKENDS,
+        default="torch",
+        help="Embedding backend (onnx exports the model on first use)"
+    )
+    
+    parser.add_argument(
+        "--no-lexical",
+        action="store_true",
+        help="Skip building the BM25 lexical index"
+    )
+    
     args = parser.parse_args()
     
     # Setup logging
@@ -298,7 +343,11 @@ def main():
         level="INFO"
     )
     
-    builder = VectorDBBuilder(model_name=args.model)
+    builder = VectorDBBuilder(
+        model_name=args.model,
+        build_lexical_index=not args.no_lexical,
+        encoder_backend=args.encoder_backend
+    )
     
     # Build RFP database
     if args.rfp_dir.exists():
@@ -0,0 +1,120 @@
+"""
+Usage Report
+Summarizes token usage, latency percentiles and estimated cost recorded by
+the Writer Agent, grouped by persona, section or model over a time window,
+and imports token usage CSV files written by earlier versions.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from core.usage_store import UsageStore  # noqa: E402
+
+
+GROUP_ALIASES = {"persona": "persona", "section": "section_type", "model": "model"}
+DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_time(value: str) -> float:
+    """Parse a relative duration ("30m", "24h", "7d") or an ISO timestamp to epoch seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([mhdw])", value)
+    if match:
+        return time.time() - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def print_summary(rows, group_by):
+    """Print summary rows as a table."""
+    if not rows:
+        print("No usage recorded in this window")
+        return
+
+    header = [*group_by, "sections", "tokens", "p50 ms", "p95 ms", "p99 ms", "cache hit", "retries", "cost $"]
+    widths = [max(12, *(len(str(row[column])) for row in rows)) for column in group_by]
+    print(" ".join(f"{name:<{width}}" for name, width in zip(group_by, widths))
+          + "".join(f" {name:>10}" for name in header[len(group_by):]))
+    for row in rows:
+        print(" ".join(f"{str(row[column]):<{width}}" for column, width in zip(group_by, widths))
+              + f" {row['sections']:>10} {row['total_tokens']:>10}"
+              + f" {row['latency_ms_p50']:>10.0f} {row['latency_ms_p95']:>10.0f} {row['latency_ms_p99']:>10.0f}"
+              + f" {row['cache_hit_rate']:>10.1%} {row['retries']:>10} {row['cost_usd']:>10.4f}")
+
+
+def main():
+    """Main function for command-line usage."""
+    parser = argparse.ArgumentParser(description="Report token usage, latency and cost of generated sections")
+
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=Path("logs/usage_metrics.sqlite"),
+        help="Usage metrics database"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Summarize usage by group")
+    summary_parser.add_argument(
+        "--by",
+        nargs="+",
+        choices=sorted(GROUP_ALIASES),
+        default=["persona"],
+        help="Columns to group by"
+    )
+    summary_parser.add_argument(
+        "--since",
+        type=parse_time,
+        default=None,
+        help="Start of the window: a duration such as 24h or 7d, or an ISO timestamp"
+    )
+    summary_parser.add_argument(
+        "--until",
+        type=parse_time,
+        default=None,
+        help="End of the window: a duration ago or an ISO timestamp"
+    )
+    summary_parser.add_argument("--persona", default=None, help="Only this persona")
+    summary_parser.add_argument("--section", default=None, help="Only this section type")
+    summary_parser.add_argument("--model", default=None, help="Only this model")
+    summary_parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+
+    import_parser = subparsers.add_parser("import-csv", help="Import token usage CSV files")
+    import_parser.add_argument("csv_files", nargs="+", type=Path, help="CSV files to import")
+
+    args = parser.parse_args()
+    store = UsageStore(args.db)
+
+    try:
+        if args.command == "import-csv":
+            for csv_path in args.csv_files:
+                print(f"{csv_path}: {store.import_csv(csv_path)} rows imported")
+            return
+
+        group_by = [GROUP_ALIASES[name] for name in args.by]
+        rows = store.summary(
+            group_by=group_by,
+            since=args.since,
+            until=args.until,
+            persona=args.persona,
+            section_type=args.section,
+            model=args.model
+        )
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print_summary(rows, group_by)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
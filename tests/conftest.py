@@ -0,0 +1,64 @@
+"""
+Shared test fixtures
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.encoders import clear_encoder_registry
+from core.model_pool import model_pool
+from core.output_sink import close_all_output_sinks
+from core.prompt_templates import clear_template_stores
+from core.rate_limiter import clear_rate_limiters
+from core.usage_store import close_all_stores
+
+
+@pytest.fixture(autouse=True)
+def fresh_encoder_registry():
+    """Keep encoders patched in one test from leaking into the next."""
+    clear_encoder_registry()
+    yield
+    clear_encoder_registry()
+
+
+@pytest.fixture(autouse=True)
+def fresh_model_pool():
+    """Keep model clients patched in one test from leaking into the next."""
+    model_pool.clear()
+    yield
+    model_pool.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_template_stores():
+    """Keep templates compiled from one test's files out of the next."""
+    clear_template_stores()
+    yield
+    clear_template_stores()
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    """Keep quota used in one test from throttling the next."""
+    clear_rate_limiters()
+    yield
+    clear_rate_limiters()
+
+
+@pytest.fixture(autouse=True)
+def fresh_usage_stores():
+    """Stop usage store writer threads opened on one test's temporary files."""
+    yield
+    close_all_stores()
+
+
+@pytest.fixture(autouse=True)
+def fresh_output_sinks():
+    """Stop output sink writer threads opened on one test's temporary directories."""
+    yield
+    close_all_output_sinks()
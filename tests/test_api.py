@@ -0,0 +1,76 @@
+"""
+Tests for the backend API routes
+"""
+
+import json
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+def parse_sse(body: str):
+    """Parse a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestRoutes:
+    """Test the basic API routes."""
+
+    def test_root(self):
+        """Test that the root endpoint is registered."""
+        response = TestClient(main.app).get("/")
+        assert response.status_code == 200
+        assert response.json() == {"message": "Welcome to Propulse API"}
+
+
+class TestGenerateStream:
+    """Test the streaming generation endpoint."""
+
+    def test_relays_generation_events(self):
+        """Test that generation events are relayed as SSE in order."""
+        agent = Mock()
+        agent.generate_stream.return_value = iter([
+            {"event": "start", "generation_id": "g1", "sections": ["executive_summary"]},
+            {"event": "delta", "section_type": "executive_summary", "text": "Hello "},
+            {"event": "delta", "section_type": "executive_summary", "text": "world"},
+            {"event": "done", "generation_id": "g1", "output": {"generation_id": "g1"}}
+        ])
+
+        with patch.object(main, "get_writer_agent", return_value=agent):
+            response = TestClient(main.app).post(
+                "/generate/stream",
+                json={"user_prompt": "Build a portal", "sections_to_generate": ["executive_summary"]}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["start", "delta", "delta", "done"]
+        assert "".join(data["text"] for name, data in events if name == "delta") == "Hello world"
+
+        writer_input = agent.generate_stream.call_args[0][0]
+        assert writer_input.user_prompt == "Build a portal"
+        assert writer_input.sections_to_generate == ["executive_summary"]
+        assert writer_input.persona == "consultant"
+
+    def test_rejects_invalid_request(self):
+        """Test request validation."""
+        response = TestClient(main.app).post("/generate/stream", json={"persona": "technical"})
+        assert response.status_code == 422
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
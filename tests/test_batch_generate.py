@@ -0,0 +1,269 @@
+"""
+Tests for batch proposal generation and generation checkpoints
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+import sys
+
+# Add backend and scripts to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+from agents.writer_agent import WriterAgent
+from batch_generate import BatchRunner, load_manifest, retrieval_context_from_result
+from core.checkpoint_store import CheckpointStore
+from core.model_pool import model_pool
+
+
+PERSONAS = {
+    "personas": {
+        "technical": {
+            "name": "Technical Expert",
+            "description": "Deep technical knowledge",
+            "writing_style": {
+                "tone": "analytical",
+                "perspective": "technical",
+                "language_level": "expert",
+                "focus_areas": ["architecture"]
+            },
+            "prompt_additions": "Write with technical precision."
+        }
+    },
+    "default_persona": "technical"
+}
+
+
+class FlakyModel:
+    """Mock Gemini model failing sections whose prompt contains a marker."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("quota exceeded")
+        response = Mock()
+        response.candidates = [Mock()]
+        response.candidates[0].content.parts = [Mock()]
+        response.candidates[0].content.parts[0].text = "Section content for the proposal."
+        response.usage_metadata = Mock()
+        response.usage_metadata.prompt_token_count = 100
+        response.usage_metadata.candidates_token_count = 40
+        return response
+
+
+class TestManifest:
+    """Test reading manifests."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_jsonl_manifest(self):
+        """Test one input per line, with explicit and derived ids."""
+        path = self.temp_dir / "manifest.jsonl"
+        path.write_text(
+            json.dumps({"id": "acme", "user_prompt": "Build a portal", "persona": "technical",
+                        "sections_to_generate": ["executive_summary"]}) + "\n\n"
+            + json.dumps({"user_prompt": "Migrate a database", "generation_params": {"temperature": 0}}) + "\n"
+        )
+
+        jobs = load_manifest(path)
+        assert [job.job_id for job in jobs][0] == "acme"
+        assert jobs[0].writer_input.sections_to_generate == ["executive_summary"]
+        assert jobs[1].writer_input.persona == "consultant"
+        assert jobs[1].writer_input.generation_params == {"temperature": 0}
+        assert jobs[1].job_id == load_manifest(path)[1].job_id
+
+    def test_csv_manifest(self):
+        """Test spreadsheet rows with separated sections and JSON columns."""
+        path = self.temp_dir / "manifest.csv"
+        path.write_text(
+            "id,user_prompt,persona,sections_to_generate,generation_params,retrieval_query\n"
+            'row-1,Build a portal,technical,executive_summary; technical_approach,"{""temperature"": 0}",portals\n'
+        )
+
+        job = load_manifest(path)[0]
+        assert job.job_id == "row-1"
+        assert job.writer_input.sections_to_generate == ["executive_summary", "technical_approach"]
+        assert job.writer_input.generation_params == {"temperature": 0}
+        assert job.retrieval_query == "portals"
+
+    def test_invalid_rows(self):
+        """Test that missing prompts and duplicate ids are reported with their line."""
+        path = self.temp_dir / "manifest.jsonl"
+        path.write_text(json.dumps({"persona": "technical"}) + "\n")
+        with pytest.raises(ValueError, match="line 1"):
+            load_manifest(path)
+
+        path.write_text(json.dumps({"id": "a", "user_prompt": "x"}) + "\n" + json.dumps({"id": "a", "user_prompt": "y"}) + "\n")
+        with pytest.raises(ValueError, match="share the id"):
+            load_manifest(path)
+
+
+class TestCheckpointStore:
+    """Test the CheckpointStore class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.store = CheckpointStore(self.temp_dir / "checkpoints.sqlite")
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_sections_survive_reopening(self):
+        """Test that checkpointed sections are durable."""
+        self.store.start_job("job", "hash")
+        self.store.save_section("job", {"section_type": "budget", "content": {"markdown": "x"}})
+        self.store.close()
+
+        self.store = CheckpointStore(self.temp_dir / "checkpoints.sqlite")
+        state = self.store.start_job("job", "hash")
+        assert state["status"] == "running"
+        assert state["attempts"] == 1
+        assert self.store.completed_sections("job")["budget"]["content"]["markdown"] == "x"
+
+    def test_changed_input_starts_over(self):
+        """Test that checkpoints for a different input are discarded."""
+        self.store.start_job("job", "old")
+        self.store.save_section("job", {"section_type": "budget"})
+        self.store.finish_job("job", "completed", output_path="out.json")
+
+        assert self.store.start_job("job", "new")["status"] is None
+        assert self.store.completed_sections("job") == {}
+
+    def test_unknown_status(self):
+        """Test that only known statuses are recorded."""
+        self.store.start_job("job", "hash")
+        with pytest.raises(ValueError):
+            self.store.finish_job("job", "paused")
+
+
+class TestBatchRunner:
+    """Test running manifests through the Writer Agent."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "personas.json").write_text(json.dumps(PERSONAS))
+        prompts_dir = self.temp_dir / "section_prompts"
+        prompts_dir.mkdir()
+        (prompts_dir / "executive_summary.txt").write_text("You are writing the Executive Summary section.")
+        (prompts_dir / "technical_approach.txt").write_text("You are writing the Technical Approach section.")
+
+        self.manifest = self.temp_dir / "manifest.jsonl"
+        self.manifest.write_text("".join(
+            json.dumps({
+                "id": f"job-{i}",
+                "user_prompt": f"Build application {i}",
+                "persona": "technical",
+                "sections_to_generate": ["executive_summary", "technical_approach"]
+            }) + "\n"
+            for i in range(3)
+        ))
+        self.checkpoints = CheckpointStore(self.temp_dir / "checkpoints.sqlite")
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        self.checkpoints.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _runner(self, mock_genai, model, **kwargs):
+        """Create a runner around a Writer Agent backed by ``model``."""
+        model_pool.clear()
+        mock_genai.GenerativeModel.return_value = model
+        writer = WriterAgent(
+            personas_path=str(self.temp_dir / "personas.json"),
+            section_prompts_dir=str(self.temp_dir / "section_prompts"),
+            logs_dir=str(self.temp_dir / "logs"),
+            allow_partial_results=True,
+            output_sink="files",
+            output_dir=str(self.temp_dir / "out")
+        )
+        return BatchRunner(writer, self.checkpoints, **kwargs)
+
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('agents.writer_agent.genai')
+    def test_resume_after_failure(self, mock_genai):
+        """Test that a rerun only generates the sections that did not complete."""
+        jobs = load_manifest(self.manifest)
+
+        first = self._runner(mock_genai, FlakyModel(fail_on="Technical Approach"), max_concurrent_jobs=2)
+        summary = first.run(jobs)
+        assert summary.failed == 3
+        assert summary.sections_generated == 3
+        assert summary.prompt_tokens == 300
+        assert summary.cost_usd > 0
+        assert "quota exceeded" in summary.failures[0]["error"]
+        assert set(self.checkpoints.completed_sections("job-0")) == {"executive_summary"}
+
+        model = FlakyModel()
+        second = self._runner(mock_genai, model, max_concurrent_jobs=2)
+        summary = second.run(jobs)
+        assert summary.completed == 3
+        assert summary.sections_generated == 3
+        assert summary.sections_resumed == 3
+        assert all("Technical Approach" in prompt for prompt in model.prompts)
+
+        output_path = self.checkpoints.job("job-0")["output_path"]
+        with open(output_path) as f:
+            output = json.load(f)
+        assert [s["section_type"] for s in output["generated_content"]["sections"]] == [
+            "executive_summary", "technical_approach"
+        ]
+        assert output["generation_metadata"]["resumed_sections"] == ["executive_summary"]
+
+        third = self._runner(mock_genai, FlakyModel())
+        summary = third.run(jobs)
+        assert summary.skipped == 3
+        assert summary.sections_generated == 0
+
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('agents.writer_agent.genai')
+    def test_stops_after_max_failures(self, mock_genai):
+        """Test that new jobs are not started once the failure limit is reached."""
+        runner = self._runner(mock_genai, FlakyModel(fail_on="Executive Summary"), max_concurrent_jobs=1, max_failures=1)
+        summary = runner.run(load_manifest(self.manifest))
+
+        assert summary.failed == 1
+        assert summary.not_run == 2
+        assert "Failed job-0" in summary.format()
+
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('agents.writer_agent.genai')
+    def test_retrieval_before_generation(self, mock_genai):
+        """Test that retrieved context is used and kept for resumed runs."""
+        retriever = Mock()
+        retriever.retrieve.return_value = SimpleNamespace(
+            retrieval_id="retrieval-1",
+            metadata={},
+            results={
+                "rfp_matches": [{"content": "RFP text", "source_file": "rfp.pdf", "similarity_score": 0.5, "chunk_metadata": {}}],
+                "proposal_matches": [{"content": "Past work", "source_file": "past.pdf", "similarity_score": 0.9, "chunk_metadata": {}}]
+            }
+        )
+        model = FlakyModel()
+        runner = self._runner(mock_genai, model, retriever=retriever)
+
+        summary = runner.run(load_manifest(self.manifest)[:1])
+        assert summary.completed == 1
+        assert "Source: past.pdf\nPast work" in model.prompts[0]
+
+        context = retrieval_context_from_result(retriever.retrieve.return_value)
+        assert [match["metadata"]["source"] for match in context["matches"]] == ["past.pdf", "rfp.pdf"]
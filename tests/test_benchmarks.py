@@ -0,0 +1,102 @@
+"""
+Tests for the benchmark corpus generator and harness
+"""
+
+import tempfile
+import shutil
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend and repo root to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import CorpusConfig, generate_corpus, generate_queries
+from benchmarks.harness import HashingEncoder, StubGenerativeModel, measure
+from benchmarks.compare import compare_results
+from core.extract_text import TextExtractor
+
+
+class TestCorpusGenerator:
+    """Test synthetic corpus generation."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.config = CorpusConfig(num_documents=3, sections_per_document=2, paragraphs_per_section=2)
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_generates_every_format(self):
+        """Test that each format is written and extractable."""
+        paths = generate_corpus(self.temp_dir, self.config)
+        extractor = TextExtractor()
+
+        assert sorted(path.suffix for path in paths) == [".docx", ".pdf", ".txt"]
+        texts = [extractor.extract_text(path) for path in paths]
+        assert all("RFP" in text for text in texts)
+        assert all(len(text) > 500 for text in texts)
+
+    def test_deterministic(self):
+        """Test that the same configuration produces the same text."""
+        first = generate_corpus(self.temp_dir / "a", self.config)
+        second = generate_corpus(self.temp_dir / "b", self.config)
+        extractor = TextExtractor()
+
+        for a, b in zip(first, second):
+            assert extractor.extract_text(a) == extractor.extract_text(b)
+        assert generate_queries(5) == generate_queries(5)
+
+    def test_rejects_unknown_format(self):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            CorpusConfig(formats=("pdf", "rtf"))
+
+
+class TestHarness:
+    """Test benchmark timing and stand-ins."""
+
+    def test_measure_summary(self):
+        """Test timing summary fields and throughput."""
+        calls = []
+        summary = measure(lambda: calls.append(1), repeat=4, warmup=2, items=10)
+
+        assert len(calls) == 6
+        assert summary["runs"] == 4
+        assert summary["min_ms"] <= summary["median_ms"] <= summary["p95_ms"]
+        assert summary["items"] == 10
+
+    def test_hashing_encoder(self):
+        """Test that the hashing encoder is deterministic and normalized."""
+        encoder = HashingEncoder(dimension=64)
+        batch = encoder.encode(["cloud migration", "web application"], normalize_embeddings=True)
+        single = encoder.encode("cloud migration", normalize_embeddings=True)
+
+        assert batch.shape == (2, 64)
+        assert single.shape == (64,)
+        assert abs(float(single @ single) - 1.0) < 1e-5
+        assert (single == batch[0]).all()
+
+    def test_stub_model_response_shape(self):
+        """Test that stub responses look like Gemini responses."""
+        response = StubGenerativeModel(response_words=50).generate_content("Write a summary")
+
+        assert "## Overview" in response.candidates[0].content.parts[0].text
+        assert response.usage_metadata.prompt_token_count > 0
+
+    def test_compare_results(self):
+        """Test relative change between two results documents."""
+        base = {"benchmarks": {"a": {"median_ms": 10.0}, "b": {"median_ms": 5.0}}}
+        head = {"benchmarks": {"a": {"median_ms": 12.0}, "c": {"median_ms": 1.0}}}
+
+        rows = compare_results(base, head)
+
+        assert [row["benchmark"] for row in rows] == ["a"]
+        assert rows[0]["change"] == pytest.approx(0.2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
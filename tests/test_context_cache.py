@@ -0,0 +1,67 @@
+"""
+Tests for prompt prefix caching backends
+"""
+
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.context_cache import CONTEXT_CACHE_BACKENDS, GeminiContextCache, LocalContextCache
+
+
+class TestLocalContextCache:
+    """Test the in-process prefix cache."""
+
+    def test_bound_model_prepends_prefix(self):
+        """Test that requests are sent with the prefix in front."""
+        base_model = Mock()
+        factory = Mock(return_value=base_model)
+        cache = LocalContextCache()
+
+        cached = cache.create("gemini-2.5-flash", "shared prefix " * 10, 30)
+        model = cache.bind(cached, {"temperature": 0.2}, None, factory)
+        model.generate_content("section suffix", stream=True)
+
+        factory.assert_called_once_with({"temperature": 0.2})
+        base_model.generate_content.assert_called_once_with("shared prefix " * 10 + "section suffix", stream=True)
+        assert cached.token_count == 30
+
+
+class TestGeminiContextCache:
+    """Test the Gemini context caching backend with the API mocked out."""
+
+    @patch('google.generativeai.caching.CachedContent.create')
+    def test_create_bind_release(self, mock_create):
+        """Test that the prefix is uploaded once and models are bound to it."""
+        handle = Mock()
+        handle.name = "cachedContents/abc"
+        handle.usage_metadata.total_token_count = 2048
+        mock_create.return_value = handle
+        cache = GeminiContextCache(ttl_seconds=120)
+
+        cached = cache.create("gemini-2.5-flash", "prefix", 1)
+
+        assert mock_create.call_args.kwargs["model"] == "models/gemini-2.5-flash"
+        assert mock_create.call_args.kwargs["contents"] == ["prefix"]
+        assert mock_create.call_args.kwargs["ttl"].total_seconds() == 120
+        assert cached.name == "cachedContents/abc"
+        assert cached.token_count == 2048
+
+        with patch('google.generativeai.GenerativeModel.from_cached_content') as mock_from_cached:
+            cache.bind(cached, {"temperature": 0.2}, [], Mock())
+        mock_from_cached.assert_called_once_with(handle, generation_config={"temperature": 0.2}, safety_settings=[])
+
+        cache.release(cached)
+        handle.delete.assert_called_once()
+
+    def test_backend_names(self):
+        """Test the registered backend names."""
+        assert set(CONTEXT_CACHE_BACKENDS) == {"gemini", "local"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+"""
+Tests for extractive context compression
+"""
+
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+import sys
+
+# Add backend and repo root to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.harness import HashingEncoder
+from core.context_compression import ContextCompressor, split_sentences
+
+
+MATCH_TEXT = (
+    "The vendor will provide project status reports every week. "
+    "Authentication uses OAuth2 with JWT access tokens for every user. "
+    "Office furniture was delivered to the second floor in March. "
+    "Single sign-on authentication for users is integrated with Azure AD. "
+    "The cafeteria menu changes on a monthly schedule for staff."
+)
+
+
+class TestSplitSentences:
+    """Test sentence splitting."""
+
+    def test_splits_on_sentence_ends_and_lines(self):
+        """Test splitting on punctuation and line breaks."""
+        text = "First sentence is here. Second one follows here!\nA heading line of text\nIs it done? Yes, it is done now."
+
+        assert split_sentences(text) == [
+            "First sentence is here.",
+            "Second one follows here!",
+            "A heading line of text",
+            "Is it done? Yes, it is done now."
+        ]
+
+    def test_merges_short_fragments(self):
+        """Test that short fragments join the following sentence."""
+        assert split_sentences("1.\nScope of the work to be delivered.") == ["1. Scope of the work to be delivered."]
+        assert split_sentences("") == []
+
+
+class TestContextCompressor:
+    """Test query-focused sentence selection."""
+
+    def setup_method(self):
+        """Set up a compressor with a deterministic encoder."""
+        self.encoder = HashingEncoder(dimension=512)
+        self.compressor = ContextCompressor(sentences_per_match=2, encoder=self.encoder)
+        self.matches = [
+            {"text": MATCH_TEXT, "score": 0.9, "metadata": {"source": "auth.pdf"}},
+            {"text": "Short match about authentication.", "score": 0.5, "metadata": {"source": "short.pdf"}}
+        ]
+
+    def test_keeps_relevant_sentences_in_order(self):
+        """Test that the most similar sentences are kept in document order."""
+        [(compressed, stats)] = self.compressor.compress(self.matches, ["user authentication tokens"])
+
+        assert compressed[0]["text"] == (
+            "Authentication uses OAuth2 with JWT access tokens for every user. "
+            "Single sign-on authentication for users is integrated with Azure AD."
+        )
+        assert compressed[0]["metadata"] == {"source": "auth.pdf"}
+        assert compressed[1]["text"] == "Short match about authentication."
+        assert stats["ratio"] < 0.6
+        assert stats["compressed_chars"] == sum(len(match["text"]) for match in compressed)
+
+        # The input matches are left untouched
+        assert self.matches[0]["text"] == MATCH_TEXT
+
+    def test_queries_share_one_encode(self):
+        """Test that several queries are scored with a single encode call."""
+        encoder = Mock(wraps=self.encoder)
+        compressor = ContextCompressor(sentences_per_match=1, encoder=encoder)
+
+        results = compressor.compress(self.matches, ["weekly status reports", "cafeteria menu"])
+
+        assert encoder.encode.call_count == 1
+        assert "status reports" in results[0][0][0]["text"]
+        assert "cafeteria" in results[1][0][0]["text"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,181 @@
+"""
+Tests for sentence encoder backends
+"""
+
+import tempfile
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+import numpy as np
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.encoders import OnnxEncoder, export_onnx, get_encoder, load_encoder, parity_check
+
+
+def build_tiny_model(model_dir: Path) -> Path:
+    """Save a small randomly initialized BERT sentence model to disk."""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    from sentence_transformers import SentenceTransformer, models
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + (
+        "web application with user authentication and reporting cloud migration "
+        "services project management data analytics"
+    ).split()
+    (model_dir / "vocab.txt").write_text("\n".join(vocab))
+    BertTokenizerFast(vocab_file=str(model_dir / "vocab.txt")).save_pretrained(str(model_dir))
+
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64
+    )
+    BertModel(config).save_pretrained(str(model_dir))
+
+    transformer = models.Transformer(str(model_dir), max_seq_length=32)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    model = SentenceTransformer(modules=[transformer, pooling, models.Normalize()])
+
+    sentence_model_dir = model_dir / "sentence_model"
+    model.save(str(sentence_model_dir))
+    return sentence_model_dir
+
+
+class TestOnnxEncoder:
+    """Test ONNX export, quantization and parity."""
+
+    @classmethod
+    def setup_class(cls):
+        """Export a tiny model once for all tests."""
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("onnx")
+
+        cls.temp_dir = Path(tempfile.mkdtemp())
+        cls.model_path = build_tiny_model(cls.temp_dir)
+        cls.onnx_dir = export_onnx(str(cls.model_path), cls.temp_dir / "onnx", quantize=True)
+        cls.texts = [
+            "web application with user authentication",
+            "cloud migration services",
+            "project management and reporting",
+            "data analytics"
+        ]
+
+    @classmethod
+    def teardown_class(cls):
+        """Clean up exported files."""
+        import shutil
+        if cls.temp_dir.exists():
+            shutil.rmtree(cls.temp_dir)
+
+    def test_export_writes_files(self):
+        """Test that export writes both graphs and the encoder config."""
+        assert (self.onnx_dir / OnnxEncoder.MODEL_FILE).exists()
+        assert (self.onnx_dir / OnnxEncoder.QUANTIZED_MODEL_FILE).exists()
+        assert (self.onnx_dir / OnnxEncoder.CONFIG_FILE).exists()
+
+    def test_fp32_parity(self):
+        """Test that the fp32 ONNX graph matches PyTorch embeddings."""
+        reference = load_encoder(str(self.model_path), backend="torch")
+        candidate = OnnxEncoder(self.onnx_dir, quantized=False)
+
+        report = parity_check(reference, candidate, self.texts, min_cosine=0.9999)
+        assert report["passed"]
+
+    def test_int8_parity(self):
+        """Test that the int8 graph stays close to PyTorch embeddings."""
+        reference = load_encoder(str(self.model_path), backend="torch")
+        candidate = OnnxEncoder(self.onnx_dir, quantized=True)
+
+        report = parity_check(reference, candidate, self.texts, min_cosine=0.98)
+        assert report["passed"]
+
+    def test_encode_shapes(self):
+        """Test encode output shapes and normalization."""
+        encoder = load_encoder(str(self.model_path), backend="onnx", onnx_dir=self.onnx_dir)
+
+        batch = encoder.encode(self.texts, batch_size=3, normalize_embeddings=True)
+        single = encoder.encode(self.texts[0], normalize_embeddings=True)
+
+        assert batch.shape == (4, 32)
+        assert single.shape == (32,)
+        np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_allclose(single, batch[0], atol=1e-3)
+
+
+class TestLoadEncoder:
+    """Test encoder backend selection."""
+
+    def test_unknown_backend(self):
+        """Test that unknown backends are rejected."""
+        with pytest.raises(ValueError):
+            load_encoder("all-MiniLM-L6-v2", backend="tensorrt")
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_torch_backend(self, mock_transformer):
+        """Test that the torch backend returns a SentenceTransformer."""
+        mock_transformer.return_value = Mock()
+
+        encoder = load_encoder("all-MiniLM-L6-v2", backend="torch")
+
+        assert encoder is mock_transformer.return_value
+        mock_transformer.assert_called_once_with("all-MiniLM-L6-v2")
+
+
+class TestEncoderRegistry:
+    """Test the process-wide encoder registry."""
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_shared_instance(self, mock_transformer):
+        """Test that one model is loaded once and shared."""
+        mock_transformer.side_effect = lambda name: Mock(name=name)
+
+        first = get_encoder("all-MiniLM-L6-v2")
+        second = get_encoder("all-MiniLM-L6-v2")
+        other = get_encoder("all-mpnet-base-v2")
+
+        assert first is second
+        assert other is not first
+        assert mock_transformer.call_count == 2
+
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_concurrent_first_use_loads_once(self, mock_transformer):
+        """Test that concurrent first calls wait for a single load."""
+        from concurrent.futures import ThreadPoolExecutor
+        import time
+
+        def slow_load(name):
+            time.sleep(0.05)
+            return Mock(name=name)
+
+        mock_transformer.side_effect = slow_load
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            encoders = list(pool.map(lambda _: get_encoder("all-MiniLM-L6-v2"), range(8)))
+
+        assert all(encoder is encoders[0] for encoder in encoders)
+        assert mock_transformer.call_count == 1
+
+    @patch('agents.retriever_agent.VectorDatabase')
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_agents_share_encoder_lazily(self, mock_transformer, mock_vector_db):
+        """Test that agents defer loading and then share one encoder."""
+        from agents.retriever_agent import RetrieverAgent
+
+        mock_transformer.return_value = Mock()
+        temp_dir = Path(tempfile.mkdtemp())
+
+        first = RetrieverAgent(str(temp_dir / "rfp"), str(temp_dir / "proposal"), log_file=str(temp_dir / "log.jsonl"))
+        second = RetrieverAgent(str(temp_dir / "rfp"), str(temp_dir / "proposal"), log_file=str(temp_dir / "log.jsonl"))
+        mock_transformer.assert_not_called()
+
+        assert first.encoder is second.encoder
+        mock_transformer.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
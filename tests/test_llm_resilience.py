@@ -0,0 +1,235 @@
+"""
+Tests for model call deadlines, retries and hedging
+"""
+
+import threading
+import time
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from google.api_core import exceptions as api_exceptions
+
+from core.llm_resilience import CallStats, CallTimeoutError, ResilientCaller, is_retryable, iter_with_deadline
+from core.rate_limiter import RateLimiter, RateLimitTimeout
+
+
+class FlakyCall:
+    """Callable failing with the given errors before succeeding."""
+
+    def __init__(self, errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+class TestRetries:
+    """Test retrying transient failures."""
+
+    def test_retryable_errors(self):
+        """Test which errors are considered transient."""
+        assert is_retryable(api_exceptions.ResourceExhausted("quota"))
+        assert is_retryable(api_exceptions.ServiceUnavailable("unavailable"))
+        assert is_retryable(CallTimeoutError("slow"))
+        assert is_retryable(ConnectionError("reset"))
+        assert not is_retryable(api_exceptions.InvalidArgument("bad request"))
+        assert not is_retryable(RuntimeError("No content generated"))
+        assert not is_retryable(RateLimitTimeout("queued too long"))
+
+    def test_retries_then_succeeds(self):
+        """Test that transient failures are retried with backoff."""
+        caller = ResilientCaller(max_attempts=3, backoff_initial_s=0.01)
+        call = FlakyCall([api_exceptions.ServiceUnavailable("unavailable"), api_exceptions.ResourceExhausted("quota")])
+        stats = CallStats()
+
+        assert caller.call(call, stats) == "ok"
+        assert stats.attempts == 3
+        assert stats.retries == 2
+        assert call.timeouts == [None, None, None]
+
+    def test_gives_up(self):
+        """Test that the last error is raised once attempts are exhausted."""
+        caller = ResilientCaller(max_attempts=2, backoff_initial_s=0.01)
+        call = FlakyCall([api_exceptions.ServiceUnavailable("first"), api_exceptions.ServiceUnavailable("second")])
+
+        with pytest.raises(api_exceptions.ServiceUnavailable, match="second"):
+            caller.call(call)
+
+    def test_does_not_retry_permanent_errors(self):
+        """Test that non-transient errors are raised immediately."""
+        caller = ResilientCaller(max_attempts=3, backoff_initial_s=0.01)
+        stats = CallStats()
+
+        with pytest.raises(RuntimeError):
+            caller.call(FlakyCall([RuntimeError("blocked")]), stats)
+        assert stats.attempts == 1
+
+    def test_quota_wait_timeout_not_retried(self):
+        """Test that a call timing out in the rate limiter queue fails after one attempt."""
+        limiter = RateLimiter(requests_per_minute=1)
+        limiter.acquire()
+        caller = ResilientCaller(max_attempts=3, backoff_initial_s=0.01)
+        stats = CallStats()
+
+        with pytest.raises(RateLimitTimeout):
+            caller.call(lambda timeout: limiter.acquire(timeout=0.05), stats)
+        assert stats.attempts == 1
+        assert stats.timeouts == 0
+        assert limiter.timeouts == 1
+
+    def test_invalid_attempts(self):
+        """Test that at least one attempt is required."""
+        with pytest.raises(ValueError):
+            ResilientCaller(max_attempts=0)
+
+
+class TestDeadlines:
+    """Test per-attempt and overall deadlines."""
+
+    def test_attempt_timeout(self):
+        """Test that slow attempts time out and are retried."""
+        caller = ResilientCaller(max_attempts=2, call_timeout_s=0.05, backoff_initial_s=0.01)
+        stats = CallStats()
+        received = []
+
+        def slow(timeout):
+            received.append(timeout)
+            time.sleep(0.5)
+            return "late"
+
+        start = time.perf_counter()
+        with pytest.raises(CallTimeoutError):
+            caller.call(slow, stats)
+
+        assert time.perf_counter() - start < 0.4
+        assert stats.attempts == 2
+        assert stats.timeouts == 2
+        assert received == [0.05, 0.05]
+        caller.close()
+
+    def test_overall_deadline(self):
+        """Test that the overall deadline bounds retries and attempt timeouts."""
+        caller = ResilientCaller(max_attempts=10, deadline_s=0.2, backoff_initial_s=0.01)
+
+        start = time.perf_counter()
+        with pytest.raises(CallTimeoutError):
+            caller.call(lambda timeout: time.sleep(1))
+
+        assert time.perf_counter() - start < 0.5
+        caller.close()
+
+    def test_abandoned_attempts_do_not_starve_new_ones(self):
+        """Test that attempts still running after their deadline do not hold up new calls."""
+        caller = ResilientCaller(max_attempts=1, call_timeout_s=0.05, max_workers=2)
+        release = threading.Event()
+
+        def hangs(timeout):
+            release.wait(2.0)
+            return "late"
+
+        for _ in range(2):
+            with pytest.raises(CallTimeoutError):
+                caller.call(hangs)
+        assert caller.stats()["abandoned_in_flight"] == 2
+
+        # Both pool threads are held by abandoned attempts; a new call still runs
+        assert caller.call(lambda timeout: "fresh") == "fresh"
+        assert caller.stats()["pools_retired"] == 1
+
+        release.set()
+        deadline = time.monotonic() + 1.0
+        while caller.stats()["abandoned_in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert caller.stats()["abandoned_in_flight"] == 0
+        caller.close()
+
+    def test_stream_deadline_between_chunks(self):
+        """Test that a stream stalling between chunks times out."""
+        def stalls():
+            yield "first"
+            time.sleep(1.0)
+            yield "never"
+
+        chunks = []
+        start = time.perf_counter()
+        with pytest.raises(CallTimeoutError):
+            for chunk in iter_with_deadline(stalls(), time.monotonic() + 0.1):
+                chunks.append(chunk)
+
+        assert chunks == ["first"]
+        assert time.perf_counter() - start < 0.5
+        assert list(iter_with_deadline(iter(["a", "b"]), time.monotonic() + 1.0)) == ["a", "b"]
+        assert list(iter_with_deadline(iter(["a"]), None)) == ["a"]
+
+    def test_stream_errors_propagate(self):
+        """Test that a stream's own error reaches the reader."""
+        def fails():
+            yield "first"
+            raise ConnectionError("reset")
+
+        with pytest.raises(ConnectionError):
+            list(iter_with_deadline(fails(), time.monotonic() + 1.0))
+
+
+class TestHedging:
+    """Test hedged duplicate requests."""
+
+    def test_no_hedging_until_warm(self):
+        """Test that hedging waits for enough latency samples."""
+        caller = ResilientCaller(hedge=True, hedge_min_samples=5, hedge_min_delay_s=0.01)
+        assert caller.hedge_delay() is None
+
+        for latency in [0.1, 0.1, 0.1, 0.1, 0.2]:
+            caller.observe_latency(latency)
+
+        assert caller.hedge_delay() == pytest.approx(0.18)
+        assert ResilientCaller(hedge=False).hedge_delay() is None
+
+    def test_hedge_wins_over_slow_attempt(self):
+        """Test that a duplicate request answers when the first one stalls."""
+        caller = ResilientCaller(hedge=True, hedge_min_samples=1, hedge_min_delay_s=0.05)
+        caller.observe_latency(0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def stalls_first(timeout):
+            with lock:
+                calls.append(timeout)
+                first = len(calls) == 1
+            if first:
+                time.sleep(1.0)
+                return "primary"
+            return "hedge"
+
+        stats = CallStats()
+        start = time.perf_counter()
+
+        assert caller.call(stalls_first, stats) == "hedge"
+        assert time.perf_counter() - start < 0.5
+        assert stats.hedges == 1
+        assert stats.hedge_wins == 1
+        assert stats.attempts == 1
+        assert caller.stats()["abandoned_in_flight"] == 1
+        caller.close()
+
+    def test_hedging_can_be_disabled_per_call(self):
+        """Test that calls which must not be duplicated are never hedged."""
+        caller = ResilientCaller(hedge=True, hedge_min_samples=1, hedge_min_delay_s=0.01)
+        caller.observe_latency(0.01)
+        stats = CallStats()
+
+        def slow(timeout):
+            time.sleep(0.1)
+            return "only"
+
+        assert caller.call(slow, stats, hedge=False) == "only"
+        assert stats.hedges == 0
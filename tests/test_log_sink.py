@@ -0,0 +1,122 @@
+"""
+Tests for the asynchronous log sink
+"""
+
+import gzip
+import tempfile
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.log_sink import AsyncLogSink, get_log_sink
+
+
+class TestAsyncLogSink:
+    """Test the AsyncLogSink class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def test_write_and_flush(self):
+        """Test that queued lines reach disk after flush."""
+        sink = AsyncLogSink(self.temp_dir / "log.jsonl")
+
+        for i in range(10):
+            assert sink.write(f'{{"n": {i}}}')
+        assert sink.flush()
+
+        lines = (self.temp_dir / "log.jsonl").read_text().splitlines()
+        assert lines == [f'{{"n": {i}}}' for i in range(10)]
+        assert sink.stats()["written"] == 10
+        sink.close()
+
+    def test_header_written_once(self):
+        """Test that the header is only written to new files."""
+        path = self.temp_dir / "usage.csv"
+
+        sink = AsyncLogSink(path, header="a,b")
+        sink.write("1,2")
+        sink.close()
+
+        sink = AsyncLogSink(path, header="a,b")
+        sink.write("3,4")
+        sink.close()
+
+        assert path.read_text().splitlines() == ["a,b", "1,2", "3,4"]
+
+    def test_drops_when_queue_full(self):
+        """Test that writes beyond the queue size are counted as dropped."""
+        sink = AsyncLogSink(self.temp_dir / "log.jsonl", max_queue_size=1)
+        sink.close()
+
+        # A closed sink never blocks the caller
+        assert not sink.write("late line")
+
+        sink = AsyncLogSink(self.temp_dir / "full.jsonl", max_queue_size=1, flush_interval_s=5.0)
+        results = [sink.write(f"line {i}") for i in range(1000)]
+        sink.close()
+
+        assert sink.stats()["dropped"] == results.count(False)
+        assert sink.stats()["written"] == results.count(True)
+
+    def test_rotation_with_compression(self):
+        """Test that files are rotated and compressed at max_bytes."""
+        path = self.temp_dir / "log.jsonl"
+        sink = AsyncLogSink(path, max_bytes=100, backup_count=2, batch_size=1)
+
+        for i in range(30):
+            sink.write(f"line number {i:04d}")
+            sink.flush()
+        sink.close()
+
+        rotated = path.with_name("log.jsonl.1.gz")
+        assert rotated.exists()
+        assert not path.with_name("log.jsonl.3.gz").exists()
+        with gzip.open(rotated, 'rt') as f:
+            assert f.read().startswith("line number")
+        assert sink.stats()["rotations"] > 0
+
+    def test_failed_rotation_keeps_writing(self):
+        """Test that a failed rotation neither loses later lines nor hides them."""
+        path = self.temp_dir / "log.jsonl"
+        sink = AsyncLogSink(path, max_bytes=50, backup_count=2, batch_size=1)
+
+        with patch("core.log_sink.gzip.open", side_effect=OSError("disk full")):
+            for i in range(5):
+                sink.write(f"line number {i:04d}")
+                assert sink.flush()
+        assert path.read_text().splitlines() == [f"line number {i:04d}" for i in range(5)]
+        assert sink.stats()["dropped"] == 0
+
+        # Lines that cannot be written at all are counted as dropped
+        sink._file.close()
+        with patch.object(sink, "_open", side_effect=OSError("read-only file system")):
+            sink.write("lost line")
+            assert sink.flush()
+        sink._open()
+        sink.close()
+        assert sink.stats()["dropped"] == 1
+        assert sink.stats()["written"] == 5
+
+    def test_shared_sink_per_path(self):
+        """Test that get_log_sink returns one sink per file."""
+        path = self.temp_dir / "shared.jsonl"
+
+        assert get_log_sink(path) is get_log_sink(Path(str(path)))
+        get_log_sink(path).close()
+        assert not get_log_sink(path)._closed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
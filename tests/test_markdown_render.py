@@ -0,0 +1,91 @@
+"""
+Tests for pooled Markdown conversion and stitched document assembly
+"""
+
+import threading
+import markdown
+from pathlib import Path
+import sys
+
+# Add backend and repo root to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import generate_proposal_sections
+from core.markdown_render import DEFAULT_EXTENSIONS, MarkdownRenderer, stitch_sections
+
+
+SECTIONS = [
+    ("Executive Summary", "## Overview\n\nSecure & accessible <b>delivery</b>.\n\n## Overview\n\n### Using `OAuth2`\n"),
+    ("Technical Approach", "## Overview\n\n| Phase | Weeks |\n|-------|-------|\n| Build | 16 |\n\n```python\nx = 1\n```\n"),
+    ("Overview", "## Overview\n\n## Overview_1\n"),
+    ("Appendix", "")
+]
+
+
+def full_render(sections):
+    """Render the joined document in one pass, as the writer used to."""
+    converter = markdown.Markdown(extensions=list(DEFAULT_EXTENSIONS))
+    html = converter.convert("\n\n".join(f"# {title}\n\n{text}" for title, text in sections))
+    return html, converter.toc
+
+
+class TestMarkdownRenderer:
+    """Test the converter pool."""
+
+    def test_matches_markdown(self):
+        """Test that pooled conversion matches a fresh parser every time."""
+        renderer = MarkdownRenderer()
+
+        for _, text in SECTIONS * 2:
+            assert renderer.convert(text) == markdown.markdown(text, extensions=list(DEFAULT_EXTENSIONS))
+
+        stats = renderer.stats()
+        assert stats["created"] == 1
+        assert stats["conversions"] == len(SECTIONS) * 2
+
+    def test_concurrent_conversions(self):
+        """Test that threads get separate converters and correct output."""
+        renderer = MarkdownRenderer(max_idle=2)
+        text = SECTIONS[0][1]
+        expected = renderer.convert(text)
+        outputs = []
+
+        def convert():
+            for _ in range(20):
+                outputs.append(renderer.convert(text))
+
+        threads = [threading.Thread(target=convert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert outputs == [expected] * 80
+        assert renderer.stats()["idle"] <= 2
+
+
+class TestStitchSections:
+    """Test single-pass document assembly."""
+
+    def test_matches_full_render(self):
+        """Test that stitched HTML and table of contents match a full re-render."""
+        renderer = MarkdownRenderer()
+
+        html, toc = stitch_sections([(title, renderer.convert(text)) for title, text in SECTIONS])
+
+        assert (html, toc) == full_render(SECTIONS)
+        assert 'id="overview_3"' in html
+
+    def test_matches_full_render_for_long_proposals(self):
+        """Test equivalence on a generated 50-page proposal."""
+        renderer = MarkdownRenderer()
+        sections = [(section_type.replace("_", " ").title(), text) for section_type, text in generate_proposal_sections()]
+
+        html, toc = stitch_sections([(title, renderer.convert(text)) for title, text in sections])
+
+        assert (html, toc) == full_render(sections)
+
+    def test_empty_document(self):
+        """Test assembling no sections."""
+        assert stitch_sections([]) == ("", "")
@@ -0,0 +1,107 @@
+"""
+Tests for latency metrics
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.metrics import Histogram, MetricsRegistry, StageTimer, registry
+
+
+class TestHistogram:
+    """Test latency histograms."""
+
+    def test_render_cumulative_buckets(self):
+        """Test Prometheus rendering of buckets, sum and count."""
+        histogram = Histogram("test_seconds", "Test latency", label_names=("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="encode")
+        histogram.observe(0.5, stage="encode")
+        histogram.observe(2.0, stage="encode")
+
+        lines = histogram.render()
+
+        assert "# TYPE test_seconds histogram" in lines
+        assert 'test_seconds_bucket{stage="encode",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{stage="encode",le="1"} 2' in lines
+        assert 'test_seconds_bucket{stage="encode",le="+Inf"} 3' in lines
+        assert 'test_seconds_count{stage="encode"} 3' in lines
+        assert 'test_seconds_sum{stage="encode"} 2.55' in lines
+
+    def test_quantile(self):
+        """Test quantile interpolation within buckets."""
+        histogram = Histogram("test_seconds", "Test latency", buckets=(1.0, 2.0, 4.0))
+        assert histogram.quantile(0.5) is None
+
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.quantile(0.25) == pytest.approx(1.0)
+        assert histogram.quantile(0.5) == pytest.approx(1.5)
+        assert histogram.quantile(0.99) <= 4.0
+
+    def test_registry_get_or_create(self):
+        """Test that registering a name twice returns the same histogram."""
+        metrics = MetricsRegistry()
+        first = metrics.histogram("a_seconds", "A")
+        second = metrics.histogram("a_seconds", "A")
+        first.observe(0.01)
+
+        assert first is second
+        assert "a_seconds_count 1" in metrics.render_prometheus()
+
+
+class TestStageTimer:
+    """Test per-request stage timing."""
+
+    def test_stages_accumulate(self):
+        """Test stage timing, external durations and observation."""
+        timer = StageTimer("retrieval")
+        with timer.stage("encode"):
+            pass
+        timer.add("search", 0.002)
+        timer.add("search", 0.003)
+
+        timings = timer.as_dict()
+        assert set(timings) == {"encode_ms", "search_ms"}
+        assert timings["search_ms"] == pytest.approx(5.0)
+
+        stages = Histogram("stage_seconds", "Stages", label_names=("stage",))
+        total = Histogram("total_seconds", "Total")
+        timer.observe(stages, total)
+
+        assert stages.snapshot()[("search",)]["count"] == 1
+        assert total.snapshot()[()]["count"] == 1
+
+    def test_stage_recorded_on_error(self):
+        """Test that a failing stage is still timed."""
+        timer = StageTimer("retrieval")
+        with pytest.raises(ValueError):
+            with timer.stage("extract"):
+                raise ValueError("boom")
+
+        assert "extract_ms" in timer.as_dict()
+
+
+class TestMetricsEndpoint:
+    """Test the /metrics route."""
+
+    def test_metrics_endpoint(self):
+        """Test that the endpoint serves the process-wide registry."""
+        from fastapi.testclient import TestClient
+        from main import app
+
+        registry.histogram("propulse_test_seconds", "Endpoint test").observe(0.01)
+
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "propulse_test_seconds_count 1" in response.text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
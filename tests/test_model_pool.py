@@ -0,0 +1,61 @@
+"""
+Tests for the generative model client pool
+"""
+
+from enum import Enum
+from unittest.mock import Mock
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.model_pool import ModelPool, freeze
+
+
+class Threshold(Enum):
+    BLOCK_MEDIUM_AND_ABOVE = 2
+
+
+class TestModelPool:
+    """Test configuration-keyed client reuse."""
+
+    def test_freeze_is_order_independent(self):
+        """Test that dict key order does not change the key."""
+        assert freeze({"a": 1, "b": [1, 2]}) == freeze({"b": [1, 2], "a": 1})
+        assert freeze([{"threshold": Threshold.BLOCK_MEDIUM_AND_ABOVE}]) == (
+            (("threshold", "Threshold.BLOCK_MEDIUM_AND_ABOVE"),),
+        )
+
+    def test_reuses_client_per_configuration(self):
+        """Test that one client is built per distinct configuration."""
+        pool = ModelPool()
+        factory = Mock(side_effect=lambda: object())
+        safety = [{"category": "harassment", "threshold": Threshold.BLOCK_MEDIUM_AND_ABOVE}]
+
+        first = pool.get(ModelPool.key("gemini", {"temperature": 0.7, "top_p": 0.9}, safety), factory)
+        second = pool.get(ModelPool.key("gemini", {"top_p": 0.9, "temperature": 0.7}, safety), factory)
+        other = pool.get(ModelPool.key("gemini", {"temperature": 0.2, "top_p": 0.9}, safety), factory)
+        unsafe = pool.get(ModelPool.key("gemini", {"temperature": 0.7, "top_p": 0.9}, None), factory)
+
+        assert first is second
+        assert other is not first and unsafe is not first
+        assert factory.call_count == 3
+        assert pool.stats() == {"size": 3, "hits": 1, "misses": 3}
+
+    def test_evicts_least_recently_used(self):
+        """Test that the pool stays within its size limit."""
+        pool = ModelPool(max_size=2)
+        key = lambda temperature: ModelPool.key("gemini", {"temperature": temperature}, None)
+        clients = {t: pool.get(key(t), object) for t in (0.1, 0.2)}
+
+        pool.get(key(0.1), object)  # refresh 0.1
+        pool.get(key(0.3), object)  # evicts 0.2
+
+        assert pool.get(key(0.1), object) is clients[0.1]
+        assert pool.get(key(0.2), object) is not clients[0.2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,153 @@
+"""
+Tests for background output sinks
+"""
+
+import gzip
+import json
+import shutil
+import tempfile
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.output_sink import (
+    FileOutputSink,
+    JsonlSegmentSink,
+    OutputRecord,
+    OutputSink,
+    SQLiteOutputSink,
+    get_output_sink,
+    write_record_files
+)
+
+
+def make_record(n, **kwargs):
+    """Output record with a predictable document."""
+    return OutputRecord(f"id-{n}", {"n": n, "text": "résumé\nline two"}, **kwargs)
+
+
+class TestOutputSinks:
+    """Test the output sink backends."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_sink(self):
+        """Test one JSON file per record plus attachments."""
+        sink = FileOutputSink(self.temp_dir, "writer_output")
+        location = sink.write(make_record(1, attachments={"proposal_id-1.md": "# Title"}))
+        assert sink.flush()
+
+        assert location == str(self.temp_dir / "writer_output_id-1.json")
+        assert json.loads(Path(location).read_text()) == {"n": 1, "text": "résumé\nline two"}
+        assert (self.temp_dir / "proposal_id-1.md").read_text() == "# Title"
+        assert not list(self.temp_dir.glob("*.tmp"))
+        assert sink.stats()["syncs"] >= 1
+        sink.close()
+
+    def test_write_record_files(self):
+        """Test writing a record's files synchronously."""
+        paths = write_record_files(self.temp_dir / "out", "retriever_output", make_record(2), indent=False)
+        assert paths[0].name == "retriever_output_id-2.json"
+        assert json.loads(paths[0].read_text())["n"] == 2
+
+    def test_jsonl_sink_rolls_and_compresses(self):
+        """Test that full segments are gzipped and every record stays readable."""
+        sink = JsonlSegmentSink(self.temp_dir, "retriever_output", max_segment_bytes=200)
+        for i in range(10):
+            sink.write(make_record(i))
+        assert sink.flush()
+
+        assert sink.stats()["rolls"] >= 1
+        compressed = list(self.temp_dir.glob("retriever_output-*.jsonl.gz"))
+        assert compressed
+        with gzip.open(compressed[0], 'rt') as f:
+            assert json.loads(f.readline())["id"] == "id-0"
+        assert [record["id"] for record in sink.iter_records()] == [f"id-{i}" for i in range(10)]
+        sink.close()
+
+    def test_jsonl_sink_reuses_active_segment(self):
+        """Test that a restarted sink appends to the last segment instead of starting a new file."""
+        sink = JsonlSegmentSink(self.temp_dir, "writer_output")
+        sink.write(make_record(1))
+        sink.close()
+
+        sink = JsonlSegmentSink(self.temp_dir, "writer_output")
+        sink.write(make_record(2))
+        sink.close()
+
+        assert len(sink.segments()) == 1
+        assert [record["document"]["n"] for record in sink.iter_records()] == [1, 2]
+
+    def test_jsonl_sinks_share_directory(self):
+        """Test that writers sharing a directory (e.g. API and batch processes) never roll each other's segments."""
+        first = JsonlSegmentSink(self.temp_dir, "writer_output", max_segment_bytes=300)
+        second = JsonlSegmentSink(self.temp_dir, "writer_output", max_segment_bytes=300)
+        assert first.stats()["segment"] != second.stats()["segment"]
+
+        for i in range(20):
+            (first if i % 2 else second).write(make_record(i))
+            if i % 5 == 4:
+                assert first.flush() and second.flush()
+            if i == 10:
+                # A writer starting meanwhile leaves the active segments alone
+                JsonlSegmentSink(self.temp_dir, "writer_output", max_segment_bytes=300).close()
+                assert Path(first.stats()["segment"]).exists()
+                assert Path(second.stats()["segment"]).exists()
+        first.close()
+        second.close()
+
+        assert first.stats()["rolls"] >= 1 and second.stats()["rolls"] >= 1
+        assert sorted(record["document"]["n"] for record in first.iter_records()) == list(range(20))
+
+    def test_jsonl_sink_removes_empty_segment(self):
+        """Test that a sink closed without writes leaves no files."""
+        JsonlSegmentSink(self.temp_dir, "writer_output").close()
+        assert not list(self.temp_dir.iterdir())
+
+    def test_sqlite_sink(self):
+        """Test records stored as rows."""
+        sink = SQLiteOutputSink(self.temp_dir, "retriever_output")
+        location = sink.write(make_record(3))
+        assert sink.flush()
+
+        assert location.endswith("retriever_output.sqlite#id-3")
+        assert sink.get("id-3") == {"n": 3, "text": "résumé\nline two"}
+        assert sink.get("missing") is None
+        sink.close()
+
+    def test_close_writes_pending_records(self):
+        """Test that queued records are written when the sink closes."""
+        sink = JsonlSegmentSink(self.temp_dir, "writer_output", flush_interval_s=10.0)
+        for i in range(5):
+            sink.write(make_record(i))
+        sink.close()
+
+        assert sink.stats()["written"] == 5
+        with pytest.raises(RuntimeError):
+            sink.write(make_record(6))
+
+    def test_incomplete_sink_rejected(self):
+        """Test that a sink without a batch writer cannot be created."""
+        class LocateOnly(OutputSink):
+            def locate(self, record_id):
+                return record_id
+
+        with pytest.raises(TypeError):
+            LocateOnly(self.temp_dir, "writer_output")
+
+    def test_shared_sinks(self):
+        """Test that sinks are shared per backend, directory and prefix."""
+        first = get_output_sink("jsonl", self.temp_dir, "writer_output")
+        assert get_output_sink("jsonl", self.temp_dir, "writer_output") is first
+        assert get_output_sink("jsonl", self.temp_dir, "retriever_output") is not first
+        with pytest.raises(ValueError):
+            get_output_sink("s3", self.temp_dir, "writer_output")
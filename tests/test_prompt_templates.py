@@ -0,0 +1,128 @@
+"""
+Tests for compiled, shared and hot-reloaded prompt templates
+"""
+
+import json
+import os
+import pytest
+import tempfile
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.prompt_templates import (
+    CompiledPersona,
+    TemplateSet,
+    get_template_store,
+    render_section_suffix,
+)
+
+
+def write_personas(path: Path, tone: str):
+    """Write a one-persona configuration with the given tone."""
+    path.write_text(json.dumps({
+        "personas": {
+            "technical": {
+                "name": "Technical Expert",
+                "writing_style": {"tone": tone, "focus_areas": ["architecture"]},
+                "prompt_additions": "Write with technical precision."
+            }
+        },
+        "default_persona": "technical"
+    }))
+
+
+class TestCompiledTemplates:
+    """Test pre-rendered persona and section templates."""
+
+    def test_render_prefix(self):
+        """Test that a compiled persona renders the full prompt prefix."""
+        persona = CompiledPersona.compile("technical", {
+            "writing_style": {"tone": "analytical", "focus_areas": ["architecture", "security"]},
+            "prompt_additions": "Be precise."
+        })
+
+        prefix = persona.render_prefix("Build a web app", "Context text")
+
+        assert prefix.startswith("You are an expert proposal writer. Be precise.\n\n## User Requirements:\nBuild a web app")
+        assert "## Retrieved Context:\nContext text" in prefix
+        assert "- Write in analytical tone\n- Focus on architecture, security\n" in prefix
+        assert "No specific context provided." in persona.render_prefix("Build a web app", "")
+
+    def test_section_suffix(self):
+        """Test section suffixes, including unknown section types."""
+        templates = TemplateSet(personas_data={"personas": {}}, section_prompts={"executive_summary": "Summarise."})
+
+        assert templates.section_suffix("executive_summary") == render_section_suffix("executive_summary", "Summarise.")
+        assert templates.section_suffix("executive_summary").endswith("Please generate the Executive Summary section now:")
+        assert templates.section_suffix("budget").startswith("\n\nPlease generate the Budget section now:")
+
+    def test_unknown_persona_falls_back(self):
+        """Test that unknown personas use the default persona's settings."""
+        templates = TemplateSet(
+            personas_data={
+                "personas": {"sales": {"writing_style": {"tone": "persuasive"}, "prompt_additions": "Sell it."}},
+                "default_persona": "sales"
+            },
+            section_prompts={}
+        )
+
+        assert templates.persona("missing").instructions == templates.persona("sales").instructions
+        assert "Sell it." in templates.persona("missing").preamble
+
+
+class TestTemplateStore:
+    """Test the shared, hot-reloaded template store."""
+
+    @pytest.fixture
+    def template_files(self):
+        """Create personas and section prompt files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            personas_path = Path(temp_dir) / "personas.json"
+            write_personas(personas_path, "analytical")
+            section_prompts_dir = Path(temp_dir) / "section_prompts"
+            section_prompts_dir.mkdir()
+            (section_prompts_dir / "executive_summary.txt").write_text("Summarise the proposal.")
+            yield personas_path, section_prompts_dir
+
+    def test_store_is_shared(self, template_files):
+        """Test that the same files map to one store per process."""
+        personas_path, section_prompts_dir = template_files
+
+        store = get_template_store(personas_path, section_prompts_dir)
+
+        assert get_template_store(str(personas_path), str(section_prompts_dir)) is store
+        assert store.current() is store.current()
+
+    def test_hot_reload(self, template_files):
+        """Test that changed and added files are picked up without a restart."""
+        personas_path, section_prompts_dir = template_files
+        store = get_template_store(personas_path, section_prompts_dir, check_interval_s=0)
+        first = store.current()
+
+        assert store.current() is first
+        assert "analytical tone" in first.persona("technical").instructions
+
+        write_personas(personas_path, "conversational")
+        (section_prompts_dir / "budget.txt").write_text("Itemise the costs.")
+        stat = personas_path.stat()
+        os.utime(personas_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        reloaded = store.current()
+        assert reloaded.version == first.version + 1
+        assert store.reloads == 1
+        assert "conversational tone" in reloaded.persona("technical").instructions
+        assert reloaded.section_suffix("budget").startswith("Itemise the costs.")
+
+    def test_reload_is_rate_limited(self, template_files):
+        """Test that files are not re-checked within the check interval."""
+        personas_path, section_prompts_dir = template_files
+        store = get_template_store(personas_path, section_prompts_dir, check_interval_s=3600)
+        first = store.current()
+
+        write_personas(personas_path, "conversational")
+
+        assert store.current() is first
+        assert store.reloads == 0
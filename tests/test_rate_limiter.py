@@ -0,0 +1,157 @@
+"""
+Tests for the client-side LLM rate limiter
+"""
+
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.rate_limiter import PermitGroup, RateLimiter, RateLimitTimeout, SQLiteRateLimiter, get_rate_limiter
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateLimiter:
+    """Test token bucket admission."""
+
+    def test_requests_per_minute(self):
+        """Test that requests beyond the quota wait for the bucket to refill."""
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=2, clock=clock)
+
+        limiter.acquire()
+        limiter.acquire()
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(timeout=0.05)
+
+        clock.now += 30  # half a minute refills one request
+        assert limiter.acquire(timeout=0.05).wait_s < 0.05
+        assert limiter.stats()["timeouts"] == 1
+
+    def test_tokens_per_minute_and_settling(self):
+        """Test that reservations are corrected with the real usage."""
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=1000, clock=clock)
+
+        permit = limiter.acquire(800)
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(700, timeout=0.05)
+
+        permit.settle(200)
+        limiter.acquire(700, timeout=0.05)
+
+        # Requests above the whole quota wait for a full bucket instead of forever
+        clock.now += 60
+        limiter.acquire(5000, timeout=0.05)
+
+    def test_fifo_admission(self):
+        """Test that a small request does not overtake a large one already queued."""
+        limiter = RateLimiter(tokens_per_minute=60000)
+        limiter.acquire(60000)
+        order = []
+
+        def acquire(name, tokens):
+            limiter.acquire(tokens, timeout=5)
+            order.append(name)
+
+        large = threading.Thread(target=acquire, args=("large", 200))
+        large.start()
+        time.sleep(0.02)
+        small = threading.Thread(target=acquire, args=("small", 10))
+        small.start()
+        time.sleep(0.02)
+
+        assert limiter.stats()["queue_depth"] == 2
+
+        large.join()
+        small.join()
+        assert order == ["large", "small"]
+
+        stats = limiter.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["admitted"] == 3
+        assert stats["wait_ms_max"] >= 150
+
+    def test_acquire_async(self):
+        """Test admission from async code."""
+        limiter = RateLimiter(requests_per_minute=10)
+
+        permit = asyncio.run(limiter.acquire_async(100))
+
+        assert permit.tokens == 100
+
+    def test_permit_group_settling(self):
+        """Test that every attempt that sent is charged and late attempts release their permit."""
+        limiter = RateLimiter(tokens_per_minute=1000, clock=FakeClock())
+        group = PermitGroup()
+
+        winner, loser = limiter.acquire(300), limiter.acquire(300)
+        assert group.send(winner) and group.send(loser)
+        group.answered(winner, "response")
+
+        group.settle("response", actual_tokens=150, sent_tokens=100)
+        assert limiter._tokens == pytest.approx(1000 - 250)
+
+        late = limiter.acquire(300)
+        assert not group.send(late)
+        assert limiter._tokens == pytest.approx(1000 - 250)
+        assert group.settle("response", actual_tokens=150, sent_tokens=100) == 0.0
+
+    def test_invalid_quota(self):
+        """Test that quotas must be positive."""
+        with pytest.raises(ValueError):
+            RateLimiter(requests_per_minute=0)
+
+
+class TestSharedRateLimiter:
+    """Test limiters shared within and across processes."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sqlite_buckets_are_shared(self):
+        """Test that separate limiters on one file draw from the same quota."""
+        path = self.temp_dir / "rate_limits.sqlite"
+        first = SQLiteRateLimiter(path, requests_per_minute=2, tokens_per_minute=1000, name="gemini")
+        second = SQLiteRateLimiter(path, requests_per_minute=2, tokens_per_minute=1000, name="gemini")
+
+        first.acquire(100)
+        permit = second.acquire(100)
+        with pytest.raises(RateLimitTimeout):
+            first.acquire(100, timeout=0.05)
+
+        # Other quotas in the same file are independent
+        SQLiteRateLimiter(path, requests_per_minute=2, name="other").acquire(timeout=0.05)
+
+        permit.settle(50)
+        first.close()
+        second.close()
+
+    def test_process_wide_registry(self):
+        """Test that limiters are shared per quota name and file."""
+        limiter = get_rate_limiter("gemini-2.5-flash", requests_per_minute=60)
+
+        assert get_rate_limiter("gemini-2.5-flash") is limiter
+        assert get_rate_limiter("other-model", requests_per_minute=60) is not limiter
+        assert isinstance(get_rate_limiter("gemini-2.5-flash", path=self.temp_dir / "rl.sqlite"), SQLiteRateLimiter)
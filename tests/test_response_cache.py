@@ -0,0 +1,82 @@
+"""
+Tests for the LLM response cache
+"""
+
+import tempfile
+import shutil
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test cache keys, persistence and eviction."""
+
+    def setup_method(self):
+        """Set up a cache file per test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.path = self.temp_dir / "responses.sqlite"
+
+    def teardown_method(self):
+        """Clean up the cache file."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_key_covers_prompt_model_and_config(self):
+        """Test that every key component changes the key."""
+        base = ResponseCache.make_key("prompt", "gemini-2.5-flash", {"temperature": 0, "top_p": 0.9})
+
+        assert base == ResponseCache.make_key("prompt", "gemini-2.5-flash", {"top_p": 0.9, "temperature": 0})
+        assert base != ResponseCache.make_key("prompt!", "gemini-2.5-flash", {"temperature": 0, "top_p": 0.9})
+        assert base != ResponseCache.make_key("prompt", "gemini-2.5-pro", {"temperature": 0, "top_p": 0.9})
+        assert base != ResponseCache.make_key("prompt", "gemini-2.5-flash", {"temperature": 0, "top_p": 0.5})
+
+    def test_round_trip_and_persistence(self):
+        """Test that stored responses survive reopening the file."""
+        cache = ResponseCache(self.path)
+        key = ResponseCache.make_key("prompt", "model", {})
+        assert cache.get(key) is None
+
+        cache.put(key, "model", "## Summary\n\nText", prompt_tokens=12, completion_tokens=5)
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        entry = reopened.get(key)
+        assert entry["text"] == "## Summary\n\nText"
+        assert entry["prompt_tokens"] == 12
+        assert entry["completion_tokens"] == 5
+        assert reopened.stats()["hits"] == 1
+        reopened.close()
+
+    def test_evicts_least_recently_used(self):
+        """Test that the size bound evicts the least recently read entries."""
+        cache = ResponseCache(self.path, max_bytes=250)
+        keys = [ResponseCache.make_key(f"prompt {i}", "model", {}) for i in range(3)]
+
+        cache.put(keys[0], "model", "a" * 100)
+        cache.put(keys[1], "model", "b" * 100)
+        cache.get(keys[0])
+        cache.put(keys[2], "model", "c" * 100)
+
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is not None
+        assert cache.stats()["bytes"] <= 250
+        cache.close()
+
+    def test_clear(self):
+        """Test that clear removes every entry."""
+        cache = ResponseCache(self.path)
+        cache.put(ResponseCache.make_key("prompt", "model", {}), "model", "text")
+        cache.clear()
+
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
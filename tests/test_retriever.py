@@ -2,6 +2,7 @@
 Tests for Retriever Agent
 """
 
+import asyncio
 import json
 import tempfile
 import pytest
@@ -9,6 +10,7 @@ from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import numpy as np
 import sys
+from pydantic import ValidationError
 
 # Add backend to path for imports
 sys.path.append(str(Path(__file__).parent.parent / "backend"))
@@ -21,6 +23,8 @@ from agents.retriever_agent import (
     RetrievalResult
 )
 from core.extract_text import TextExtractor, TextChunk
+from core.lexical_index import BM25Index, tokenize
+from core.micro_batcher import MicroBatcher
 
 
 class TestTextExtractor:
@@ -159,6 +163,394 @@ class TestVectorDatabase:
         assert len(db.chunks) == 0
 
 
+class TestBM25Index:
+    """Test the BM25Index class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.texts = [
+            "Solicitation FA8750-24-R-0001 requests cloud migration services.",
+            "NAICS code 541511 applies to custom computer programming.",
+            "The contractor shall comply with FAR clause 52.212-4.",
+            "General project management and reporting requirements."
+        ]
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+    
+    def test_tokenize_keeps_identifiers(self):
+        """Test that compound identifiers are kept whole and split into parts."""
+        tokens = tokenize("Clause 52.212-4 and FA8750-24-R-0001")
+        
+        assert "52.212-4" in tokens
+        assert "212" in tokens
+        assert "fa8750-24-r-0001" in tokens
+        assert "clause" in tokens
+    
+    def test_search_exact_identifier(self):
+        """Test that exact identifiers rank their chunk first."""
+        index = BM25Index.build(self.texts)
+        
+        scores, indices = index.search("FAR 52.212-4", top_k=3)
+        assert indices[0] == 2
+        assert all(scores > 0)
+        
+        scores, indices = index.search("541511", top_k=3)
+        assert list(indices) == [1]
+    
+    def test_save_and_load(self):
+        """Test saving and memory-mapped loading round trip."""
+        index = BM25Index.build(self.texts)
+        index.save(self.temp_dir / "lexical")
+        
+        loaded = BM25Index.load(self.temp_dir / "lexical")
+        
+        assert isinstance(loaded.doc_ids, np.memmap)
+        assert loaded.num_docs == len(self.texts)
+        np.testing.assert_allclose(
+            loaded.score("cloud migration FA8750-24-R-0001"),
+            index.score("cloud migration FA8750-24-R-0001")
+        )
+
+
+class TestHybridSearch:
+    """Test lexical and hybrid search on VectorDatabase."""
+    
+    def setup_method(self):
+        """Set up a small on-disk database with real FAISS and BM25 indexes."""
+        import faiss
+        
+        self.temp_dir = Path(tempfile.mkdtemp())
+        texts = [
+            "Solicitation FA8750-24-R-0001 requests cloud migration services.",
+            "Cloud migration of legacy systems to managed services.",
+            "Project management and reporting requirements."
+        ]
+        chunks = [
+            {
+                "id": i,
+                "content": text,
+                "source_file": f"doc{i}.txt",
+                "chunk_id": 0,
+                "start_char": 0,
+                "end_char": len(text),
+                "metadata": {"document_type": "rfp"}
+            }
+            for i, text in enumerate(texts)
+        ]
+        with open(self.temp_dir / "chunks.json", 'w') as f:
+            json.dump(chunks, f)
+        
+        self.embeddings = np.eye(3, 4, dtype=np.float32)
+        index = faiss.IndexFlatIP(4)
+        index.add(self.embeddings)
+        faiss.write_index(index, str(self.temp_dir / "index.faiss"))
+        
+        BM25Index.build(texts).save(self.temp_dir / "lexical")
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+    
+    def test_lexical_search(self):
+        """Test lexical search finds identifier matches."""
+        db = VectorDatabase(self.temp_dir)
+        
+        assert db.has_lexical_index()
+        matches = db.lexical_search("FA8750-24-R-0001", top_k=5, similarity_threshold=0.0)
+        assert matches[0].id == 0
+        assert 0.0 < matches[0].similarity_score < 1.0
+    
+    def test_rebuild_without_lexical_index(self):
+        """Test that a database rebuilt without a lexical index does not use stale postings."""
+        import faiss
+        sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+        from build_vector_db import VectorDBBuilder
+        
+        # A database whose metadata says no lexical index was built ignores a leftover one
+        (self.temp_dir / "metadata.json").write_text(json.dumps({"lexical_index": False}))
+        assert not VectorDatabase(self.temp_dir).has_lexical_index()
+        
+        chunks = [TextChunk("New content only.", "new.txt", 0, 0, 17, {})]
+        index = faiss.IndexFlatIP(4)
+        index.add(self.embeddings[:1])
+        VectorDBBuilder(dimension=4, build_lexical_index=False).save_vector_db(index, chunks, self.temp_dir)
+        
+        assert not (self.temp_dir / "lexical").exists()
+        assert len(VectorDatabase(self.temp_dir).chunks) == 1
+    
+    def test_lexical_scores_not_relative_to_best_hit(self):
+        """Test that a query sharing one common term with the corpus does not pass the threshold."""
+        db = VectorDatabase(self.temp_dir)
+        
+        assert db.lexical_search("quantum entanglement services", top_k=5, similarity_threshold=0.0)
+        assert db.lexical_search("quantum entanglement services", top_k=5, similarity_threshold=0.1) == []
+        
+        full = db.lexical_search("cloud migration services", top_k=5, similarity_threshold=0.0)
+        single = db.lexical_search("cloud quantum entanglement", top_k=5, similarity_threshold=0.0)
+        assert full[0].similarity_score > single[0].similarity_score
+    
+    def test_hybrid_search_fuses_scores(self):
+        """Test hybrid search combines dense and lexical evidence."""
+        db = VectorDatabase(self.temp_dir)
+        
+        # Dense vector points at chunk 1, lexical identifier points at chunk 0
+        query_embedding = self.embeddings[1]
+        
+        dense_only = db.hybrid_search(query_embedding, "FA8750-24-R-0001", top_k=3, alpha=1.0)
+        assert dense_only[0].id == 1
+        
+        lexical_heavy = db.hybrid_search(query_embedding, "FA8750-24-R-0001", top_k=3, alpha=0.2)
+        assert lexical_heavy[0].id == 0
+        assert all(0.0 <= m.similarity_score <= 1.0 for m in lexical_heavy)
+
+
+class TestFastPath:
+    """Test column-oriented search and the fast result path."""
+    
+    def setup_method(self):
+        """Reuse the on-disk database from the hybrid search tests."""
+        TestHybridSearch.setup_method(self)
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        TestHybridSearch.teardown_method(self)
+    
+    def test_search_records_match_search(self):
+        """Test that column-oriented hits agree with RetrievalMatch results."""
+        db = VectorDatabase(self.temp_dir)
+        query_embedding = np.array([0.9, 0.3, 0.05, 0.0], dtype=np.float32)
+        
+        records = db.search_records(query_embedding, top_k=3, similarity_threshold=0.1)
+        matches = db.search(query_embedding, top_k=3, similarity_threshold=0.1)
+        
+        assert records.indices.tolist() == [0, 1]  # chunk 2 falls below the threshold
+        assert [m.dict() for m in matches] == records.to_dicts()
+    
+    @pytest.mark.parametrize("search_mode", ["dense", "lexical", "hybrid"])
+    def test_fast_path_output_matches_default(self, search_mode):
+        """Test that the fast path produces the same result document."""
+        encoder = Mock()
+        encoder.encode.side_effect = lambda texts, **kwargs: np.tile(self.embeddings[1], (len(texts), 1))
+        
+        documents = []
+        for fast_path in (False, True):
+            agent = RetrieverAgent(
+                str(self.temp_dir),
+                str(self.temp_dir),
+                log_file=str(self.temp_dir / "retriever_log.jsonl"),
+                fast_path=fast_path
+            )
+            agent._encoder = encoder
+            query = QueryInput(text="FA8750-24-R-0001 cloud migration", top_k=3,
+                               similarity_threshold=0.0, search_mode=search_mode)
+            result = agent.retrieve(query)
+            
+            output_path = self.temp_dir / f"result_{fast_path}.json"
+            agent.save_result(result, str(output_path))
+            with open(output_path) as f:
+                saved = json.load(f)
+            assert saved == json.loads(json.dumps(result.dict()))
+            documents.append(saved)
+        
+        default, fast = documents
+        assert fast["results"] == default["results"]
+        assert fast["results"]["total_matches"] > 0
+        assert set(fast) == set(default)
+
+    def test_results_saved_to_output_sink(self):
+        """Test that results without an output path go to rolling segments, not one file each."""
+        encoder = Mock()
+        encoder.encode.side_effect = lambda texts, **kwargs: np.tile(self.embeddings[1], (len(texts), 1))
+        output_dir = self.temp_dir / "outputs"
+        agent = RetrieverAgent(
+            str(self.temp_dir),
+            str(self.temp_dir),
+            log_file=str(self.temp_dir / "retriever_log.jsonl"),
+            output_dir=str(output_dir)
+        )
+        agent._encoder = encoder
+
+        results = [agent.retrieve(QueryInput(text=f"cloud migration {i}", top_k=3)) for i in range(5)]
+        for result in results:
+            agent.save_result(result)
+        assert agent.flush_outputs()
+
+        assert len(list(output_dir.iterdir())) == 1
+        saved = list(agent.output_sink.iter_records())
+        assert [record["id"] for record in saved] == [result.retrieval_id for result in results]
+        assert saved[0]["document"] == json.loads(json.dumps(results[0].dict()))
+
+
+class TestRangeSearch:
+    """Test threshold-first retrieval with FAISS range search."""
+    
+    def setup_method(self):
+        """Set up a database with graded similarity to a fixed query."""
+        import faiss
+        
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.scores = np.array([0.95, 0.9, 0.8, 0.6, 0.4, 0.2], dtype=np.float32)
+        chunks = [
+            {
+                "id": i,
+                "content": f"Chunk {i}",
+                "source_file": f"doc{i}.txt",
+                "chunk_id": 0,
+                "start_char": 0,
+                "end_char": 7,
+                "metadata": {}
+            }
+            for i in range(len(self.scores))
+        ]
+        with open(self.temp_dir / "chunks.json", 'w') as f:
+            json.dump(chunks, f)
+        
+        # Unit vectors whose inner product with e0 equals the target score
+        embeddings = np.zeros((len(self.scores), 2), dtype=np.float32)
+        embeddings[:, 0] = self.scores
+        embeddings[:, 1] = np.sqrt(1 - self.scores ** 2)
+        index = faiss.IndexFlatIP(2)
+        index.add(embeddings)
+        faiss.write_index(index, str(self.temp_dir / "index.faiss"))
+        
+        self.query_embedding = np.array([1.0, 0.0], dtype=np.float32)
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+    
+    def test_range_returns_all_above_threshold(self):
+        """Test that range search is not capped by top_k."""
+        db = VectorDatabase(self.temp_dir)
+        
+        matches = db.range_search(self.query_embedding, similarity_threshold=0.5)
+        
+        assert [m.id for m in matches] == [0, 1, 2, 3]
+        assert matches[0].similarity_score == pytest.approx(0.95, abs=1e-5)
+    
+    def test_range_top_k_and_safety_cap(self):
+        """Test the at-most-k mode and the result cap."""
+        db = VectorDatabase(self.temp_dir)
+        
+        assert [m.id for m in db.range_search(self.query_embedding, 0.5, top_k=2)] == [0, 1]
+        
+        db.RANGE_SEARCH_MAX_RESULTS = 3
+        assert [m.id for m in db.range_search(self.query_embedding, 0.0)] == [0, 1, 2]
+    
+    def test_range_threshold_is_inclusive(self):
+        """Test that a chunk scoring exactly the threshold is kept, as in top-k search."""
+        db = VectorDatabase(self.temp_dir)
+        threshold = float(db.search(self.query_embedding, top_k=3)[2].similarity_score)
+        
+        assert [m.id for m in db.range_search(self.query_embedding, threshold)] == [0, 1, 2]
+    
+    def test_threshold_mode_through_agent(self):
+        """Test that QueryInput selects the search strategy."""
+        encoder = Mock()
+        encoder.encode.side_effect = lambda texts, **kwargs: np.tile(self.query_embedding, (len(texts), 1))
+        agent = RetrieverAgent(
+            str(self.temp_dir),
+            str(self.temp_dir / "missing"),
+            log_file=str(self.temp_dir / "retriever_log.jsonl")
+        )
+        agent._encoder = encoder
+        
+        top_k = agent.retrieve(QueryInput(text="q", top_k=2, similarity_threshold=0.3))
+        ranged = agent.retrieve(QueryInput(text="q", top_k=2, similarity_threshold=0.3, threshold_mode="range"))
+        bounded = agent.retrieve(QueryInput(text="q", top_k=2, similarity_threshold=0.3, threshold_mode="range_top_k"))
+        
+        assert top_k.results["total_matches"] == 2
+        assert ranged.results["total_matches"] == 5
+        assert bounded.results["total_matches"] == 2
+        assert ranged.metadata["search_parameters"]["threshold_mode"] == "range"
+
+
+class TestMMRRerank:
+    """Test maximal marginal relevance reranking."""
+    
+    def setup_method(self):
+        """Set up a database where the two most relevant chunks are near duplicates."""
+        import faiss
+        
+        self.temp_dir = Path(tempfile.mkdtemp())
+        chunks = [
+            {
+                "id": i,
+                "content": f"Chunk {i}",
+                "source_file": "doc.txt",
+                "chunk_id": i,
+                "start_char": 0,
+                "end_char": 7,
+                "metadata": {}
+            }
+            for i in range(4)
+        ]
+        with open(self.temp_dir / "chunks.json", 'w') as f:
+            json.dump(chunks, f)
+        
+        # Chunks 0 and 1 overlap almost entirely; chunk 2 is less relevant but distinct
+        embeddings = np.array([
+            [0.95, np.sqrt(1 - 0.95 ** 2), 0.0],
+            [0.94, np.sqrt(1 - 0.94 ** 2), 0.0],
+            [0.85, 0.0, np.sqrt(1 - 0.85 ** 2)],
+            [0.30, np.sqrt(1 - 0.30 ** 2), 0.0]
+        ], dtype=np.float32)
+        index = faiss.IndexFlatIP(3)
+        index.add(embeddings)
+        faiss.write_index(index, str(self.temp_dir / "index.faiss"))
+        
+        self.query_embedding = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+    
+    def test_mmr_skips_near_duplicates(self):
+        """Test that MMR prefers a distinct chunk over a near duplicate."""
+        db = VectorDatabase(self.temp_dir)
+        candidates = db.search_records(self.query_embedding, top_k=4, similarity_threshold=0.0)
+        
+        diverse = db.mmr_rerank_records(self.query_embedding, candidates, top_k=2, mmr_lambda=0.5)
+        relevant = db.mmr_rerank_records(self.query_embedding, candidates, top_k=2, mmr_lambda=1.0)
+        
+        assert diverse.indices.tolist() == [0, 2]
+        assert diverse.scores[1] == pytest.approx(0.85, abs=1e-5)
+        assert relevant.indices.tolist() == [0, 1]
+        assert len(db.mmr_rerank_records(self.query_embedding, db._empty_records(), top_k=2)) == 0
+    
+    @pytest.mark.parametrize("fast_path", [False, True])
+    def test_mmr_through_agent(self, fast_path):
+        """Test that QueryInput enables MMR and records its parameters."""
+        encoder = Mock()
+        encoder.encode.side_effect = lambda texts, **kwargs: np.tile(self.query_embedding, (len(texts), 1))
+        agent = RetrieverAgent(
+            str(self.temp_dir),
+            str(self.temp_dir / "missing"),
+            log_file=str(self.temp_dir / "retriever_log.jsonl"),
+            fast_path=fast_path
+        )
+        agent._encoder = encoder
+        
+        plain = agent.retrieve(QueryInput(text="q", top_k=2, similarity_threshold=0.0))
+        diverse = agent.retrieve(QueryInput(text="q", top_k=2, similarity_threshold=0.0, rerank="mmr", mmr_lambda=0.5))
+        
+        assert [m["id"] for m in plain.results["rfp_matches"]] == [0, 1]
+        assert [m["id"] for m in diverse.results["rfp_matches"]] == [0, 2]
+        assert diverse.metadata["search_parameters"]["rerank"] == "mmr"
+        assert diverse.metadata["search_parameters"]["mmr_lambda"] == 0.5
+
+
 class TestRetrieverAgent:
     """Test the RetrieverAgent class."""
     
@@ -234,6 +626,7 @@ class TestRetrieverAgent:
         assert result.query["query_type"] == "text_only"
         assert result.results["total_matches"] == 2  # RFP + proposal matches
         assert result.metadata["model_used"] == "all-MiniLM-L6-v2"
+        assert set(result.metadata["stage_timings_ms"]) >= {"extract_ms", "encode_ms", "rfp_search_ms", "proposal_search_ms"}
     
     @patch('agents.retriever_agent.VectorDatabase')
     @patch('sentence_transformers.SentenceTransformer')
@@ -320,6 +713,118 @@ class TestRetrieverAgent:
             assert agent._determine_query_type(both) == "text_and_document"
 
 
+class TestMicroBatcher:
+    """Test the MicroBatcher class."""
+    
+    def test_coalesces_concurrent_submissions(self):
+        """Test that concurrent submissions share one batch call."""
+        calls = []
+        
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+        
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+        
+        async def run():
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+            await batcher.close()
+            return results
+        
+        assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+        assert calls == [[0, 1, 2, 3, 4]]
+        assert batcher.stats()["batch_size_histogram"] == {5: 1}
+    
+    def test_respects_max_batch_size(self):
+        """Test that batches are split at max_batch_size."""
+        batcher = MicroBatcher(lambda items: items, max_batch_size=2, max_wait_ms=50)
+        
+        async def run():
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+            await batcher.close()
+            return results
+        
+        assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+        stats = batcher.stats()
+        assert stats["max_batch_size_seen"] == 2
+        assert stats["items"] == 5
+    
+    def test_propagates_batch_errors(self):
+        """Test that a failing batch function fails every waiting submission."""
+        def batch_fn(items):
+            raise RuntimeError("batch failed")
+        
+        batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+        
+        async def run():
+            with pytest.raises(RuntimeError):
+                await batcher.submit("item")
+            await batcher.close()
+        
+        asyncio.run(run())
+
+
+class TestAsyncRetrieval:
+    """Test RetrieverAgent.aretrieve micro-batching."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+    
+    @patch('agents.retriever_agent.VectorDatabase')
+    @patch('sentence_transformers.SentenceTransformer')
+    def test_aretrieve_batches_queries(self, mock_transformer, mock_vector_db):
+        """Test that concurrent aretrieve calls share one encode and one search."""
+        mock_encoder = Mock()
+        mock_encoder.encode.side_effect = lambda texts, **kwargs: np.ones((len(texts), 3), dtype=np.float32)
+        mock_transformer.return_value = mock_encoder
+        
+        match = RetrievalMatch(
+            id=0,
+            content="Sample matching content",
+            source_file="test.txt",
+            similarity_score=0.8,
+            chunk_metadata={"document_type": "rfp"}
+        )
+        mock_db_instance = Mock()
+        mock_db_instance.is_loaded.return_value = True
+        mock_db_instance.search_batch.side_effect = lambda embeddings, top_ks, similarity_thresholds: [
+            [match] for _ in top_ks
+        ]
+        mock_vector_db.return_value = mock_db_instance
+        
+        agent = RetrieverAgent(
+            rfp_db_path=str(self.temp_dir / "rfp_db"),
+            proposal_db_path=str(self.temp_dir / "proposal_db"),
+            log_file=str(self.temp_dir / "retriever_log.jsonl"),
+            batch_max_size=16,
+            batch_max_wait_ms=50
+        )
+        
+        async def run():
+            queries = [QueryInput(text=f"query {i}", top_k=3) for i in range(4)]
+            results = await asyncio.gather(*(agent.aretrieve(q) for q in queries))
+            await agent.query_batcher.close()
+            return results
+        
+        results = asyncio.run(run())
+        
+        assert len(results) == 4
+        assert len({r.retrieval_id for r in results}) == 4
+        assert all(r.results["total_matches"] == 2 for r in results)
+        assert all(r.metadata["batch_size"] == 4 for r in results)
+        mock_encoder.encode.assert_called_once()
+        assert mock_db_instance.search_batch.call_count == 2  # one per database
+        assert agent.batching_stats()["batch_size_histogram"] == {4: 1}
+        assert all("queue_wait_ms" in r.metadata["stage_timings_ms"] for r in results)
+
+
 class TestQueryInput:
     """Test the QueryInput model."""
     
@@ -335,6 +840,12 @@ class TestQueryInput:
         assert query.top_k == 5
         assert query.similarity_threshold == 0.2
         assert query.document_path is None
+        assert query.search_mode == "dense"
+    
+    def test_invalid_search_mode(self):
+        """Test that unknown search modes are rejected."""
+        with pytest.raises(ValidationError):
+            QueryInput(text="query", search_mode="fuzzy")
     
     def test_query_input_with_document(self):
         """Test query input with document path."""
@@ -0,0 +1,63 @@
+"""
+Tests for the semantic near-duplicate cache
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend and repo root to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.harness import HashingEncoder
+from core.semantic_cache import SemanticCache
+
+
+class TestSemanticCache:
+    """Test near-duplicate lookup, partitioning and eviction."""
+
+    def setup_method(self):
+        """Set up a cache with a deterministic encoder."""
+        self.cache = SemanticCache(threshold=0.6, encoder=HashingEncoder(dimension=256))
+
+    def test_near_duplicate_hit(self):
+        """Test that a reworded prompt hits and an unrelated one misses."""
+        partition = ("technical", "executive_summary")
+        self.cache.add(partition, self.cache.embed("web app with user auth and reporting"), "cached section")
+
+        value, similarity = self.cache.lookup(partition, self.cache.embed("reporting web app with auth"))
+        assert value == "cached section"
+        assert similarity >= 0.6
+
+        value, similarity = self.cache.lookup(partition, self.cache.embed("mobile game backend"))
+        assert value is None
+        assert similarity < 0.6
+
+        assert self.cache.stats()["hits"] == 1
+        assert self.cache.stats()["misses"] == 1
+
+    def test_partitions_are_isolated(self):
+        """Test that entries only match lookups from the same partition."""
+        embedding = self.cache.embed("web app with user auth and reporting")
+        self.cache.add(("technical", "executive_summary"), embedding, "technical summary")
+
+        value, similarity = self.cache.lookup(("sales", "executive_summary"), embedding)
+        assert value is None
+        assert similarity is None
+
+    def test_oldest_entries_dropped(self):
+        """Test that the cache keeps at most max_entries."""
+        cache = SemanticCache(threshold=0.99, encoder=HashingEncoder(dimension=256), max_entries=2)
+        texts = ["cloud migration plan", "data analytics dashboard", "mobile banking app"]
+        for text in texts:
+            cache.add("partition", cache.embed(text), text)
+
+        assert cache.lookup("partition", cache.embed(texts[0]))[0] is None
+        assert cache.lookup("partition", cache.embed(texts[1]))[0] == texts[1]
+        assert cache.lookup("partition", cache.embed(texts[2]))[0] == texts[2]
+        assert cache.stats()["entries"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+"""
+Tests for prompt token estimation and budgeting
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.token_budget import TokenBudgeter, TokenEstimator
+
+
+class TestTokenEstimator:
+    """Test token estimation, calibration and truncation."""
+
+    def test_estimate(self):
+        """Test the default characters-per-token ratio."""
+        estimator = TokenEstimator()
+
+        assert estimator.estimate("") == 0
+        assert estimator.estimate("abc") == 1
+        assert estimator.estimate("a" * 400) == 100
+
+    def test_calibration_moves_towards_observed_ratio(self):
+        """Test that reported token counts calibrate the ratio."""
+        estimator = TokenEstimator(smoothing=0.5)
+        for _ in range(20):
+            estimator.observe("a" * 300, 100)
+
+        assert estimator.chars_per_token == pytest.approx(3.0, abs=0.01)
+        assert estimator.estimate("a" * 300) == 100
+
+        # Implausible observations are clamped
+        estimator.observe("a" * 10, 1000)
+        assert estimator.chars_per_token >= 1.5
+
+    def test_exact_count(self):
+        """Test that count() prefers the exact counter."""
+        assert TokenEstimator().count("a" * 40) == 10
+        assert TokenEstimator(count_fn=lambda text: 7).count("a" * 40) == 7
+
+    def test_truncate(self):
+        """Test truncation at a word boundary."""
+        estimator = TokenEstimator()
+        text = " ".join(["word"] * 200)
+
+        truncated = estimator.truncate(text, 50)
+
+        assert estimator.estimate(truncated) <= 50
+        assert truncated.endswith(" …")
+        assert not truncated[:-2].endswith(" ")
+        assert estimator.truncate("short text", 50) == "short text"
+
+
+class TestTokenBudgeter:
+    """Test context selection under a budget."""
+
+    def setup_method(self):
+        """Set up a budgeter with a minimum truncated size of 10 tokens."""
+        self.budgeter = TokenBudgeter(TokenEstimator(), min_item_tokens=10)
+
+    def test_ranks_by_score(self):
+        """Test that higher scored items are chosen first."""
+        items = ["a" * 200, "b" * 200, "c" * 200]
+
+        selected = self.budgeter.fit(items, budget=100, scores=[0.1, 0.9, 0.5])
+
+        assert selected == ["b" * 200, "c" * 200]
+
+    def test_truncates_last_item(self):
+        """Test that remaining budget is filled with a truncated item."""
+        items = ["first " * 20, "second " * 100]
+
+        selected = self.budgeter.fit(items, budget=60)
+
+        assert selected[0] == items[0]
+        assert len(selected) == 2 and selected[1].endswith(" …")
+        assert sum(self.budgeter.estimator.estimate(item) for item in selected) <= 60
+
+    def test_max_items_and_separator(self):
+        """Test the item limit and that separators are counted."""
+        items = ["x" * 40] * 5
+
+        assert len(self.budgeter.fit(items, budget=1000, max_items=3)) == 3
+        # 10 tokens per item plus 5 per separator
+        assert len(self.budgeter.fit(items, budget=40, separator="-" * 20)) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+"""
+Tests for the usage metrics store
+"""
+
+import sqlite3
+import tempfile
+import pytest
+from datetime import datetime
+from pathlib import Path
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from core.usage_store import UsageRecord, UsageStore, estimate_cost, get_usage_store
+
+
+def make_record(n, persona="technical", section_type="executive_summary", timestamp=1_700_000_000.0, **kwargs):
+    """Usage record with predictable values."""
+    values = dict(
+        generation_id=f"gen-{n}",
+        timestamp=timestamp + n,
+        model="gemini-2.5-flash",
+        persona=persona,
+        section_type=section_type,
+        prompt_tokens=1000,
+        completion_tokens=500,
+        generation_time_ms=float(100 * (n + 1))
+    )
+    values.update(kwargs)
+    return UsageRecord(**values)
+
+
+class TestUsageStore:
+    """Test the UsageStore class."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.store = UsageStore(self.temp_dir / "usage.sqlite")
+
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        import shutil
+        self.store.close()
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def test_record_and_flush(self):
+        """Test that queued records are written in batches after flush."""
+        for i in range(10):
+            assert self.store.record(make_record(i))
+        assert self.store.flush()
+
+        records = self.store.records()
+        assert [r.generation_id for r in records] == [f"gen-{i}" for i in range(10)]
+        assert self.store.stats()["written"] == 10
+
+    def test_wal_mode(self):
+        """Test that the database is opened in write-ahead logging mode."""
+        conn = sqlite3.connect(str(self.temp_dir / "usage.sqlite"))
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_close_writes_pending_records(self):
+        """Test that closing the store writes what is still queued."""
+        self.store.record(make_record(0))
+        self.store.close()
+
+        reopened = UsageStore(self.temp_dir / "usage.sqlite")
+        assert len(reopened.records()) == 1
+        assert not self.store.record(make_record(1))
+        reopened.close()
+
+    def test_summary_by_persona(self):
+        """Test token totals, latency percentiles and cost per persona."""
+        for i in range(10):
+            self.store.record(make_record(i, persona="technical", cache_hit=i < 2, retries=1))
+        self.store.record(make_record(20, persona="executive"))
+        self.store.flush()
+
+        summaries = {s["persona"]: s for s in self.store.summary(group_by=["persona"])}
+        technical = summaries["technical"]
+        assert technical["sections"] == 10
+        assert technical["total_tokens"] == 15000
+        assert technical["latency_ms_p50"] == pytest.approx(550.0)
+        assert technical["latency_ms_p95"] == pytest.approx(955.0)
+        assert technical["cache_hit_rate"] == pytest.approx(0.2)
+        assert technical["retries"] == 10
+        assert technical["cost_usd"] == pytest.approx(10 * estimate_cost("gemini-2.5-flash", 1000, 500))
+        assert summaries["executive"]["sections"] == 1
+
+    def test_summary_time_window_and_filters(self):
+        """Test that summaries only cover the requested window and filters."""
+        for i in range(10):
+            self.store.record(make_record(i, section_type="budget" if i % 2 else "timeline"))
+        self.store.flush()
+
+        window = self.store.summary(group_by=["section_type"], since=1_700_000_005.0)
+        assert sum(s["sections"] for s in window) == 5
+
+        budget = self.store.summary(group_by=["model"], section_type="budget")
+        assert budget[0]["sections"] == 5
+
+        since = datetime.fromtimestamp(1_700_000_008.0).isoformat()
+        assert self.store.summary(group_by=["persona"], since=since)[0]["sections"] == 2
+
+    def test_summary_rejects_unknown_columns(self):
+        """Test that only known columns can be grouped or filtered on."""
+        with pytest.raises(ValueError):
+            self.store.summary(group_by=["generation_id"])
+        with pytest.raises(ValueError):
+            self.store.records(prompt_tokens=1)
+
+    def test_unpriced_models(self):
+        """Test that models without a price are counted but not costed."""
+        self.store.record(make_record(0, model="custom-model"))
+        self.store.flush()
+
+        summary = self.store.summary(group_by=["model"])[0]
+        assert summary["cost_usd"] == 0
+        assert summary["unpriced_sections"] == 1
+        assert estimate_cost("custom-model", 1, 1) is None
+
+    def test_import_csv(self):
+        """Test importing CSV files with current and older columns, once each."""
+        csv_path = self.temp_dir / "token_usage.csv"
+        csv_path.write_text(
+            "generation_id,timestamp,model,persona,prompt_tokens,completion_tokens,total_tokens,section_type\n"
+            "a,2024-01-01T10:00:00,gemini-2.5-flash,technical,100,50,150,budget\n"
+            "bad,not-a-date,gemini-2.5-flash,technical,1,1,2,budget\n"
+        )
+
+        assert self.store.import_csv(csv_path) == 1
+        assert self.store.import_csv(csv_path) == 0
+
+        record = self.store.records()[0]
+        assert record.generation_id == "a"
+        assert record.prompt_tokens == 100
+        assert record.generation_time_ms == 0
+        assert record.time_to_first_token_ms is None
+
+    def test_shared_store(self):
+        """Test that stores are shared per database file."""
+        first = get_usage_store(self.temp_dir / "shared.sqlite")
+        assert get_usage_store(self.temp_dir / "shared.sqlite") is first
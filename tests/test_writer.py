@@ -21,6 +21,7 @@ from datetime import datetime
 # Import directly to avoid package init issues
 import sys
 sys.path.insert(0, 'backend/agents')
+sys.path.insert(0, 'backend')
 from writer_agent import WriterAgent, WriterInput, WriterOutput, Section
 
 
@@ -338,7 +339,7 @@ Detail the technical solution and architecture."""
         assert "generation_metadata" in saved_data
     
     def test_token_usage_logging(self, temp_dir, mock_personas, mock_section_prompts):
-        """Test token usage CSV logging."""
+        """Test token usage logging to the usage metrics store."""
         with patch('backend.agents.writer_agent.genai'):
             agent = WriterAgent(
                 personas_path=str(mock_personas),
@@ -357,18 +358,18 @@ Detail the technical solution and architecture."""
                 section_type="executive_summary",
                 generation_time_ms=1500.0
             )
+            assert agent.flush_logs()
             
-            # Check CSV file created and contains data
-            csv_file = temp_dir / "logs" / "token_usage.csv"
-            assert csv_file.exists()
+            # Check the store was created and holds the record
+            assert (temp_dir / "logs" / "usage_metrics.sqlite").exists()
             
-            with open(csv_file, 'r') as f:
-                content = f.read()
-                assert generation_id in content
-                assert "gemini-2.5-flash" in content
-                assert "technical" in content
-                assert "100" in content
-                assert "50" in content
+            records = agent.usage_store.records()
+            assert len(records) == 1
+            assert records[0].generation_id == generation_id
+            assert records[0].model == "gemini-2.5-flash"
+            assert records[0].persona == "technical"
+            assert records[0].prompt_tokens == 100
+            assert records[0].completion_tokens == 50
     
     def test_error_handling(self, temp_dir):
         """Test error handling for missing files and invalid configurations."""
@@ -425,6 +426,946 @@ Detail the technical solution and architecture."""
         assert len(section.sources_referenced) == 1
         assert section.confidence_score == 0.9
 
+    
+    @staticmethod
+    def _slow_model(delay: float, fail_on: str = None):
+        """Create a mock Gemini model whose calls take a fixed time."""
+        import threading
+        import time
+        
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+        
+        def generate_content(prompt):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            try:
+                time.sleep(delay)
+                if fail_on and fail_on in prompt:
+                    raise RuntimeError("quota exceeded")
+                mock_response = Mock()
+                mock_response.candidates = [Mock()]
+                mock_response.candidates[0].content.parts = [Mock()]
+                mock_response.candidates[0].content.parts[0].text = "Section content for the proposal."
+                mock_response.usage_metadata = Mock()
+                mock_response.usage_metadata.prompt_token_count = 100
+                mock_response.usage_metadata.candidates_token_count = 40
+                return mock_response
+            finally:
+                with lock:
+                    state["active"] -= 1
+        
+        model = Mock()
+        model.generate_content.side_effect = generate_content
+        return model, state
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_concurrent_section_generation(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that sections run in parallel, keep their order and sum token usage."""
+        import time
+        
+        model, state = self._slow_model(delay=0.2)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            max_concurrent_sections=2
+        )
+        writer_input = WriterInput(
+            user_prompt="Build a web application",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach", "project_management"]
+        )
+        
+        start = time.perf_counter()
+        result = agent.generate(writer_input)
+        elapsed = time.perf_counter() - start
+        
+        assert state["peak"] == 2
+        assert elapsed < 0.55  # two waves of 0.2s rather than three
+        assert [s["section_type"] for s in result.generated_content["sections"]] == writer_input.sections_to_generate
+        assert [t["section_type"] for t in result.generation_metadata["section_timings"]] == writer_input.sections_to_generate
+        assert all(t["generation_time_ms"] >= 200 for t in result.generation_metadata["section_timings"])
+        assert result.generation_metadata["token_usage"]["prompt_tokens"] == 300
+        assert result.generation_metadata["token_usage"]["completion_tokens"] == 120
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_concurrent_section_failure(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that a failing section fails the whole generation."""
+        model, _ = self._slow_model(delay=0.01, fail_on="Technical Approach")
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            max_concurrent_sections=3
+        )
+        
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            agent.generate(WriterInput(
+                user_prompt="Build a web application",
+                persona="technical",
+                sections_to_generate=["executive_summary", "technical_approach"]
+            ))
+    
+    @staticmethod
+    def _stream_response(chunks, delay=0.0):
+        """Create a mock streaming response yielding text chunks."""
+        import time
+        
+        class StreamingResponse:
+            usage_metadata = None
+            
+            def __iter__(self):
+                for text in chunks:
+                    time.sleep(delay)
+                    chunk = Mock()
+                    chunk.candidates = [Mock()]
+                    chunk.candidates[0].content.parts = [Mock(text=text)]
+                    yield chunk
+                self.usage_metadata = Mock(prompt_token_count=120, candidates_token_count=30)
+        
+        return StreamingResponse()
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_streaming_generation(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test streamed deltas, final output and time-to-first-token logging."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = lambda prompt, stream=False: self._stream_response(
+            ["## Overview\n\n", "We will deliver ", "on time."], delay=0.02
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        events = list(agent.generate_stream(WriterInput(
+            user_prompt="Build a web application",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach"]
+        )))
+        
+        kinds = [event["event"] for event in events]
+        assert kinds[0] == "start" and kinds[-1] == "done"
+        assert kinds.count("delta") == 6
+        assert kinds.count("section") == 2
+        
+        deltas = [e["text"] for e in events if e["event"] == "delta" and e["section_type"] == "executive_summary"]
+        assert "".join(deltas) == "## Overview\n\nWe will deliver on time."
+        
+        section = next(e["section"] for e in events if e["event"] == "section")
+        metadata = section["generation_metadata"]
+        assert 0 < metadata["time_to_first_token_ms"] < metadata["generation_time_ms"]
+        assert metadata["prompt_tokens"] == 120
+        
+        output = events[-1]["output"]
+        assert [s["section_type"] for s in output["generated_content"]["sections"]] == ["executive_summary", "technical_approach"]
+        assert output["generation_metadata"]["token_usage"]["total_tokens"] == 300
+        
+        assert agent.flush_logs()
+        records = agent.usage_store.records()
+        assert len(records) == 2
+        assert records[0].time_to_first_token_ms < records[0].generation_time_ms
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_streaming_error_event(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that a failed stream ends with an error event."""
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = RuntimeError("stream interrupted")
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        events = list(agent.generate_stream(WriterInput(user_prompt="Build a web application")))
+        
+        assert events[-1]["event"] == "error"
+        assert "stream interrupted" in events[-1]["message"]
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_streaming_stall_times_out(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that a stream stalling between chunks ends at the call deadline."""
+        import time
+        
+        mock_model = Mock()
+        mock_model.generate_content.side_effect = lambda prompt, stream=False, **kwargs: self._stream_response(
+            ["## Overview\n\n", "never arrives"], delay=1.0
+        )
+        mock_genai.GenerativeModel.return_value = mock_model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            call_timeout_s=0.2,
+            max_attempts=1
+        )
+        start = time.perf_counter()
+        events = list(agent.generate_stream(WriterInput(
+            user_prompt="Build a web application",
+            sections_to_generate=["executive_summary"]
+        )))
+        
+        assert time.perf_counter() - start < 0.8
+        assert events[-1]["event"] == "error"
+        assert "deadline" in events[-1]["message"]
+    
+    def test_token_csv_history_is_imported(self, temp_dir, mock_personas, mock_section_prompts):
+        """Test that token usage CSV files from earlier versions are imported once."""
+        logs_dir = temp_dir / "logs"
+        logs_dir.mkdir()
+        (logs_dir / "token_usage.csv").write_text(
+            "generation_id,timestamp,model,persona,prompt_tokens,completion_tokens,total_tokens,"
+            "section_type,generation_time_ms,time_to_first_token_ms\n"
+            "a,2024-01-01T10:00:00,gemini-2.5-flash,technical,100,50,150,executive_summary,900.0,120.0\n"
+        )
+        (logs_dir / "token_usage.20240101000000.csv").write_text(
+            "generation_id,timestamp,model,persona,prompt_tokens,completion_tokens,total_tokens,section_type,generation_time_ms\n"
+            "b,2023-12-31T10:00:00,gemini-2.5-flash,executive,80,40,120,budget,700.0\n"
+        )
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(logs_dir)
+        )
+        agent._log_token_usage("new", "gemini-2.5-flash", "technical", 1, 1, "executive_summary", 10.0, 5.0)
+        assert agent.flush_logs()
+        
+        records = agent.usage_store.records()
+        assert [r.generation_id for r in records] == ["b", "a", "new"]
+        assert records[0].time_to_first_token_ms is None
+        assert not list(logs_dir.glob("*.csv"))
+        assert len(list(logs_dir.glob("*.csv.imported"))) == 2
+        
+        WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(logs_dir)
+        )
+        assert len(agent.usage_store.records()) == 3
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_results_saved_to_output_sink(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that results are stored by the configured sink unless a directory is given."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            output_sink="sqlite",
+            output_dir=str(temp_dir / "outputs")
+        )
+        result = agent.generate(WriterInput(user_prompt="Build a web application", sections_to_generate=["executive_summary"]))
+        
+        location = agent.save_result(result)
+        assert agent.flush_outputs()
+        assert location.endswith(f"writer_output.sqlite#{result.generation_id}")
+        saved = agent.output_sink.get(result.generation_id)
+        assert saved["generated_content"]["full_content"]["markdown"] == result.generated_content["full_content"]["markdown"]
+        
+        saved_path = agent.save_result(result, str(temp_dir / "files"))
+        assert json.loads(Path(saved_path).read_text())["generation_id"] == result.generation_id
+        assert (temp_dir / "files" / f"proposal_{result.generation_id}.html").exists()
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_model_clients_are_pooled(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that sections share a client that keeps the safety settings."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        writer_input = WriterInput(user_prompt="Build a web application", persona="technical")
+        agent.generate(writer_input)
+        agent.generate(writer_input)
+        
+        # One client for the default config, one for the request's generation_params
+        assert mock_genai.GenerativeModel.call_count == 2
+        for call in mock_genai.GenerativeModel.call_args_list:
+            assert len(call.kwargs["safety_settings"]) == 4
+        assert model.generate_content.call_count == 6
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_response_cache_hits(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that deterministic requests are served from the response cache."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            response_cache_path=str(temp_dir / "cache" / "responses.sqlite")
+        )
+        writer_input = WriterInput(
+            user_prompt="Build a web application",
+            persona="technical",
+            sections_to_generate=["executive_summary"],
+            generation_params={"temperature": 0.0, "max_tokens": 2000}
+        )
+        
+        first = agent.generate(writer_input)
+        second = agent.generate(writer_input)
+        
+        assert model.generate_content.call_count == 1
+        first_section = first.generated_content["sections"][0]
+        second_section = second.generated_content["sections"][0]
+        assert first_section["content"] == second_section["content"]
+        assert first.generation_metadata["cache_hits"] == 0
+        assert second.generation_metadata["cache_hits"] == 1
+        assert second.generation_metadata["token_usage"]["total_tokens"] == 0
+        
+        # A different prompt misses the cache
+        agent.generate(WriterInput(
+            user_prompt="Build a mobile application",
+            persona="technical",
+            sections_to_generate=["executive_summary"],
+            generation_params={"temperature": 0.0, "max_tokens": 2000}
+        ))
+        assert model.generate_content.call_count == 2
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_response_cache_skips_sampled_requests(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that non-zero temperature requests are cached only when opted in."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            response_cache_path=str(temp_dir / "responses.sqlite")
+        )
+        sampled = WriterInput(user_prompt="Build a web application", sections_to_generate=["executive_summary"])
+        agent.generate(sampled)
+        agent.generate(sampled)
+        assert model.generate_content.call_count == 2
+        
+        opted_in = WriterInput(
+            user_prompt="Build a web application",
+            sections_to_generate=["executive_summary"],
+            generation_params={"temperature": 0.7, "cache": True}
+        )
+        agent.generate(opted_in)
+        events = list(agent.generate_stream(opted_in))
+        assert model.generate_content.call_count == 3
+        
+        section = next(event["section"] for event in events if event["event"] == "section")
+        assert section["generation_metadata"]["cache_hit"] is True
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_semantic_cache_reuses_near_duplicates(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that a reworded prompt reuses the section generated for the original."""
+        from benchmarks.harness import HashingEncoder
+        
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            semantic_cache_threshold=0.6
+        )
+        agent.semantic_cache._encoder = HashingEncoder(dimension=256)
+        
+        def request(user_prompt, persona="technical"):
+            return WriterInput(user_prompt=user_prompt, persona=persona, sections_to_generate=["executive_summary"])
+        
+        agent.generate(request("web app with user auth and reporting"))
+        result = agent.generate(request("reporting web app with auth"))
+        
+        assert model.generate_content.call_count == 1
+        metadata = result.generated_content["sections"][0]["generation_metadata"]
+        assert metadata["cache_hit"] is True
+        assert metadata["cache_similarity"] >= 0.6
+        
+        # Another persona or an unrelated prompt is generated afresh
+        agent.generate(request("reporting web app with auth", persona="sales"))
+        agent.generate(request("mobile game backend"))
+        assert model.generate_content.call_count == 3
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_semantic_cache_with_context_compression(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that paraphrased prompts share a cache partition although their compressed context differs."""
+        from benchmarks.harness import HashingEncoder
+        
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            semantic_cache_threshold=0.5,
+            context_compression=True,
+            compression_sentences_per_match=1
+        )
+        agent.semantic_cache._encoder = HashingEncoder(dimension=256)
+        agent.context_compressor._encoder = HashingEncoder(dimension=256)
+        retrieval_context = {"matches": [{
+            "text": (
+                "The web portal uses OAuth2 login with JWT tokens for every user. "
+                "Reporting dashboards were built with scheduled exports for managers."
+            ),
+            "score": 0.9,
+            "metadata": {"source": "portal.pdf", "chunk_id": "chunk_1"}
+        }]}
+        
+        def request(user_prompt):
+            return WriterInput(
+                user_prompt=user_prompt,
+                persona="technical",
+                retrieval_context=retrieval_context,
+                sections_to_generate=["executive_summary"]
+            )
+        
+        first = request("web portal with user login and reporting dashboards for managers")
+        second = request("web portal with user login and reporting dashboards with OAuth2 login")
+        contexts = [agent._section_contexts(writer_input)["executive_summary"] for writer_input in (first, second)]
+        assert contexts[0]["matches"][0]["text"] != contexts[1]["matches"][0]["text"]
+        
+        agent.generate(first)
+        result = agent.generate(second)
+        
+        assert model.generate_content.call_count == 1
+        assert result.generated_content["sections"][0]["generation_metadata"]["cache_hit"] is True
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_semantic_partition_skips_token_counting(self, mock_genai, temp_dir, mock_personas, mock_section_prompts, mock_retrieval_context):
+        """Test that the semantic cache partition is keyed without rendering or counting a prompt."""
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            prompt_token_budget=2000,
+            exact_token_counting=True
+        )
+        model = mock_genai.GenerativeModel.return_value
+        
+        partition = agent._semantic_partition("executive_summary", "technical", mock_retrieval_context)
+        assert model.count_tokens.call_count == 0
+        assert agent._semantic_partition("executive_summary", "technical", mock_retrieval_context) == partition
+        assert agent._semantic_partition("technical_approach", "technical", mock_retrieval_context) != partition
+        assert agent._semantic_partition("executive_summary", "sales", mock_retrieval_context) != partition
+        assert agent._semantic_partition("executive_summary", "technical") != partition
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_shared_prefix_context_cache(self, mock_genai, temp_dir, mock_personas, mock_section_prompts, mock_retrieval_context):
+        """Test that sections continue one cached prefix and report the tokens saved."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            context_cache="local"
+        )
+        writer_input = WriterInput(
+            user_prompt="Build a web application",
+            persona="technical",
+            retrieval_context=mock_retrieval_context,
+            sections_to_generate=["executive_summary", "technical_approach"]
+        )
+        # Estimated before generating, which calibrates the estimator
+        prefix_tokens = agent.token_estimator.estimate(agent._construct_prompt_prefix("Build a web application", "technical", mock_retrieval_context))
+        result = agent.generate(writer_input)
+        
+        # The local backend sends prefix + suffix, which is the full section prompt
+        sent = [call.args[0] for call in model.generate_content.call_args_list]
+        assert sent == [
+            agent._construct_section_prompt(section_type, "Build a web application", "technical", mock_retrieval_context)
+            for section_type in writer_input.sections_to_generate
+        ]
+        
+        context_cache = result.generation_metadata["context_cache"]
+        assert context_cache["backend"] == "local"
+        assert context_cache["prefix_tokens"] == prefix_tokens
+        assert context_cache["prompt_tokens_saved"] == prefix_tokens
+        
+        # A single section has nothing to share
+        single = agent.generate(WriterInput(user_prompt="Build a web application", sections_to_generate=["executive_summary"]))
+        assert single.generation_metadata["context_cache"]["prompt_tokens_saved"] == 0
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_context_cache_failure_falls_back(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that sections send full prompts when the prefix cannot be cached."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            context_cache="gemini"
+        )
+        agent.context_cache.min_prefix_tokens = 0
+        
+        with patch('google.generativeai.caching.CachedContent.create', side_effect=RuntimeError("not supported")):
+            result = agent.generate(WriterInput(
+                user_prompt="Build a web application",
+                persona="technical",
+                sections_to_generate=["executive_summary", "technical_approach"]
+            ))
+        
+        assert model.generate_content.call_count == 2
+        assert "You are an expert proposal writer" in model.generate_content.call_args.args[0]
+        assert result.generation_metadata["context_cache"]["backend"] is None
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_prompt_token_budget(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that retrieved context is ranked and trimmed to the prompt budget."""
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        retrieval_context = {"matches": [
+            {"text": "Low relevance background. " * 80, "score": 0.4, "metadata": {"source": "background.pdf"}},
+            {"text": "Authentication used OAuth2 and JWT tokens.", "score": 0.9, "metadata": {"source": "auth.pdf"}}
+        ]}
+        no_context = agent._construct_section_prompt("technical_approach", "Build a web app", "technical")
+        budget = agent.token_estimator.estimate(no_context) + 120
+        agent.prompt_token_budget = budget
+        
+        for section_type in ["executive_summary", "technical_approach"]:
+            prompt = agent._construct_section_prompt(section_type, "Build a web app", "technical", retrieval_context)
+            assert agent.token_estimator.estimate(prompt) <= budget
+            assert prompt.index("auth.pdf") < prompt.index("background.pdf")
+            assert "Low relevance background. " * 80 not in prompt
+        
+        # Sources report the matches the budget kept, best first
+        agent.prompt_token_budget = agent.token_estimator.estimate(no_context) + 40
+        included = []
+        prompt = agent._construct_section_prompt("executive_summary", "Build a web app", "technical", retrieval_context, included)
+        assert "background.pdf" not in prompt
+        assert [match["metadata"]["source"] for match in included] == ["auth.pdf"]
+        
+        agent.model, _ = self._slow_model(delay=0.0)
+        section = agent._generate_section_content("executive_summary", "Build a web app", "technical", retrieval_context)
+        assert section["sources_referenced"] == ["auth.pdf"]
+        agent.prompt_token_budget = budget
+        
+        # An exact count that never fits drops every match
+        mock_genai.GenerativeModel.return_value.count_tokens.return_value = Mock(total_tokens=10 ** 6)
+        exact_agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            prompt_token_budget=budget,
+            exact_token_counting=True
+        )
+        included = []
+        prompt = exact_agent._construct_section_prompt("executive_summary", "Build a web app", "technical", retrieval_context, included)
+        assert "No specific context provided." in prompt
+        assert included == []
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_context_compression(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that sections are prompted with compressed context and report the ratio."""
+        from benchmarks.harness import HashingEncoder
+        
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            context_compression=True,
+            compression_sentences_per_match=1
+        )
+        agent.context_compressor._encoder = HashingEncoder(dimension=512)
+        retrieval_context = {"matches": [{
+            "text": (
+                "Office furniture was delivered to the second floor in March. "
+                "Login authentication uses OAuth2 with JWT tokens for the web app. "
+                "The cafeteria menu changes on a monthly schedule for staff."
+            ),
+            "score": 0.9,
+            "metadata": {"source": "auth.pdf"}
+        }]}
+        
+        result = agent.generate(WriterInput(
+            user_prompt="web app login authentication",
+            persona="technical",
+            retrieval_context=retrieval_context,
+            sections_to_generate=["executive_summary", "technical_approach"]
+        ))
+        
+        for call in model.generate_content.call_args_list:
+            assert "OAuth2 with JWT tokens" in call.args[0]
+            assert "cafeteria" not in call.args[0]
+        
+        compression = result.generation_metadata["context_compression"]
+        assert 0 < compression["ratio"] < 0.5
+        section_metadata = result.generated_content["sections"][0]["generation_metadata"]
+        assert section_metadata["context_compression"]["ratio"] < 0.5
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_context_compression_skips_unused_matches(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that only the matches a prompt can include are compressed."""
+        from benchmarks.harness import HashingEncoder
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            context_compression=True
+        )
+        agent.context_compressor._encoder = HashingEncoder(dimension=64)
+        matches = [
+            {"text": f"Match number {i} describes a delivered project in detail.", "score": i / 10, "metadata": {"source": f"{i}.pdf"}}
+            for i in range(8)
+        ]
+        writer_input = WriterInput(
+            user_prompt="Build a web app",
+            retrieval_context={"matches": matches},
+            sections_to_generate=["executive_summary"]
+        )
+        
+        with patch.object(agent.context_compressor, "compress", wraps=agent.context_compressor.compress) as compress:
+            agent._section_contexts(writer_input)
+            assert compress.call_args.args[0] == matches[:WriterAgent.MAX_CONTEXT_MATCHES]
+            
+            # A token budget picks the best scored matches
+            agent.prompt_token_budget = 4000
+            agent._section_contexts(writer_input)
+            assert compress.call_args.args[0] == matches[-WriterAgent.MAX_CONTEXT_MATCHES:]
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_full_html_stitched_from_sections(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that the document HTML and TOC match a full re-render of the Markdown."""
+        import markdown
+        
+        model, _ = self._slow_model(delay=0.0)
+        model.generate_content.side_effect = None
+        response = model.generate_content.return_value
+        response.candidates = [Mock()]
+        response.candidates[0].content.parts = [Mock(text="## Overview\n\n| Phase | Weeks |\n|---|---|\n| Build | 16 |")]
+        response.usage_metadata = Mock(prompt_token_count=100, candidates_token_count=40)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        result = agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach"]
+        ))
+        
+        full_content = result.generated_content["full_content"]
+        converter = markdown.Markdown(extensions=['tables', 'fenced_code', 'toc'])
+        assert full_content["html"] == converter.convert(full_content["markdown"])
+        assert full_content["toc"] == converter.toc
+        assert 'id="overview_1"' in full_content["html"]
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_transient_errors_are_retried(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that rate-limited calls are retried and counted in the metadata."""
+        from google.api_core import exceptions as api_exceptions
+        
+        model, _ = self._slow_model(delay=0.0)
+        generate = model.generate_content.side_effect
+        failures = {"left": 1}
+        
+        def rate_limited_once(prompt):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise api_exceptions.ResourceExhausted("quota exceeded")
+            return generate(prompt)
+        
+        model.generate_content.side_effect = rate_limited_once
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            max_attempts=2
+        )
+        agent.llm_caller.backoff_initial_s = 0.01
+        result = agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach"]
+        ))
+        
+        assert len(result.generated_content["sections"]) == 2
+        assert result.generated_content["sections"][0]["generation_metadata"]["resilience"]["retries"] == 1
+        assert result.generation_metadata["resilience"]["retries"] == 1
+        assert result.generation_metadata["resilience"]["failed_sections"] == []
+        assert result.generation_metadata["partial"] is False
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_partial_results(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that completed sections are kept when another section fails."""
+        model, _ = self._slow_model(delay=0.01, fail_on="Technical Approach")
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            max_concurrent_sections=2,
+            allow_partial_results=True
+        )
+        writer_input = WriterInput(
+            user_prompt="Build a web application",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach"]
+        )
+        
+        result = agent.generate(writer_input)
+        
+        assert [s["section_type"] for s in result.generated_content["sections"]] == ["executive_summary"]
+        assert result.generation_metadata["partial"] is True
+        assert result.generation_metadata["resilience"]["failed_sections"] == [
+            {"section_type": "technical_approach", "error": "quota exceeded"}
+        ]
+        
+        # Streaming reports the failed section and carries on
+        def stream_or_fail(prompt, stream=False):
+            if "Technical Approach" in prompt:
+                raise RuntimeError("quota exceeded")
+            return self._stream_response(["Streamed content."])
+        
+        model.generate_content.side_effect = stream_or_fail
+        events = list(agent.generate_stream(writer_input))
+        
+        assert [e["event"] for e in events] == ["start", "delta", "section", "section_error", "done"]
+        assert events[3]["section_type"] == "technical_approach"
+        assert events[-1]["output"]["generation_metadata"]["partial"] is True
+        
+        # Nothing to keep when every section fails
+        model.generate_content.side_effect = RuntimeError("quota exceeded")
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            agent.generate(writer_input)
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_rate_limited_generation(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that calls queue for quota shared by agents and settle real usage."""
+        model, _ = self._slow_model(delay=0.0)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            max_concurrent_sections=2,
+            requests_per_minute=600
+        )
+        other = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            requests_per_minute=600
+        )
+        assert other.rate_limiter is agent.rate_limiter
+        
+        # Leave one request in the bucket; the next refills after 0.1s
+        for _ in range(599):
+            agent.rate_limiter.acquire()
+        
+        result = agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary", "technical_approach"]
+        ))
+        
+        waits = [s["generation_metadata"]["rate_limit_wait_ms"] for s in result.generated_content["sections"]]
+        assert max(waits) >= 50
+        rate_limit = result.generation_metadata["rate_limit"]
+        assert rate_limit["wait_ms"] == pytest.approx(sum(waits))
+        assert rate_limit["admitted"] == 601
+        assert rate_limit["queue_depth"] == 0
+        
+        # Token reservations are settled with the reported usage (100 + 40 per call)
+        token_agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            model_name="gemini-test",
+            tokens_per_minute=100000
+        )
+        token_agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary"]
+        ))
+        assert token_agent.rate_limiter._tokens == pytest.approx(100000 - 140, abs=5)
+        # Completions are now expected to be about as long as the last one
+        assert token_agent._estimated_request_tokens("a" * 400) == token_agent.token_estimator.estimate("a" * 400) + 40
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_rate_limit_settles_winning_attempt(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that the winner is charged its usage and a losing hedge at least its prompt."""
+        import threading
+        import time
+        
+        model, _ = self._slow_model(delay=0.0)
+        respond = model.generate_content.side_effect
+        calls = []
+        lock = threading.Lock()
+        
+        def primary_wins(prompt):
+            with lock:
+                calls.append(prompt)
+                first = len(calls) == 1
+            # The hedge is sent after 0.05s and is still running when the primary answers
+            time.sleep(0.2 if first else 1.0)
+            return respond(prompt)
+        
+        model.generate_content.side_effect = primary_wins
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            model_name="gemini-hedged",
+            tokens_per_minute=100000,
+            hedge_requests=True
+        )
+        agent.llm_caller.hedge_min_samples = 1
+        agent.llm_caller.hedge_min_delay_s = 0.05
+        agent.llm_caller.observe_latency(0.01)
+        # Stop the token bucket refilling while the calls sleep
+        frozen = agent.rate_limiter.clock()
+        agent.rate_limiter.clock = lambda: frozen
+        
+        result = agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary"]
+        ))
+        
+        assert result.generation_metadata["resilience"]["hedges"] == 1
+        assert len(calls) == 2
+        # The reported 100 + 40 tokens are charged for the winner and the 100 prompt tokens for the losing hedge
+        assert agent.rate_limiter._tokens == pytest.approx(100000 - 240, abs=5)
+    
+    @patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"})
+    @patch('writer_agent.genai')
+    def test_hedge_admitted_after_settlement_is_not_sent(self, mock_genai, temp_dir, mock_personas, mock_section_prompts):
+        """Test that a hedge still queued for quota when the request settles releases its permit."""
+        import time
+        
+        model, _ = self._slow_model(delay=0.2)
+        mock_genai.GenerativeModel.return_value = model
+        
+        agent = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            model_name="gemini-queued-hedge",
+            requests_per_minute=1,
+            tokens_per_minute=100000,
+            hedge_requests=True
+        )
+        agent.llm_caller.hedge_min_samples = 1
+        agent.llm_caller.hedge_min_delay_s = 0.05
+        agent.llm_caller.observe_latency(0.01)
+        # The hedge waits for the single request slot, which cannot refill while the clock stands still
+        frozen = agent.rate_limiter.clock()
+        agent.rate_limiter.clock = lambda: frozen
+        
+        result = agent.generate(WriterInput(
+            user_prompt="Build a web app",
+            persona="technical",
+            sections_to_generate=["executive_summary"]
+        ))
+        assert result.generation_metadata["resilience"]["hedges"] == 1
+        assert agent.rate_limiter._tokens == pytest.approx(100000 - 140, abs=5)
+        
+        # Refill the request slot so the queued hedge is admitted after the request settled
+        agent.rate_limiter.clock = lambda: frozen + 60
+        agent.rate_limiter.adjust(0)
+        deadline = time.monotonic() + 2.0
+        while agent.rate_limiter.admitted < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        
+        assert agent.rate_limiter.admitted == 2
+        assert model.generate_content.call_count == 1
+        # The bucket refilled, so only an unreleased reservation would leave it short
+        assert agent.rate_limiter._tokens == pytest.approx(100000)
+    
+    def test_templates_shared_and_hot_reloaded(self, temp_dir, mock_personas, mock_section_prompts):
+        """Test that agents share compiled templates and pick up edited files."""
+        first = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs"),
+            template_reload_interval_s=0
+        )
+        second = WriterAgent(
+            personas_path=str(mock_personas),
+            section_prompts_dir=str(mock_section_prompts),
+            logs_dir=str(temp_dir / "logs")
+        )
+        assert first.templates is second.templates
+        
+        with open(mock_section_prompts / "budget.txt", 'w') as f:
+            f.write("Itemise the project costs.")
+        personas_data = json.loads(mock_personas.read_text())
+        personas_data["personas"]["technical"]["writing_style"]["tone"] = "conversational"
+        mock_personas.write_text(json.dumps(personas_data))
+        stat = mock_personas.stat()
+        os.utime(mock_personas, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        
+        prompt = second._construct_section_prompt("budget", "Build a web app", "technical")
+        assert "Itemise the project costs." in prompt
+        assert "Write in conversational tone" in prompt
+        assert "budget" in second.section_prompts
+    
+    def test_invalid_concurrency(self, temp_dir):
+        """Test that invalid concurrency limits and cache backends are rejected."""
+        with pytest.raises(ValueError):
+            WriterAgent(logs_dir=str(temp_dir / "logs"), max_concurrent_sections=0)
+        with pytest.raises(ValueError):
+            WriterAgent(logs_dir=str(temp_dir / "logs"), context_cache="redis")
+
 
 # Integration tests (require actual API keys)
 @pytest.mark.integration